@@ -39,7 +39,8 @@
 #define STEPS_PER_REV 200        // Standard NEMA 17
 #define MICROSTEPS 16            // TMC2208 microstepping setting
 #define MAX_SPEED 2000           // Steps per second
-#define ACCELERATION 1000        // Steps per second^2
+#define ACCELERATION 1000        // Default acceleration, steps per second^2
+#define MAX_ACCELERATION 32767   // Steps per second^2
 #define MIN_PULSE_WIDTH 2        // Microseconds
 
 // Position tracking
@@ -58,10 +59,19 @@ bool isMoving = false;
 unsigned long lastStepTime = 0;
 unsigned long stepInterval = 1000; // Microseconds between steps
 
+// Moves ramp up to the set speed and back down at this rate so the
+// steppers can run faster than they can start (0 = constant speed, set
+// with C<steps/sec^2>)
+long acceleration = ACCELERATION;
+
 // Command buffer
 String inputString = "";
 bool stringComplete = false;
 
+// Position telemetry: print "T:<alt>,<az>" every this many steps while
+// moving (0 = off, set with T<steps>)
+long telemetryInterval = 0;
+
 void setup() {
   // Initialize serial communication
   Serial.begin(115200);
@@ -105,7 +115,9 @@ void setup() {
 void loop() {
   // Check for serial commands
   if (stringComplete) {
+    String tag = takeCommandTag(inputString);
     processCommand(inputString);
+    echoCommandTag(tag);
     inputString = "";
     stringComplete = false;
   }
@@ -118,7 +130,9 @@ void loop() {
  * Serial event handler - called when data is available
  */
 void serialEvent() {
-  while (Serial.available()) {
+  // Stop at the end of a line: anything after it is the next (pipelined)
+  // command and stays in the receive buffer until this one is processed
+  while (Serial.available() && !stringComplete) {
     char inChar = (char)Serial.read();
     
     if (inChar == '\n') {
@@ -129,6 +143,27 @@ void serialEvent() {
   }
 }
 
+/*
+ * Split an optional "#<seq>" sequence tag off the end of a command.
+ * Tagged commands are echoed back as "#<seq>" once all of their reply
+ * lines have been sent, so a host that pipelines several commands can
+ * match every reply to the command that produced it.
+ */
+String takeCommandTag(String &cmd) {
+  int hash = cmd.indexOf('#');
+  if (hash < 0) return "";
+  String tag = cmd.substring(hash + 1);
+  cmd.remove(hash);
+  tag.trim();
+  return tag;
+}
+
+void echoCommandTag(String tag) {
+  if (tag.length() == 0) return;
+  Serial.print('#');
+  Serial.println(tag);
+}
+
 /*
  * Process incoming commands
  */
@@ -190,6 +225,23 @@ void processCommand(String cmd) {
       }
       break;
       
+    case 'M':  // Move ALT and AZ together
+    case 'm': {
+      int comma = param.indexOf(',');
+      if (comma > 0) {
+        long altSteps = param.substring(0, comma).toInt();
+        long azSteps = param.substring(comma + 1).toInt();
+        moveBoth(altSteps, azSteps);
+        Serial.print("OK:MOVE:");
+        Serial.print(altSteps);
+        Serial.print(',');
+        Serial.println(azSteps);
+      } else {
+        Serial.println("ERROR:NO_PARAMETER");
+      }
+      break;
+    }
+      
     case 'P':  // Get position
     case 'p':
       Serial.print("POS:ALT:");
@@ -221,6 +273,28 @@ void processCommand(String cmd) {
       }
       break;
       
+    case 'C':  // Set acceleration
+    case 'c':
+      if (param.length() > 0 && param.toInt() >= 0 && param.toInt() <= MAX_ACCELERATION) {
+        acceleration = param.toInt();
+        Serial.print("OK:ACCEL:");
+        Serial.println(acceleration);
+      } else {
+        Serial.println("ERROR:INVALID_ACCEL");
+      }
+      break;
+      
+    case 'T':  // Position telemetry while moving
+    case 't':
+      if (param.length() > 0 && param.toInt() >= 0) {
+        telemetryInterval = param.toInt();
+        Serial.print("OK:TELEMETRY:");
+        Serial.println(telemetryInterval);
+      } else {
+        Serial.println("ERROR:INVALID_INTERVAL");
+      }
+      break;
+      
     case 'B':  // Balance AZ screws (find center tension)
     case 'b':
       balanceAzimuth();
@@ -237,6 +311,33 @@ void processCommand(String cmd) {
   }
 }
 
+/*
+ * Microseconds to wait after step i of an n-step move
+ * 
+ * Trapezoidal profile: the step rate rises as sqrt(2 * acceleration * k),
+ * k being the steps to the nearer end of the move, until it reaches the
+ * set speed, so moves start and stop gently and cruise in between.
+ */
+unsigned long rampInterval(long i, long n) {
+  if (acceleration <= 0) return stepInterval;
+  long fromEnd = min(i + 1, n - i);
+  float rate = sqrt(2.0 * acceleration * fromEnd);
+  if (rate * stepInterval >= 1000000.0) return stepInterval;
+  return (unsigned long)(1000000.0 / rate);
+}
+
+/*
+ * delayMicroseconds() is only accurate up to 16383 us; the first steps
+ * of a ramp wait longer
+ */
+void waitMicros(unsigned long us) {
+  if (us > 16000) {
+    delay(us / 1000);
+    us %= 1000;
+  }
+  delayMicroseconds(us);
+}
+
 /*
  * Move altitude motor by specified steps
  */
@@ -253,10 +354,14 @@ void moveAltitude(long steps) {
     digitalWrite(ALT_STEP_PIN, HIGH);
     delayMicroseconds(MIN_PULSE_WIDTH);
     digitalWrite(ALT_STEP_PIN, LOW);
-    delayMicroseconds(stepInterval);
+    waitMicros(rampInterval(i, absSteps));
     
     // Update position
     altPosition += altDirection ? 1 : -1;
+    
+    if (telemetryInterval > 0 && (i + 1) % telemetryInterval == 0) {
+      sendTelemetry();
+    }
   }
 }
 
@@ -290,13 +395,87 @@ void moveAzimuthDifferential(long steps) {
     
     digitalWrite(AZ_WEST_STEP_PIN, LOW);
     digitalWrite(AZ_EAST_STEP_PIN, LOW);
-    delayMicroseconds(stepInterval);
+    waitMicros(rampInterval(i, absSteps));
     
     // Update position (positive = east, negative = west)
     azPosition += (steps > 0) ? 1 : -1;
+    
+    if (telemetryInterval > 0 && (i + 1) % telemetryInterval == 0) {
+      sendTelemetry();
+    }
   }
 }
 
+/*
+ * Move altitude and azimuth at the same time
+ * 
+ * The axis with more steps is stepped every loop iteration and the other
+ * one interleaved with Bresenham-style error accumulation, so its pulses
+ * are spread evenly and both axes finish together. The move takes as
+ * long as the longer axis would on its own.
+ */
+void moveBoth(long altSteps, long azSteps) {
+  long altAbs = abs(altSteps);
+  long azAbs = abs(azSteps);
+  long major = max(altAbs, azAbs);
+  if (major == 0) return;
+  
+  digitalWrite(ALT_DIR_PIN, altSteps > 0 ? HIGH : LOW);
+  altDirection = altSteps > 0;
+  
+  // Same differential directions as moveAzimuthDifferential()
+  digitalWrite(AZ_WEST_DIR_PIN, azSteps > 0 ? HIGH : LOW);
+  digitalWrite(AZ_EAST_DIR_PIN, azSteps > 0 ? LOW : HIGH);
+  
+  // Start half-way so the minor axis steps are centred in the move
+  long altError = major / 2;
+  long azError = major / 2;
+  
+  for (long i = 0; i < major; i++) {
+    bool stepAlt = false;
+    bool stepAz = false;
+    
+    altError += altAbs;
+    if (altError >= major) {
+      altError -= major;
+      stepAlt = true;
+    }
+    azError += azAbs;
+    if (azError >= major) {
+      azError -= major;
+      stepAz = true;
+    }
+    
+    if (stepAlt) digitalWrite(ALT_STEP_PIN, HIGH);
+    if (stepAz) {
+      digitalWrite(AZ_WEST_STEP_PIN, HIGH);
+      digitalWrite(AZ_EAST_STEP_PIN, HIGH);
+    }
+    delayMicroseconds(MIN_PULSE_WIDTH);
+    digitalWrite(ALT_STEP_PIN, LOW);
+    digitalWrite(AZ_WEST_STEP_PIN, LOW);
+    digitalWrite(AZ_EAST_STEP_PIN, LOW);
+    waitMicros(rampInterval(i, major));
+    
+    if (stepAlt) altPosition += altSteps > 0 ? 1 : -1;
+    if (stepAz) azPosition += azSteps > 0 ? 1 : -1;
+    
+    if (telemetryInterval > 0 && (i + 1) % telemetryInterval == 0) {
+      sendTelemetry();
+    }
+  }
+}
+
+/*
+ * Report both positions mid-move as "T:<alt>,<az>"
+ */
+void sendTelemetry() {
+  Serial.print("T:");
+  Serial.print(altPosition);
+  Serial.print(',');
+  Serial.println(azPosition);
+}
+
 /*
  * Balance azimuth screws to find neutral center position
  * This helps establish equal tension on both screws
@@ -349,11 +528,15 @@ void printHelp() {
   Serial.println("  D or d          - Disable motors");
   Serial.println("  A<steps>        - Move ALT motor (+/- steps)");
   Serial.println("  Z<steps>        - Move AZ (+ = East, - = West)");
+  Serial.println("  M<alt>,<az>     - Move ALT and AZ together");
   Serial.println("  P or p          - Get current positions");
   Serial.println("  R or r          - Reset position counters to 0");
   Serial.println("  V<speed>        - Set speed (steps/sec)");
+  Serial.println("  C<accel>        - Set acceleration (steps/sec^2, 0 = constant speed)");
+  Serial.println("  T<steps>        - Report T:<alt>,<az> every n steps while moving (0 = off)");
   Serial.println("  B or b          - Balance AZ screws (guide)");
   Serial.println("  ?               - Print status");
+  Serial.println("  <cmd>#<seq>     - Tagged command, echoes #<seq> when done");
   Serial.println("===================================");
   Serial.println("AZIMUTH DIFFERENTIAL CONTROL:");
   Serial.println("  Z100   - Move EAST (west tightens, east loosens)");
@@ -364,6 +547,7 @@ void printHelp() {
   Serial.println("  A-800          - Move ALT 800 steps backward");
   Serial.println("  Z200           - Move AZ 200 steps EAST");
   Serial.println("  Z-200          - Move AZ 200 steps WEST");
+  Serial.println("  M400,-100      - ALT 400 up and AZ 100 WEST at once");
   Serial.println("  V1000          - Set speed to 1000 steps/sec");
   Serial.println("===================================");
 }
@@ -381,6 +565,9 @@ void printStatus() {
   Serial.print("  Speed: ");
   Serial.print(altSpeed);
   Serial.println(" steps/sec");
+  Serial.print("  Acceleration: ");
+  Serial.print(acceleration);
+  Serial.println(" steps/sec^2");
   Serial.print("  Microsteps: ");
   Serial.println(MICROSTEPS);
   Serial.print("  Steps/Rev: ");
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Polar Alignment History Extraction
+
+Scans archived SharpCap and NINA logs for every polar alignment solve
+ever logged and writes them to one compact columnar file, so the
+convergence of past alignment sessions can be analysed without the
+original logs.
+
+Each log is memory-mapped and split into line-aligned chunks that a
+process pool scans on all cores. Workers search the mapped bytes for the
+solve marker and decode only the lines around each hit, using the same
+patterns as the live AutoPA tailer (solve_log.py).
+
+Solves are grouped into sessions: a new session starts in each log file
+and after more than SESSION_GAP seconds without a solve.
+
+Output format (a zip archive, one member per column, like numpy's .npz):
+  schema.json        row count, column types and the source file table
+  source.u4          index into the source file table
+  session.u4         session number
+  timestamp.str      solve time of day, newline separated
+  alt_error.f8       ALT error (arcseconds)
+  az_error.f8        AZ error (arcseconds)
+  total_error.f8     total error (arcseconds)
+Numeric columns are little-endian arrays; load_history() reads them back.
+
+Usage:
+    python alignment_history.py LOGS... [--output history.zip] [--jobs N]
+    python alignment_history.py ~/AppData/Local/SharpCap/logs --software sharpcap
+    python alignment_history.py --show history.zip
+
+Author: Polar Align Automation Project
+"""
+
+import sys
+import json
+import mmap
+import time
+import fnmatch
+import zipfile
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from solve_log import (NINA_LOG_GLOB, PARSERS, SHARPCAP_LOG_GLOB,
+                       candidate_lines, timestamp_seconds)
+
+
+# Bytes per scan task; larger files are split on line boundaries
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Scan tasks sent to a worker at once (many small logs)
+TASKS_PER_BATCH = 4
+
+# Seconds without a solve that end an alignment session
+SESSION_GAP = 600
+
+NUMERIC_COLUMNS = [
+    ('source', 'u4', 'I'),
+    ('session', 'u4', 'I'),
+    ('alt_error', 'f8', 'd'),
+    ('az_error', 'f8', 'd'),
+    ('total_error', 'f8', 'd'),
+]
+
+
+def detect_software(path: Path) -> str:
+    """NINA writes one log per day named by date; anything else is SharpCap"""
+    return 'nina' if fnmatch.fnmatch(path.name, NINA_LOG_GLOB) else 'sharpcap'
+
+
+def find_logs(paths: List[str]) -> List[Path]:
+    """
+    Expand files and directories (searched recursively) into log files
+
+    Args:
+        paths: Files or directories
+
+    Returns:
+        Sorted, de-duplicated log files
+    """
+    logs = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            logs.update(p for p in path.rglob(SHARPCAP_LOG_GLOB) if p.is_file())
+        elif path.is_file():
+            logs.add(path)
+        else:
+            print(f"WARNING: Not found: {path}")
+    return sorted(logs)
+
+
+def plan_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split a log into line-aligned byte ranges
+
+    Args:
+        path: Log file
+        chunk_size: Target bytes per range
+
+    Returns:
+        List of (start, end) offsets covering the whole file
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return []
+    if size <= chunk_size:
+        return [(0, size)]
+
+    chunks = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = size
+            if start + chunk_size < size:
+                newline = mm.find(b'\n', start + chunk_size - 1)
+                if newline >= 0:
+                    end = newline + 1
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+def scan_chunk(task: tuple) -> List[tuple]:
+    """
+    Extract the solves of one byte range (runs in a worker process)
+
+    Args:
+        task: (path, start, end, software)
+
+    Returns:
+        List of (timestamp, alt_error, az_error, total_error)
+    """
+    path, start, end, software = task
+    marker, parse_line = PARSERS[software]
+    records = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in candidate_lines(mm, marker.encode(), start, end):
+            error = parse_line(line.decode('utf-8', errors='replace'))
+            if error:
+                records.append((error['timestamp'], float(error['alt_error']),
+                                float(error['az_error']), float(error['total_error'])))
+    return records
+
+
+def extract(logs: List[Path], software: Optional[str] = None,
+            jobs: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Extract every solve from a set of logs
+
+    Args:
+        logs: Log files
+        software: 'sharpcap', 'nina', or None to detect per file
+        jobs: Worker processes (default: one per core)
+        chunk_size: Bytes per scan task
+
+    Returns:
+        Columns: 'sources' (file table) plus one list per output column
+    """
+    tasks = []
+    owners = []
+    for index, path in enumerate(logs):
+        log_software = software or detect_software(path)
+        for start, end in plan_chunks(path, chunk_size):
+            tasks.append((str(path), start, end, log_software))
+            owners.append(index)
+
+    columns = {'sources': [str(path) for path in logs], 'source': [], 'session': [],
+               'timestamp': [], 'alt_error': [], 'az_error': [], 'total_error': []}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # Results come back in task order, so each file's solves stay in log order
+        results = pool.map(scan_chunk, tasks, chunksize=TASKS_PER_BATCH)
+
+        session = -1
+        last_source = None
+        last_seconds = None
+        for source, records in zip(owners, results):
+            for timestamp, alt_error, az_error, total_error in records:
+                seconds = timestamp_seconds(timestamp)
+                gap = None if last_seconds is None else (seconds - last_seconds) % 86400
+                if source != last_source or gap > SESSION_GAP:
+                    session += 1
+                last_source = source
+                last_seconds = seconds
+
+                columns['source'].append(source)
+                columns['session'].append(session)
+                columns['timestamp'].append(timestamp)
+                columns['alt_error'].append(alt_error)
+                columns['az_error'].append(az_error)
+                columns['total_error'].append(total_error)
+
+    return columns
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def save_history(columns: dict, output: str):
+    """
+    Write extracted columns to the columnar zip format
+
+    Args:
+        columns: Result of extract()
+        output: Output path
+    """
+    schema = {
+        'rows': len(columns['timestamp']),
+        'sources': columns['sources'],
+        'columns': {name: kind for name, kind, _ in NUMERIC_COLUMNS},
+    }
+    schema['columns']['timestamp'] = 'str'
+
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('schema.json', json.dumps(schema, indent=1))
+        for name, kind, typecode in NUMERIC_COLUMNS:
+            archive.writestr(f'{name}.{kind}', _little_endian(array(typecode, columns[name])))
+        archive.writestr('timestamp.str', '\n'.join(columns['timestamp']))
+
+
+def load_history(path: str) -> dict:
+    """
+    Read a file written by save_history()
+
+    Args:
+        path: History file
+
+    Returns:
+        Dict with 'sources' (file table) and one array/list per column
+    """
+    with zipfile.ZipFile(path) as archive:
+        schema = json.loads(archive.read('schema.json'))
+        columns = {'sources': schema['sources']}
+        for name, kind, typecode in NUMERIC_COLUMNS:
+            values = array(typecode)
+            values.frombytes(archive.read(f'{name}.{kind}'))
+            if sys.byteorder == 'big':
+                values.byteswap()
+            columns[name] = values
+        text = archive.read('timestamp.str').decode('utf-8')
+        columns['timestamp'] = text.split('\n') if text else []
+    return columns
+
+
+def print_sessions(columns: dict):
+    """Print one line per alignment session: solves and error convergence"""
+    sessions = {}
+    for row, session in enumerate(columns['session']):
+        sessions.setdefault(session, []).append(row)
+
+    print(f"{'Session':>7}  {'Start':<15} {'Solves':>6} {'First':>9} {'Final':>9}  Source")
+    for session, rows in sessions.items():
+        first, last = rows[0], rows[-1]
+        source = Path(columns['sources'][columns['source'][first]]).name
+        print(f"{session:>7}  {columns['timestamp'][first]:<15} {len(rows):>6} "
+              f"{columns['total_error'][first]:>8.1f}\" {columns['total_error'][last]:>8.1f}\"  {source}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extract every polar alignment solve from SharpCap/NINA log archives',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python alignment_history.py ~/AppData/Local/SharpCap/logs
+    python alignment_history.py archive/ --output history.zip --jobs 8
+    python alignment_history.py "~/Documents/N.I.N.A/PolarAlignment" --software nina
+    python alignment_history.py --show history.zip
+"""
+    )
+
+    parser.add_argument('logs',
+                        nargs='*',
+                        help='Log files or directories (searched recursively for *.log)')
+
+    parser.add_argument('--software', '-s',
+                        choices=['sharpcap', 'nina'],
+                        help='Log format (default: NINA for YYYY-MM-DD.log names, '
+                             'SharpCap otherwise)')
+
+    parser.add_argument('--output', '-o',
+                        default='alignment_history.zip',
+                        help='Output file (default: alignment_history.zip)')
+
+    parser.add_argument('--jobs', '-j',
+                        type=int,
+                        help='Worker processes (default: one per core)')
+
+    parser.add_argument('--chunk-mb',
+                        type=int,
+                        default=CHUNK_SIZE // (1024 * 1024),
+                        help=f'Scan task size in MB (default: {CHUNK_SIZE // (1024 * 1024)})')
+
+    parser.add_argument('--show',
+                        metavar='FILE',
+                        help='Print the sessions of an existing history file and exit')
+
+    args = parser.parse_args()
+
+    if args.show:
+        print_sessions(load_history(args.show))
+        return
+
+    if not args.logs:
+        parser.error('no logs given')
+
+    logs = find_logs(args.logs)
+    if not logs:
+        print("ERROR: No log files found")
+        sys.exit(1)
+
+    megabytes = sum(path.stat().st_size for path in logs) / 1e6
+    print(f"Scanning {len(logs)} log file(s), {megabytes:.1f} MB...")
+
+    start = time.perf_counter()
+    columns = extract(logs, args.software, args.jobs, max(1, args.chunk_mb) * 1024 * 1024)
+    elapsed = time.perf_counter() - start
+
+    save_history(columns, args.output)
+
+    rows = len(columns['timestamp'])
+    sessions = len(set(columns['session']))
+    print(f"Found {rows} solves in {sessions} session(s) "
+          f"in {elapsed:.2f} s ({megabytes / max(elapsed, 1e-9):.0f} MB/s)")
+    print(f"Wrote {args.output}\n")
+    if rows:
+        print_sessions(columns)
+
+
+if __name__ == '__main__':
+    main()
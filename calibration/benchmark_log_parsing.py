@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+AutoPA Log Parsing Throughput Benchmark
+
+Generates a synthetic SharpCap or NINA log: mostly unrelated chatter with
+a polar alignment solve every N lines. It then measures how fast the log
+is parsed, in lines per second and MB per second, by:
+
+  baseline  - per-line re.search with the pattern string, as AutoPA did
+              before parsing moved to solve_log.py
+  per-line  - solve_log.parse_*_line on every line (marker prefilter)
+  chunk     - solve_log.parse_text on the whole text, as the live
+              tailer does with each chunk it reads
+
+Every method must find the same solves; a mismatch is reported.
+
+Usage:
+  python benchmark_log_parsing.py
+  python benchmark_log_parsing.py --software nina --lines 2000000
+  python benchmark_log_parsing.py --solve-every 50 --reps 5
+
+Author: Polar Align Automation Project
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Callable, List
+
+from solve_log import (NINA_PATTERN, SHARPCAP_PATTERN, parse_nina_line,
+                       parse_sharpcap_line, parse_text)
+
+
+# Typical lines between solves that a busy capture session writes
+CHATTER = [
+    "Info\t21:04:13.{us:06d}\t#1\tCamera frame received, exposure 2000ms, gain 300",
+    "Debug\t21:04:13.{us:06d}\t#7\tHistogram stretch updated (black=0.012, white=0.874)",
+    "Info\t21:04:13.{us:06d}\t#1\tSaving frame to C:\\Captures\\PA\\frame_{n:05d}.fits",
+    "Debug\t21:04:13.{us:06d}\t#12\tMount position RA=12.3456 Dec=89.1234 tracking=True",
+    "Info\t21:04:13.{us:06d}\t#3\tFocuser temperature 4.2C, position 12345",
+]
+NINA_CHATTER = [
+    "21:04:13.{ms:03d} - Camera: exposure started (2.0 s, gain 100)",
+    "21:04:13.{ms:03d} - Guider: RMS 0.84\" (RA 0.61\", Dec 0.58\")",
+    "21:04:13.{ms:03d} - Sequence: frame {n} of 300 saved",
+]
+
+
+def synthetic_log(software: str, lines: int, solve_every: int, seed: int = 1) -> str:
+    """
+    Build synthetic log text
+
+    Args:
+        software: 'sharpcap' or 'nina'
+        lines: Number of lines
+        solve_every: One solve line per this many lines
+        seed: Random seed (for repeatable logs)
+
+    Returns:
+        Log text with Windows line endings, as the software writes it
+    """
+    rng = random.Random(seed)
+    out = []
+    for n in range(lines):
+        us = rng.randrange(1000000)
+        if n % solve_every == solve_every - 1:
+            alt = rng.uniform(-30, 30)
+            az = rng.uniform(-30, 30)
+            if software == 'sharpcap':
+                out.append(f"Info\t21:04:13.{us:06d}\t#5\tPolar align result "
+                           f"AltAzCor=Alt={alt:.4f},Az={az:.4f}")
+            else:
+                out.append(f"21:04:13.{us // 1000:03d} - " + json.dumps(
+                    {'Alt': round(alt * 60, 2), 'Az': round(az * 60, 2),
+                     'Total': round((alt**2 + az**2)**0.5 * 60, 2)}))
+        elif software == 'sharpcap':
+            out.append(rng.choice(CHATTER).format(us=us, n=n))
+        else:
+            out.append(rng.choice(NINA_CHATTER).format(ms=us // 1000, n=n))
+    return '\r\n'.join(out) + '\r\n'
+
+
+def baseline_parser(software: str) -> Callable[[str], List[dict]]:
+    """Per-line parsing with the pattern string, as AutoPA originally did"""
+    pattern = (SHARPCAP_PATTERN if software == 'sharpcap' else NINA_PATTERN).pattern
+
+    def parse(text: str) -> List[dict]:
+        errors = []
+        for line in text.splitlines():
+            match = re.search(pattern, line)
+            if not match:
+                continue
+            if software == 'sharpcap':
+                alt_error = float(match.group(2)) * 60.0
+                az_error = float(match.group(3)) * 60.0
+                errors.append({'timestamp': match.group(1), 'alt_error': alt_error,
+                               'az_error': az_error,
+                               'total_error': (alt_error**2 + az_error**2)**0.5})
+            else:
+                try:
+                    import json
+                    data = json.loads(match.group(2))
+                    errors.append({'timestamp': match.group(1),
+                                   'alt_error': data.get('Alt', 0),
+                                   'az_error': data.get('Az', 0),
+                                   'total_error': data.get('Total', 0)})
+                except:
+                    pass
+        return errors
+
+    return parse
+
+
+def per_line_parser(software: str) -> Callable[[str], List[dict]]:
+    """Per-line parsing with the shared, prefiltered line parsers"""
+    parse_line = parse_sharpcap_line if software == 'sharpcap' else parse_nina_line
+
+    def parse(text: str) -> List[dict]:
+        errors = []
+        for line in text.splitlines():
+            error = parse_line(line)
+            if error:
+                errors.append(error)
+        return errors
+
+    return parse
+
+
+def chunk_parser(software: str) -> Callable[[str], List[dict]]:
+    """Whole-chunk parsing, as the live tailer does"""
+    return lambda text: parse_text(text, software)
+
+
+def run_method(parse: Callable[[str], List[dict]], text: str, reps: int) -> tuple:
+    """
+    Time a parser
+
+    Returns:
+        (best elapsed seconds over reps, errors found)
+    """
+    best = float('inf')
+    errors = []
+    for _ in range(reps):
+        start = time.perf_counter()
+        errors = parse(text)
+        best = min(best, time.perf_counter() - start)
+    return best, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='AutoPA log parsing throughput benchmark',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python benchmark_log_parsing.py
+    python benchmark_log_parsing.py --software nina --lines 2000000
+    python benchmark_log_parsing.py --solve-every 50 --reps 5
+"""
+    )
+    parser.add_argument('--software', '-s',
+                        choices=['sharpcap', 'nina'],
+                        default='sharpcap',
+                        help='Log format to generate')
+    parser.add_argument('--lines', '-n',
+                        type=int,
+                        default=500000,
+                        help='Lines of synthetic log (default: 500000)')
+    parser.add_argument('--solve-every',
+                        type=int,
+                        default=2000,
+                        help='One solve line per this many lines (default: 2000)')
+    parser.add_argument('--reps', '-r',
+                        type=int,
+                        default=3,
+                        help='Timed runs per method, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    if args.lines < 1 or args.solve_every < 1 or args.reps < 1:
+        print("ERROR: --lines, --solve-every and --reps must be at least 1")
+        sys.exit(1)
+
+    print(f"Generating {args.lines} lines of {args.software} log "
+          f"(one solve per {args.solve_every})...")
+    text = synthetic_log(args.software, args.lines, args.solve_every)
+    megabytes = len(text.encode('utf-8')) / 1e6
+    print(f"  {megabytes:.1f} MB\n")
+
+    methods = [
+        ('baseline', baseline_parser(args.software)),
+        ('per-line', per_line_parser(args.software)),
+        ('chunk', chunk_parser(args.software)),
+    ]
+
+    print(f"{'Method':<10} {'Time':>10} {'Lines/s':>14} {'MB/s':>10} {'Solves':>8} {'Speedup':>8}")
+    reference = None
+    baseline_time = None
+    for name, parse in methods:
+        elapsed, errors = run_method(parse, text, args.reps)
+        if reference is None:
+            reference = errors
+            baseline_time = elapsed
+        status = '' if errors == reference else '  MISMATCH'
+        print(f"{name:<10} {elapsed * 1000:>8.1f}ms {args.lines / elapsed:>14,.0f} "
+              f"{megabytes / elapsed:>10.1f} {len(errors):>8d} "
+              f"{baseline_time / elapsed:>7.1f}x{status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,8 +11,11 @@ The calibration is saved to the Arduino's EEPROM for permanent storage.
 
 Usage:
     python calibration_wizard.py [port]
+    python calibration_wizard.py --daemon [socket]
     
-If port is not specified, will auto-detect Arduino.
+If port is not specified, will auto-detect Arduino. With --daemon the
+wizard shares the session of a running mount_daemon.py instead of opening
+the port itself.
 """
 
 import serial
@@ -20,11 +23,35 @@ import serial.tools.list_ports
 import time
 import sys
 
+# Fast reconnect helpers and the shared reply codec from the main
+# controller (optional)
+try:
+    from polar_align_control import (DEFAULT_ACCELERATION, fast_open, move_duration,
+                                     remember_port, reset_arduino)
+    from polar_align_protocol import is_reply_complete, parse_ack, parse_calibration
+except ImportError:
+    fast_open = None
+    remember_port = None
+    reset_arduino = None
+    is_reply_complete = None
+    DEFAULT_ACCELERATION = 1000
+
+# Shared session of a running mount_daemon.py (optional)
+try:
+    from mount_daemon import DEFAULT_SOCKET, MountClient
+except ImportError:
+    MountClient = None
+
 class CalibrationWizard:
-    def __init__(self, port=None):
+    def __init__(self, port=None, daemon=None):
         self.serial = None
         self.port = port
         self.connected = False
+        self.speed = 800
+        self.acceleration = DEFAULT_ACCELERATION
+        # Socket of a mount daemon to use instead of the serial port
+        self.daemon = daemon
+        self.client = None
         
     def find_arduino(self):
         """Auto-detect Arduino port"""
@@ -36,6 +63,26 @@ class CalibrationWizard:
     
     def connect(self):
         """Connect to Arduino"""
+        if self.daemon:
+            self.client = MountClient(self.daemon)
+            if not self.client.connect():
+                return False
+            self.connected = True
+            print(f"✓ Connected to mount daemon on {self.daemon}")
+            return True
+        
+        # Reuse a running controller without resetting it when possible
+        if fast_open is not None:
+            ser = fast_open(self.port)
+            if ser is not None:
+                ser.timeout = 2
+                self.serial = ser
+                self.port = ser.port
+                self.connected = True
+                remember_port(ser)
+                print(f"✓ Connected to Arduino on {self.port}")
+                return True
+        
         if not self.port:
             self.port = self.find_arduino()
             
@@ -45,6 +92,10 @@ class CalibrationWizard:
             
         try:
             self.serial = serial.Serial(self.port, 115200, timeout=2)
+            # A port the controller tools have used keeps DTR asserted, so
+            # opening it alone does not reset the Arduino
+            if reset_arduino is not None:
+                reset_arduino(self.serial)
             time.sleep(2)  # Wait for Arduino reset
             
             # Clear any startup messages
@@ -52,27 +103,72 @@ class CalibrationWizard:
                 self.serial.readline()
                 
             self.connected = True
+            if remember_port is not None:
+                remember_port(self.serial)
             print(f"✓ Connected to Arduino on {self.port}")
             return True
         except Exception as e:
             print(f"ERROR: Could not connect to {self.port}: {e}")
             return False
     
-    def send_command(self, cmd):
+    def send_command(self, cmd, timeout=2.0):
         """Send command and return response"""
         if not self.connected:
             return None
+        
+        if self.client is not None:
+            # The daemon collects the complete reply
+            timeout += self.move_time(cmd, self.client.current_speed,
+                                      self.client.acceleration)
+            return self.client.send_command(cmd, timeout) or ''
             
         self.serial.write(f"{cmd}\n".encode())
-        time.sleep(0.1)
         
+        if is_reply_complete is None:
+            time.sleep(0.1)
+            response = []
+            while self.serial.in_waiting:
+                line = self.serial.readline().decode('utf-8').strip()
+                response.append(line)
+            return '\n'.join(response)
+        
+        timeout += self.move_time(cmd, self.speed, self.acceleration)
+        
+        # Read until the reply is complete instead of for a fixed time
         response = []
-        while self.serial.in_waiting:
-            line = self.serial.readline().decode('utf-8').strip()
-            response.append(line)
+        deadline = time.monotonic() + timeout
+        while not is_reply_complete(cmd, response):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.serial.timeout = remaining
+            line = self.serial.readline().decode('utf-8', errors='replace').strip()
+            if line:
+                response.append(line)
+        
+        for line in response:
+            ack = parse_ack(line)
+            if ack and ack.name == 'SPEED' and ack.value:
+                self.speed = ack.value
+            elif ack and ack.name == 'ACCEL' and ack.value is not None:
+                self.acceleration = ack.value
+        
+        cal = parse_calibration('\n'.join(response))
+        if cal and 'acceleration' in cal:
+            self.acceleration = cal['acceleration']
         
         return '\n'.join(response)
     
+    def move_time(self, cmd, speed, acceleration):
+        """Seconds a move command keeps the firmware busy (0 for others)"""
+        # Moves reply only once the motion has finished
+        if cmd[:1] in ('A', 'Z'):
+            try:
+                return move_duration(int(cmd[1:]), speed, acceleration=acceleration)
+            except ValueError:
+                pass
+        return 0.0
+    
     def clear_screen(self):
         """Clear terminal screen"""
         print("\n" * 50)
@@ -343,6 +439,59 @@ You'll need to observe the mount carefully (or use indicator)
         
         return False
     
+    def calibrate_acceleration(self):
+        """Find an acceleration that lets the motors slew fast without stalling"""
+        self.print_header("Setting Acceleration")
+        
+        print(f"""
+Steppers cannot start at full speed under load - they stall and lose
+steps. The controller ramps each move up to speed and back down, so a
+gentle acceleration lets large corrections cruise much faster.
+
+PROCEDURE:
+1. Enter an acceleration (steps/sec^2, 0 = no ramp)
+2. The ALT motor moves 3200 steps out and back at 2000 steps/sec
+3. Watch and listen: a stalled motor buzzes or stops turning
+4. Lower the acceleration until both moves run cleanly
+
+Current acceleration: {self.acceleration} steps/sec^2
+""")
+        
+        perform = input("Perform acceleration test? (yes/no): ").strip().lower()
+        if perform != 'yes':
+            return False
+        
+        self.send_command("E")
+        accel = self.acceleration
+        
+        while True:
+            entry = input(f"\nAcceleration to test [{accel}]: ").strip()
+            if entry:
+                try:
+                    accel = int(entry)
+                except ValueError:
+                    print("Enter a whole number of steps/sec^2")
+                    continue
+            
+            response = self.send_command(f"C{accel}")
+            print(response)
+            if not response or 'OK:ACCEL' not in response:
+                return False
+            
+            self.send_command("V2000")
+            print("\n--- Moving ALT 3200 steps out and back ---")
+            self.send_command("A3200")
+            self.send_command("A-3200")
+            self.send_command("V800")
+            
+            if input("\nDid both moves run without stalling? (yes/no): ").strip().lower() == 'yes':
+                print(f"\nAcceleration set to {accel} steps/sec^2")
+                print("It is stored with the calibration when you save it.")
+                return True
+            
+            accel = max(0, accel // 2)
+            print(f"Try a lower value, e.g. {accel}")
+    
     def run_wizard(self):
         """Run complete calibration wizard"""
         self.clear_screen()
@@ -362,6 +511,7 @@ What we'll calibrate:
   2. AZ (Azimuth) steps per arcsecond
   3. ALT backlash
   4. AZ backlash
+  5. Acceleration for fast slews
 
 Calibration data is saved to Arduino EEPROM (permanent storage).
 
@@ -404,6 +554,9 @@ Press ENTER to begin or Ctrl+C to exit...
         # Calibrate AZ backlash
         self.calibrate_backlash("AZ")
         
+        # Acceleration (stored with the calibration)
+        self.calibrate_acceleration()
+        
         # Show final calibration
         self.print_header("Final Calibration")
         response = self.send_command("CAL:SHOW")
@@ -433,12 +586,21 @@ Press ENTER to begin or Ctrl+C to exit...
 ╚════════════════════════════════════════════════════════════════╝
 """)
         
-        self.serial.close()
+        if self.client is not None:
+            self.client.disconnect()
+        else:
+            self.serial.close()
 
 def main():
-    port = sys.argv[1] if len(sys.argv) > 1 else None
+    args = sys.argv[1:]
     
-    wizard = CalibrationWizard(port)
+    if args and args[0] == '--daemon':
+        if MountClient is None:
+            print("ERROR: --daemon needs mount_daemon.py from the python folder")
+            return
+        wizard = CalibrationWizard(daemon=args[1] if len(args) > 1 else DEFAULT_SOCKET)
+    else:
+        wizard = CalibrationWizard(args[0] if args else None)
     wizard.run_wizard()
 
 if __name__ == "__main__":
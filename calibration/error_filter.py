@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Noise filtering of plate-solved alignment errors for AutoPA
+
+Each plate solve's error carries several arcseconds of seeing and solve
+jitter. Reacting to every raw sample makes AutoPA chase noise: near the
+target it hunts back and forth, and sub-step corrections burn a motion
+cycle for nothing.
+
+ErrorFilter keeps a per-axis Kalman estimate of the true error:
+
+  - every solve is a measurement with the known solve variance
+  - between solves the error drifts only slightly (DRIFT_NOISE)
+  - a correction shifts the estimate by the move's expected effect, with
+    an uncertainty proportional to its size (MOVE_UNCERTAINTY)
+
+A solve further than RESET_SIGMAS from the prediction (the mount was
+bumped, or a correction landed far from its expected effect) restarts
+the axis from that solve.
+
+within_noise() is the dead-band: an axis whose estimated error is
+smaller than DEADBAND_SIGMAS times its uncertainty, or than one motor
+step, is not corrected. Another solve refines the estimate instead.
+
+Example:
+    error_filter = ErrorFilter(solve_noise=5.0)
+    alt, az = error_filter.update(raw_alt, raw_az)
+    if not error_filter.within_noise(0, 1 / alt_steps_per_arcsec):
+        ...correct ALT...
+    error_filter.predict_move((alt_change, az_change))
+"""
+
+from typing import Optional, Sequence, Tuple
+
+from gain_estimator import SOLVE_NOISE
+
+# Drift of the true error between solves (arcseconds, 1 sigma)
+DRIFT_NOISE = 1.0
+
+# Uncertainty of a correction's effect, relative to its size
+MOVE_UNCERTAINTY = 0.5
+
+# Estimated errors below this many standard deviations are not corrected
+DEADBAND_SIGMAS = 2.0
+
+# Innovation (in standard deviations) that restarts an axis from the solve
+RESET_SIGMAS = 5.0
+
+
+class ErrorFilter:
+    """Per-axis Kalman filter of the polar alignment error"""
+
+    def __init__(self, solve_noise: float = SOLVE_NOISE, drift_noise: float = DRIFT_NOISE,
+                 move_uncertainty: float = MOVE_UNCERTAINTY):
+        """
+        Initialize the filter
+
+        Args:
+            solve_noise: Plate-solve error noise (arcseconds, 1 sigma)
+            drift_noise: Drift of the true error between solves (arcseconds)
+            move_uncertainty: Uncertainty of a correction's effect (fraction)
+        """
+        self.solve_variance = solve_noise ** 2
+        self.drift_variance = drift_noise ** 2
+        self.move_uncertainty = move_uncertainty
+        self.estimate: Optional[list] = None  # [alt, az] arcseconds
+        self.variance = [0.0, 0.0]
+        self.samples = 0
+
+    def update(self, alt_error: float, az_error: float) -> Tuple[float, float]:
+        """
+        Add a plate-solved error
+
+        Args:
+            alt_error: Solved ALT error (arcseconds)
+            az_error: Solved AZ error (arcseconds)
+
+        Returns:
+            Filtered (ALT, AZ) error
+        """
+        self.samples += 1
+        measured = (float(alt_error), float(az_error))
+
+        if self.estimate is None:
+            self.estimate = list(measured)
+            self.variance = [self.solve_variance, self.solve_variance]
+            return tuple(self.estimate)
+
+        for axis in range(2):
+            predicted_variance = self.variance[axis] + self.drift_variance
+            innovation = measured[axis] - self.estimate[axis]
+            if innovation ** 2 > RESET_SIGMAS ** 2 * (predicted_variance + self.solve_variance):
+                self.estimate[axis] = measured[axis]
+                self.variance[axis] = self.solve_variance
+                continue
+
+            gain = predicted_variance / (predicted_variance + self.solve_variance)
+            self.estimate[axis] += gain * innovation
+            self.variance[axis] = (1.0 - gain) * predicted_variance
+
+        return tuple(self.estimate)
+
+    def predict_move(self, change: Sequence[float]):
+        """
+        Account for a completed correction
+
+        Args:
+            change: Expected (ALT, AZ) error reduction of the move (arcseconds)
+        """
+        if self.estimate is None:
+            return
+        for axis in range(2):
+            self.estimate[axis] -= change[axis]
+            self.variance[axis] += (self.move_uncertainty * change[axis]) ** 2
+
+    def sigma(self, axis: int) -> float:
+        """Standard deviation of an axis' estimate (0 = ALT, 1 = AZ)"""
+        return self.variance[axis] ** 0.5
+
+    def within_noise(self, axis: int, one_step: float) -> bool:
+        """
+        Check whether an axis' error is too small to correct
+
+        Args:
+            axis: 0 = ALT, 1 = AZ
+            one_step: Arcseconds moved by one motor step on this axis
+
+        Returns:
+            True if the estimated error is below the noise floor or one step
+        """
+        if self.estimate is None:
+            return False
+        floor = max(DEADBAND_SIGMAS * self.sigma(axis), one_step)
+        return abs(self.estimate[axis]) < floor
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Online steps-per-arcsec estimation for AutoPA
+
+AutoPA converts each plate-solved error into motor steps with the
+calibration's steps per arcsecond. If the calibration is off, or moving
+one axis also shifts the other axis' error (a tilted base, a loose
+adjuster), every correction lands short or wide and costs another
+exposure and solve.
+
+GainEstimator learns the real response from AutoPA's own corrections.
+It models the error change of each move as
+
+    error_before - error_after = G * steps
+
+where G is a 2x2 matrix in arcseconds per step (rows: ALT, AZ error;
+columns: ALT, AZ steps). The diagonal is 1 / steps_per_arcsec and the
+off-diagonal terms are the cross-coupling. Each row is fitted by
+recursive least squares, starting from the calibration as a prior, so
+the first correction behaves exactly as before and one or two moves are
+enough to correct a wrong calibration. The next correction solves
+G * steps = error for the steps.
+
+Example:
+    estimator = GainEstimator(89.5, 25.0)
+    alt_steps, az_steps = estimator.correction(alt_error, az_error)
+    ...move, wait for the next solve...
+    estimator.update((alt_steps, az_steps), (alt_error, az_error),
+                     (new_alt_error, new_az_error))
+"""
+
+from typing import Sequence, Tuple
+
+# Relative uncertainty of the calibrated steps per arcsecond
+CALIBRATION_UNCERTAINTY = 0.5
+
+# Cross-coupling uncertainty, as a fraction of the axis' own gain
+COUPLING_UNCERTAINTY = 0.2
+
+# Plate-solve noise (arcseconds, 1 sigma)
+SOLVE_NOISE = 5.0
+
+# Learned gains are kept within this factor of the calibration
+MAX_GAIN_RATIO = 4.0
+
+
+def whole_steps(steps: float) -> int:
+    """
+    Truncate a step count like int(), ignoring rounding error
+
+    The gains are stored inverted, so 30" at 10 steps/arcsec comes back
+    as 299.99999999999994 steps; plain int() would lose a step against
+    the fixed-gain path's int(30 * 10).
+    """
+    return int(round(steps, 6))
+
+
+class GainEstimator:
+    """Recursive least-squares fit of the mount's arcsec-per-step response"""
+
+    def __init__(self, alt_steps_per_arcsec: float, az_steps_per_arcsec: float,
+                 solve_noise: float = SOLVE_NOISE):
+        """
+        Initialize from the calibration
+
+        Args:
+            alt_steps_per_arcsec: Calibrated ALT steps per arcsecond
+            az_steps_per_arcsec: Calibrated AZ steps per arcsecond
+            solve_noise: Plate-solve error noise (arcseconds, 1 sigma)
+        """
+        self.nominal = (1.0 / alt_steps_per_arcsec, 1.0 / az_steps_per_arcsec)
+        self.noise_variance = solve_noise ** 2
+        self.updates = 0
+
+        # Gain rows and their covariance, one per error axis
+        self.gain = [[self.nominal[0], 0.0], [0.0, self.nominal[1]]]
+        self.covariance = []
+        for axis in range(2):
+            # Entry [axis][column] is arcsec per step of that column's axis
+            variance = [(COUPLING_UNCERTAINTY * gain) ** 2 for gain in self.nominal]
+            variance[axis] = (CALIBRATION_UNCERTAINTY * self.nominal[axis]) ** 2
+            self.covariance.append([[variance[0], 0.0], [0.0, variance[1]]])
+
+    @property
+    def steps_per_arcsec(self) -> Tuple[float, float]:
+        """Current (ALT, AZ) steps per arcsecond estimate"""
+        return (1.0 / self.gain[0][0], 1.0 / self.gain[1][1])
+
+    @property
+    def coupling(self) -> Tuple[float, float]:
+        """
+        Cross-coupling as a fraction of the other axis' own gain
+
+        Returns:
+            (ALT error per AZ step, AZ error per ALT step), each relative
+            to the axis whose steps cause it
+        """
+        return (self.gain[0][1] / self.gain[1][1], self.gain[1][0] / self.gain[0][0])
+
+    def expected_change(self, steps: Sequence[int]) -> Tuple[float, float]:
+        """
+        Error reduction a move should produce under the current model
+
+        Args:
+            steps: (ALT, AZ) steps
+
+        Returns:
+            (ALT, AZ) error change in arcseconds
+        """
+        (a, b), (c, d) = self.gain
+        return (a * steps[0] + b * steps[1], c * steps[0] + d * steps[1])
+
+    def update(self, steps: Sequence[int], error_before: Sequence[float],
+               error_after: Sequence[float]):
+        """
+        Fit one completed correction
+
+        Args:
+            steps: (ALT, AZ) steps that were moved
+            error_before: (ALT, AZ) error the move corrected (arcseconds)
+            error_after: (ALT, AZ) error solved after the move (arcseconds)
+        """
+        x = (float(steps[0]), float(steps[1]))
+        if x == (0.0, 0.0):
+            return
+
+        for axis in range(2):
+            row = self.gain[axis]
+            p = self.covariance[axis]
+            observed = error_before[axis] - error_after[axis]
+
+            px = (p[0][0] * x[0] + p[0][1] * x[1], p[1][0] * x[0] + p[1][1] * x[1])
+            denominator = x[0] * px[0] + x[1] * px[1] + self.noise_variance
+            k = (px[0] / denominator, px[1] / denominator)
+            residual = observed - (row[0] * x[0] + row[1] * x[1])
+
+            row[0] += k[0] * residual
+            row[1] += k[1] * residual
+            self.covariance[axis] = [[p[0][0] - k[0] * px[0], p[0][1] - k[0] * px[1]],
+                                     [p[1][0] - k[1] * px[0], p[1][1] - k[1] * px[1]]]
+
+            # A wrong-signed or runaway gain would drive the mount away
+            nominal = self.nominal[axis]
+            row[axis] = min(max(row[axis], nominal / MAX_GAIN_RATIO), nominal * MAX_GAIN_RATIO)
+
+        self.updates += 1
+
+    def correction(self, alt_error: float, az_error: float) -> Tuple[int, int]:
+        """
+        Steps that cancel an error under the current model
+
+        Args:
+            alt_error: ALT error (arcseconds)
+            az_error: AZ error (arcseconds)
+
+        Returns:
+            (ALT steps, AZ steps)
+        """
+        (a, b), (c, d) = self.gain
+        determinant = a * d - b * c
+
+        # Coupling comparable to the axes' own gains leaves the model
+        # unusable; fall back to independent axes
+        if determinant <= 0.25 * a * d:
+            return (whole_steps(alt_error / a), whole_steps(az_error / d))
+
+        alt_steps = (d * alt_error - b * az_error) / determinant
+        az_steps = (a * az_error - c * alt_error) / determinant
+        return (whole_steps(alt_steps), whole_steps(az_steps))
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Log file change notification and tailing for AutoPA
+
+LogWatcher wakes as soon as SharpCap/NINA append to their log instead of
+polling it once a second. On Linux it uses inotify (through ctypes, no
+extra packages); everywhere else, or if inotify is unavailable, it falls
+back to comparing os.stat() results on a short interval.
+
+LogWatcher watches the log directory and keeps its listing cached and
+up to date from events, so a log that is deleted, replaced or created
+after startup still wakes it without globbing the directory again.
+
+LogReader tails one log through one open handle. Complete lines only are
+returned; a line still being written is held back until its newline
+arrives, and truncation or replacement of the file is detected.
+
+LogFollower combines the two: it tails the newest log and switches to a
+new one as soon as it appears (a SharpCap restart, or NINA's next daily
+log after midnight).
+
+Example:
+    follower = LogFollower(log_dir, '*.log')
+    while True:
+        for line in follower.read_lines():
+            ...
+        follower.wait(timeout=5)
+
+read_text() returns the same lines as one string, for parsers that scan
+a whole chunk at once.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# Stat-polling fallback interval (seconds)
+POLL_INTERVAL = 0.25
+
+# Directory listing interval for the polling fallback (seconds)
+RESCAN_INTERVAL = 2.0
+
+# Bytes read per call while tailing
+READ_CHUNK = 64 * 1024
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# struct inotify_event header: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Inotify:
+    """Minimal inotify binding for one watched directory"""
+
+    def __init__(self, directory: Path):
+        """
+        Create the inotify instance and watch a directory
+
+        Args:
+            directory: Directory to watch
+
+        Raises:
+            OSError: If inotify is unavailable or the watch cannot be added
+        """
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify not supported")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), str(directory))
+
+    def read_events(self, timeout: Optional[float]) -> Optional[list]:
+        """
+        Wait for and read pending events
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            List of (mask, name) tuples, [] on timeout, or None if the
+            watched directory went away
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                return None
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        """Release the inotify descriptor"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class LogWatcher:
+    """Keeps a cached listing of a log directory and blocks until it changes"""
+
+    def __init__(self, directory, pattern: str = '*.log',
+                 poll_interval: float = POLL_INTERVAL,
+                 rescan_interval: float = RESCAN_INTERVAL):
+        """
+        Initialize the watcher
+
+        Args:
+            directory: Log directory to watch
+            pattern: Glob matching the log file names
+            poll_interval: Stat interval for the polling fallback
+            rescan_interval: Directory listing interval for the polling fallback
+        """
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.files = {}  # name -> mtime
+        self._signature = None
+        self._last_scan = 0.0
+        self._inotify = None
+
+        if sys.platform.startswith('linux'):
+            try:
+                self._inotify = Inotify(self.directory)
+            except (OSError, AttributeError):
+                self._inotify = None
+
+        self.rescan()
+
+    @property
+    def backend(self) -> str:
+        """'inotify' or 'polling'"""
+        return 'inotify' if self._inotify else 'polling'
+
+    def rescan(self):
+        """Rebuild the cached listing from the directory"""
+        files = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if fnmatch.fnmatch(entry.name, self.pattern):
+                        try:
+                            if entry.is_file():
+                                files[entry.name] = entry.stat().st_mtime
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        self.files = files
+        self._last_scan = time.monotonic()
+        self._signature = self._stat_signature(self.newest())
+
+    def newest(self) -> Optional[Path]:
+        """Most recently modified log in the listing (None if there is none)"""
+        if not self.files:
+            return None
+        return self.directory / max(self.files, key=lambda name: (self.files[name], name))
+
+    @staticmethod
+    def _stat_signature(path: Optional[Path]) -> Optional[tuple]:
+        """Identity, size and mtime of a file (None if it does not exist)"""
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _update(self, name: str):
+        """Refresh one entry of the listing after an event"""
+        try:
+            st = os.stat(self.directory / name)
+        except OSError:
+            self.files.pop(name, None)
+            return
+        self.files[name] = st.st_mtime
+
+    def _poll(self) -> bool:
+        """Check for changes without inotify"""
+        if time.monotonic() - self._last_scan >= self.rescan_interval:
+            before = (self.files, self._signature)
+            self.rescan()
+            return (self.files, self._signature) != before
+
+        newest = self.newest()
+        signature = self._stat_signature(newest)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        self._update(newest.name)
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a log in the directory changes
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            True if a log was written, created, replaced or removed (the
+            listing is up to date); False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+
+            if self._inotify:
+                events = self._inotify.read_events(remaining)
+                if events is None:
+                    # Directory removed: keep going by polling
+                    self._inotify.close()
+                    self._inotify = None
+                    self.rescan()
+                    return True
+                changed = False
+                for mask, name in events:
+                    if mask & IN_Q_OVERFLOW:
+                        self.rescan()
+                        changed = True
+                    elif fnmatch.fnmatch(name, self.pattern):
+                        self._update(name)
+                        changed = True
+                if changed:
+                    return True
+            else:
+                if self._poll():
+                    return True
+                if remaining is not None and remaining <= 0:
+                    return False
+                time.sleep(self.poll_interval if remaining is None
+                           else min(self.poll_interval, remaining))
+                continue
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        """Stop watching"""
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+
+class LogReader:
+    """Incremental reader for a growing log file"""
+
+    def __init__(self, path, from_end: bool = True, encoding: str = 'utf-8'):
+        """
+        Initialize the reader
+
+        Args:
+            path: Log file to tail (need not exist yet)
+            from_end: Skip what is already in the file
+            encoding: Text encoding of the log
+        """
+        self.path = Path(path)
+        self.encoding = encoding
+        self._file = None
+        self._inode = None
+        self._partial = b''
+        self._open(from_end)
+
+    def _open(self, from_end: bool) -> bool:
+        """Open the log, optionally positioned at its end"""
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError:
+            self._file = None
+            self._inode = None
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._partial = b''
+        if from_end:
+            self._file.seek(0, os.SEEK_END)
+        return True
+
+    def _reopen(self):
+        """Switch to the file now at the path, reading it from the start"""
+        if self._file:
+            self._file.close()
+        self._open(from_end=False)
+
+    def _read_available(self) -> bytes:
+        """Read everything appended to the open file so far"""
+        chunks = []
+        while True:
+            chunk = self._file.read(READ_CHUNK)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def read_text(self, final: bool = False) -> str:
+        """
+        Read the text of the lines completed since the last call
+
+        Args:
+            final: The file will not grow again; return a trailing line
+                   that has no newline as well
+
+        Returns:
+            Decoded text, ending in a newline unless empty
+        """
+        if self._file is None and not self._open(from_end=False):
+            return ''
+
+        data = self._read_available()
+
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            st = None
+
+        if st is None or st.st_ino != self._inode:
+            # Replaced or removed: finish the old file, then follow the
+            # new one from its start. The held-back line is complete now.
+            data = self._partial + data
+            if data and not data.endswith(b'\n'):
+                data += b'\n'
+            self._partial = b''
+            if st is not None:
+                self._reopen()
+                data += self._read_available()
+        elif st.st_size < self._file.tell():
+            # Truncated in place: start over
+            self._file.seek(0)
+            self._partial = b''
+            data = self._read_available()
+
+        data = self._partial + data
+        if final and data and not data.endswith(b'\n'):
+            data += b'\n'
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        return data[:end].decode(self.encoding, errors='replace')
+
+    def read_lines(self, final: bool = False) -> list:
+        """
+        Read the lines completed since the last call
+
+        Args:
+            final: See read_text()
+
+        Returns:
+            List of decoded lines without line endings
+        """
+        return self.read_text(final).splitlines()
+
+    def close(self):
+        """Close the log"""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class LogFollower:
+    """Tails the current log in a directory, following rollover to new files"""
+
+    def __init__(self, directory, pattern: str = '*.log', encoding: str = 'utf-8'):
+        """
+        Initialize the follower on the newest existing log
+
+        Only files that appear after this are switched to (and read from
+        their start); older logs being touched never pull the follower
+        back to them.
+
+        Args:
+            directory: Log directory
+            pattern: Glob matching the log file names
+            encoding: Text encoding of the logs
+        """
+        self.encoding = encoding
+        self.watcher = LogWatcher(directory, pattern)
+        self._seen = set(self.watcher.files)
+        self.path = self.watcher.newest()
+        self._reader = LogReader(self.path, encoding=encoding) if self.path else None
+
+    def read_text(self) -> str:
+        """
+        Read the text of the lines completed since the last call
+
+        Finishes the current log before switching to a newer one.
+
+        Returns:
+            Decoded text, ending in a newline unless empty
+        """
+        text = ''
+        new = [name for name in self.watcher.files if name not in self._seen]
+        if new:
+            self._seen.update(new)
+            files = self.watcher.files
+            newest = max(new, key=lambda name: (files[name], name))
+            if self._reader:
+                text += self._reader.read_text(final=True)
+                self._reader.close()
+            self.path = self.watcher.directory / newest
+            self._reader = LogReader(self.path, from_end=False, encoding=self.encoding)
+
+        if self._reader:
+            text += self._reader.read_text()
+        return text
+
+    def read_lines(self) -> list:
+        """
+        Read the lines completed since the last call (see read_text)
+
+        Returns:
+            List of decoded lines without line endings
+        """
+        return self.read_text().splitlines()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until a log in the directory changes (see LogWatcher.wait)"""
+        return self.watcher.wait(timeout)
+
+    def close(self):
+        """Stop watching and close the current log"""
+        self.watcher.close()
+        if self._reader:
+            self._reader.close()
+            self._reader = None
@@ -8,11 +8,10 @@ Adapted for Star Adventurer GTi with calibration support
 
 Usage:
     python plate_solving_autopa.py [--software sharpcap|nina] [--port COM3]
+    python plate_solving_autopa.py [--software sharpcap|nina] --daemon [socket]
 """
 
 import os
-import re
-import time
 import argparse
 import sys
 from pathlib import Path
@@ -26,10 +25,53 @@ except ImportError:
     print("Make sure it's in the same directory as this script")
     sys.exit(1)
 
-class PlateS olvingAutoPA:
+# Shared session of a running mount_daemon.py (optional)
+try:
+    from mount_daemon import DEFAULT_SOCKET, MountClient
+except ImportError:
+    DEFAULT_SOCKET = ''
+    MountClient = None
+
+from error_filter import ErrorFilter
+from gain_estimator import SOLVE_NOISE, GainEstimator
+from log_watcher import LogFollower
+from solve_log import (NINA_LOG_GLOB, SHARPCAP_LOG_GLOB, parse_nina_line,
+                       parse_sharpcap_line, parse_text, timestamp_seconds)
+
+# Longest plate-solve exposure expected (seconds)
+DEFAULT_EXPOSURE = 4.0
+
+# Time for the mount to stop vibrating after a correction (seconds)
+SETTLE_TIME = 0.5
+
+# Longest time from the end of an exposure until its solve is logged
+# (seconds): download, star detection and the solve itself
+DEFAULT_SOLVE_LATENCY = 3.0
+
+
+def is_stale_solve(timestamp, moved_at, exposure, solve_latency):
+    """
+    Check whether a solve's frame could have started before the mount settled
+    
+    Args:
+        timestamp: Log timestamp of the solve ('HH:MM:SS.fff')
+        moved_at: Local time of day (seconds) the correction finished
+        exposure: Longest exposure in seconds
+        solve_latency: Longest time in seconds from the end of an exposure
+                       until its solve is logged
+    """
+    earliest = moved_at + SETTLE_TIME + exposure + solve_latency
+    since = (timestamp_seconds(timestamp) - earliest) % 86400
+    # More than half a day "after" is really before (midnight wrap)
+    return since > 43200
+
+
+class PlateSolvingAutoPA:
     """Automatic Polar Alignment using plate solving software"""
     
-    def __init__(self, software='sharpcap', port=None, target_error=30.0):
+    def __init__(self, software='sharpcap', port=None, target_error=30.0, daemon=None,
+                 adaptive=True, filtered=True, solve_noise=SOLVE_NOISE,
+                 exposure=DEFAULT_EXPOSURE, solve_latency=DEFAULT_SOLVE_LATENCY):
         """
         Initialize AutoPA
         
@@ -37,24 +79,62 @@ class PlateS olvingAutoPA:
             software: 'sharpcap' or 'nina'
             port: Serial port for Arduino (auto-detect if None)
             target_error: Target alignment error in arcseconds
+            daemon: Socket of a running mount daemon to use instead of
+                    opening the serial port
+            adaptive: Learn the real steps per arcsecond and ALT/AZ
+                      cross-coupling from each correction
+            filtered: Smooth solves and skip corrections within the noise
+            solve_noise: Plate-solve error noise in arcseconds (1 sigma)
+            exposure: Longest plate-solve exposure in seconds; a frame
+                      this long started after the mount settled
+            solve_latency: Longest time in seconds from the end of an
+                           exposure until its solve is logged
         """
         self.software = software
         self.target_error = target_error
-        self.controller = PolarAlignController(port)
+        if daemon:
+            self.controller = MountClient(daemon)
+        else:
+            self.controller = PolarAlignController(port)
+        if not self.controller.connect():
+            print("ERROR: Could not connect to the Arduino controller")
+            sys.exit(1)
+        
+        # Write each correction's commands back-to-back when the firmware
+        # can tag its replies
+        self.controller.enable_pipelining()
         
         # Load calibration from Arduino
         self.calibration = self.get_calibration()
         
+        # Gains learned from the corrections, starting at the calibration
+        self.gains = None
+        if adaptive:
+            self.gains = GainEstimator(self.calibration['alt_steps_per_arcsec'],
+                                       self.calibration['az_steps_per_arcsec'],
+                                       solve_noise)
+        # Smoothed error estimate between parsing and corrections
+        self.error_filter = ErrorFilter(solve_noise) if filtered else None
+        
+        # Local time of day (seconds) the last correction finished. The
+        # logs are timestamped with the same clock.
+        self.exposure = exposure
+        self.solve_latency = solve_latency
+        self.moved_at = None
+        # (steps, error) of the last completed correction, fitted against
+        # the next solve
+        self.last_correction = None
+        
         # Log file configuration
         self.log_patterns = {
             'sharpcap': {
-                'path': self.get_sharpcap_log_path(),
-                'pattern': r'(?:Info)\W*(\d{2}:\d{2}:\d{2}\.\d{6}).*(?:AltAzCor=)(?:Alt=)([-\d.]+)[,](?:Az=)([-\d.]+)',
+                'directory': self.get_sharpcap_log_dir(),
+                'glob': SHARPCAP_LOG_GLOB,
                 'name': 'SharpCap'
             },
             'nina': {
-                'path': self.get_nina_log_path(),
-                'pattern': r'(\d{2}:\d{2}:\d{2}\.\d{3})\s-\s(\{.*\})',
+                'directory': self.get_nina_log_dir(),
+                'glob': NINA_LOG_GLOB,
                 'name': 'NINA'
             }
         }
@@ -62,46 +142,25 @@ class PlateS olvingAutoPA:
         self.last_entry_time = None
         self.iteration = 0
         
-    def get_sharpcap_log_path(self):
-        """Get SharpCap log file path"""
+    def get_sharpcap_log_dir(self):
+        """Get SharpCap log directory"""
         base_path = Path(os.getenv('LOCALAPPDATA', '')) / 'SharpCap' / 'logs'
         if not base_path.exists():
             print(f"WARNING: SharpCap log directory not found: {base_path}")
             return None
-        
-        # Get most recent log file
-        try:
-            log_files = list(base_path.glob('*.log'))
-            if not log_files:
-                print(f"WARNING: No log files found in {base_path}")
-                return None
-            latest_log = max(log_files, key=os.path.getmtime)
-            return latest_log
-        except Exception as e:
-            print(f"ERROR: Could not find SharpCap log: {e}")
-            return None
+        return base_path
     
-    def get_nina_log_path(self):
-        """Get NINA log file path"""
-        today = datetime.now().strftime("%Y-%m-%d")
+    def get_nina_log_dir(self):
+        """Get NINA polar alignment log directory (one log per day)"""
         base_path = Path.home() / 'Documents' / 'N.I.N.A' / 'PolarAlignment'
-        
         if not base_path.exists():
             print(f"WARNING: NINA log directory not found: {base_path}")
             return None
-        
-        log_file = base_path / f'{today}.log'
-        if not log_file.exists():
-            print(f"WARNING: NINA log for today not found: {log_file}")
-            return None
-        
-        return log_file
+        return base_path
     
     def get_calibration(self):
         """Retrieve calibration from Arduino"""
         print("Loading calibration from Arduino...")
-        response = self.controller.send_command('CAL:SHOW')
-        
         # Parse calibration response
         cal = {
             'alt_steps_per_arcsec': 89.5,  # Default
@@ -111,21 +170,10 @@ class PlateS olvingAutoPA:
             'calibrated': False
         }
         
-        # Try to parse actual calibration
-        for line in response.split('\n'):
-            if 'ALT:' in line and 'steps/arcsec' in line:
-                try:
-                    val = float(re.search(r'([\d.]+)\s+steps/arcsec', line).group(1))
-                    cal['alt_steps_per_arcsec'] = val
-                    cal['calibrated'] = True
-                except:
-                    pass
-            elif 'AZ:' in line and 'steps/arcsec' in line:
-                try:
-                    val = float(re.search(r'([\d.]+)\s+steps/arcsec', line).group(1))
-                    cal['az_steps_per_arcsec'] = val
-                except:
-                    pass
+        # Also hands the backlash to the controller for move timing
+        firmware_cal = self.controller.get_calibration()
+        if firmware_cal:
+            cal.update(firmware_cal)
         
         if not cal['calibrated']:
             print("WARNING: Using default calibration values")
@@ -139,121 +187,126 @@ class PlateS olvingAutoPA:
     
     def parse_sharpcap_log_entry(self, line):
         """Parse SharpCap log entry"""
-        pattern = self.log_patterns['sharpcap']['pattern']
-        match = re.search(pattern, line)
-        
-        if match:
-            timestamp = match.group(1)
-            alt_error = float(match.group(2))  # arcminutes
-            az_error = float(match.group(3))   # arcminutes
-            
-            # Convert arcminutes to arcseconds
-            alt_error *= 60.0
-            az_error *= 60.0
-            
-            return {
-                'timestamp': timestamp,
-                'alt_error': alt_error,
-                'az_error': az_error,
-                'total_error': (alt_error**2 + az_error**2)**0.5
-            }
-        
-        return None
+        return parse_sharpcap_line(line)
     
     def parse_nina_log_entry(self, line):
         """Parse NINA log entry"""
-        pattern = self.log_patterns['nina']['pattern']
-        match = re.search(pattern, line)
-        
-        if match:
-            timestamp = match.group(1)
-            json_str = match.group(2)
-            
-            try:
-                import json
-                data = json.loads(json_str)
-                
-                return {
-                    'timestamp': timestamp,
-                    'alt_error': data.get('Alt', 0),
-                    'az_error': data.get('Az', 0),
-                    'total_error': data.get('Total', 0)
-                }
-            except:
-                return None
-        
-        return None
+        return parse_nina_line(line)
     
     def monitor_logs(self):
         """Monitor log files for polar alignment corrections"""
         config = self.log_patterns[self.software]
-        log_path = config['path']
+        log_dir = config['directory']
         
-        if not log_path or not Path(log_path).exists():
-            print(f"ERROR: Log file not found for {config['name']}")
-            print(f"Expected: {log_path}")
+        if not log_dir or not Path(log_dir).exists():
+            print(f"ERROR: Log directory not found for {config['name']}")
+            print(f"Expected: {log_dir}")
             print("\nMake sure you:")
             print(f"1. Have {config['name']} installed")
             print(f"2. Started the Polar Alignment routine")
             print(f"3. {config['name']} has created a log file")
             return
         
+        # Tail the newest log from its current end and switch to any log
+        # the software starts later (restart, or NINA's next daily log)
+        follower = LogFollower(log_dir, config['glob'])
+        
         print(f"\n{'='*70}")
         print(f"  Automatic Polar Alignment - {config['name']} Integration")
         print(f"{'='*70}\n")
-        print(f"Monitoring: {log_path}")
+        if follower.path:
+            print(f"Monitoring: {follower.path}")
+        else:
+            print(f"Monitoring: {log_dir} (waiting for a log file)")
         print(f"Target accuracy: {self.target_error} arcseconds")
         print(f"\nWaiting for {config['name']} polar alignment to start...")
         print("(Start the polar alignment routine in the software now)\n")
         
-        last_position = 0
-        if Path(log_path).exists():
-            # Start from end of file
-            with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                f.seek(0, 2)  # Seek to end
-                last_position = f.tell()
-        
         try:
             while True:
-                if not Path(log_path).exists():
-                    print(f"WARNING: Log file disappeared: {log_path}")
-                    time.sleep(5)
-                    continue
+                log_path = follower.path
+                text = follower.read_text()
+                if follower.path != log_path:
+                    print(f"Following new log: {follower.path}")
                 
-                with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    f.seek(last_position)
-                    new_lines = f.readlines()
-                    last_position = f.tell()
-                    
-                    for line in new_lines:
-                        # Parse based on software
-                        if self.software == 'sharpcap':
-                            error = self.parse_sharpcap_log_entry(line)
-                        else:
-                            error = self.parse_nina_log_entry(line)
-                        
-                        if error:
-                            self.process_alignment_error(error)
+                # Only lines carrying the software's solve marker reach
+                # the regex
+                for error in parse_text(text, self.software):
+                    if self.is_stale(error):
+                        print(f"Ignoring solve at {error['timestamp']}: "
+                              f"frame may predate the last correction")
+                        continue
+                    self.process_alignment_error(self.filter_error(error))
                 
-                time.sleep(1)  # Check every second
+                # Wakes as soon as a log is written or created; the timeout
+                # keeps Ctrl+C responsive where signals do not interrupt it
+                follower.wait(timeout=5)
                 
         except KeyboardInterrupt:
             print("\n\nAutoPA stopped by user")
             self.controller.send_command('D')  # Disable motors
             print("Motors disabled")
+        finally:
+            follower.close()
+    
+    def is_stale(self, error):
+        """
+        Check whether a solve's frame could overlap the last correction
+        
+        The software keeps solving while the mount moves, so solves logged
+        right after a correction often come from frames exposed before or
+        during it; correcting them again would double the correction. The
+        log timestamp is when the solve finished, not when the exposure
+        ended, so the solve latency is allowed for as well.
+        """
+        if self.moved_at is None:
+            return False
+        return is_stale_solve(error['timestamp'], self.moved_at,
+                              self.exposure, self.solve_latency)
+    
+    def filter_error(self, error):
+        """Replace a parsed solve's error with the filtered estimate"""
+        if not self.error_filter:
+            return error
+        
+        alt_error, az_error = self.error_filter.update(error['alt_error'], error['az_error'])
+        return {
+            'timestamp': error['timestamp'],
+            'alt_error': alt_error,
+            'az_error': az_error,
+            'total_error': (alt_error**2 + az_error**2)**0.5,
+            'raw': error
+        }
     
     def process_alignment_error(self, error):
         """Process polar alignment error and adjust mount"""
         self.iteration += 1
+        raw = error.get('raw', error)
         
         print(f"\n{'─'*70}")
         print(f"Iteration #{self.iteration} - {error['timestamp']}")
         print(f"{'─'*70}")
-        print(f"Polar Alignment Error:")
+        if raw is not error:
+            print(f"Solved error: ALT {raw['alt_error']:+.2f}, AZ {raw['az_error']:+.2f}, "
+                  f"TOTAL {raw['total_error']:.2f} arcseconds")
+            print(f"Polar Alignment Error (filtered over {self.error_filter.samples} solve(s)):")
+        else:
+            print(f"Polar Alignment Error:")
         print(f"  ALT: {error['alt_error']:+7.2f} arcseconds")
         print(f"  AZ:  {error['az_error']:+7.2f} arcseconds")
         print(f"  TOTAL: {error['total_error']:6.2f} arcseconds")
         
+        # Fit how far the last correction actually moved the error
+        if self.gains and self.last_correction:
+            steps, error_before = self.last_correction
+            self.gains.update(steps, error_before, (raw['alt_error'], raw['az_error']))
+            alt_spa, az_spa = self.gains.steps_per_arcsec
+            alt_coupling, az_coupling = self.gains.coupling
+            print(f"\nLearned gains (from {self.gains.updates} correction(s)):")
+            print(f"  ALT: {alt_spa:.2f} steps/arcsec, AZ: {az_spa:.2f} steps/arcsec")
+            print(f"  Cross-coupling: AZ->ALT {alt_coupling:+.1%}, ALT->AZ {az_coupling:+.1%}")
+        self.last_correction = None
+        
         # Check if we've achieved target
         if error['total_error'] < self.target_error:
             print(f"\n{'='*70}")
@@ -267,13 +320,43 @@ class PlateS olvingAutoPA:
             self.controller.send_command('D')
             sys.exit(0)
         
+        if self.gains:
+            alt_spa, az_spa = self.gains.steps_per_arcsec
+        else:
+            alt_spa = self.calibration['alt_steps_per_arcsec']
+            az_spa = self.calibration['az_steps_per_arcsec']
+        
+        # Leave an axis alone while its error is within the solve noise or
+        # under one step; more solves will tell whether it is real
+        alt_error = error['alt_error']
+        az_error = error['az_error']
+        if self.error_filter:
+            if self.error_filter.within_noise(0, 1.0 / alt_spa):
+                alt_error = 0.0
+            if self.error_filter.within_noise(1, 1.0 / az_spa):
+                az_error = 0.0
+        
         # Calculate corrections
-        alt_steps = int(error['alt_error'] * self.calibration['alt_steps_per_arcsec'])
-        az_steps = int(error['az_error'] * self.calibration['az_steps_per_arcsec'])
+        if self.gains:
+            # Also cancels the cross-coupling, so the steps can differ
+            # slightly from error * steps/arcsec
+            alt_steps, az_steps = self.gains.correction(alt_error, az_error)
+        else:
+            alt_steps = int(alt_error * alt_spa)
+            az_steps = int(az_error * az_spa)
+        
+        if alt_steps == 0 and az_steps == 0:
+            if self.error_filter:
+                print(f"\nRemaining error is within the solve noise (ALT ±{self.error_filter.sigma(0):.1f}, "
+                      f"AZ ±{self.error_filter.sigma(1):.1f} arcseconds)")
+            else:
+                print(f"\nRemaining error is below one step")
+            print(f"Waiting for another solve...")
+            return
         
         print(f"\nCalculating corrections:")
-        print(f"  ALT: {alt_steps:+6d} steps ({error['alt_error']:.1f} * {self.calibration['alt_steps_per_arcsec']:.1f})")
-        print(f"  AZ:  {az_steps:+6d} steps ({error['az_error']:.1f} * {self.calibration['az_steps_per_arcsec']:.1f})")
+        print(f"  ALT: {alt_steps:+6d} steps ({alt_error:.1f} * {alt_spa:.1f})")
+        print(f"  AZ:  {az_steps:+6d} steps ({az_error:.1f} * {az_spa:.1f})")
         
         # Safety check
         max_steps = 50000
@@ -289,20 +372,41 @@ class PlateS olvingAutoPA:
         # Send corrections
         print(f"\nAdjusting mount...")
         
-        # Enable motors
-        self.controller.send_command('E')
+        # Enable motors, then move ALT and AZ together. The firmware
+        # interleaves both axes, so the correction takes as long as the
+        # longer one; the move waits exactly as long as the firmware needs
+        # (steps, speed and backlash).
+        enabled = self.controller.submit('E')
+        failed = []
+        if alt_steps != 0 or az_steps != 0:
+            print(f"  Moving ALT {alt_steps:+d} and AZ {az_steps:+d} steps...")
+            duration = self.controller.estimate_move_both_duration(alt_steps, az_steps)
+            print(f"  Expected duration: {duration:.1f} s")
+            if not self.controller.move_both(alt_steps, az_steps):
+                failed.append('ALT/AZ')
         
-        # Move ALT
-        if alt_steps != 0:
-            print(f"  Moving ALT {alt_steps:+d} steps...")
-            self.controller.send_command(f'A{alt_steps}')
+        if not enabled or enabled.wait(self.controller.reply_timeout) is None:
+            failed.insert(0, 'E')
         
-        # Move AZ
-        if az_steps != 0:
-            print(f"  Moving AZ {az_steps:+d} steps...")
-            self.controller.send_command(f'Z{az_steps}')
+        # Even an unconfirmed move may have turned the adjusters
+        if alt_steps != 0 or az_steps != 0:
+            now = datetime.now()
+            self.moved_at = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
         
-        print(f"  ✓ Movement complete")
+        if failed:
+            print(f"  WARNING: No confirmation for: {', '.join(failed)}")
+        else:
+            print(f"  ✓ Movement complete")
+            # Raw solves on both sides of the fit: the filtered estimate
+            # already folds in the predicted effect of earlier corrections
+            self.last_correction = ((alt_steps, az_steps),
+                                    (raw['alt_error'], raw['az_error']))
+            if self.error_filter:
+                if self.gains:
+                    change = self.gains.expected_change((alt_steps, az_steps))
+                else:
+                    change = (alt_steps / alt_spa, az_steps / az_spa)
+                self.error_filter.predict_move(change)
         print(f"\nWaiting for {self.log_patterns[self.software]['name']} to re-solve...")
     
     def run(self):
@@ -329,6 +433,7 @@ Examples:
     python plate_solving_autopa.py --software sharpcap
     python plate_solving_autopa.py --software nina --target 20
     python plate_solving_autopa.py --port COM3 --target 30
+    python plate_solving_autopa.py --software nina --daemon
 
 Supported Software:
     sharpcap - SharpCap Pro (requires paid license)
@@ -351,6 +456,40 @@ Workflow:
     parser.add_argument('--port', '-p',
                       help='Serial port (auto-detect if not specified)')
     
+    parser.add_argument('--daemon', '-d',
+                      nargs='?',
+                      const=DEFAULT_SOCKET,
+                      metavar='SOCKET',
+                      help='Share the session of a running mount_daemon.py instead of '
+                           'opening the port (default socket: ~/.polar_align_mount.sock)')
+    
+    parser.add_argument('--fixed-gains',
+                      action='store_true',
+                      help='Always use the calibrated steps/arcsec instead of '
+                           'learning them from each correction')
+    
+    parser.add_argument('--no-filter',
+                      action='store_true',
+                      help='React to every raw solve instead of the filtered error')
+    
+    parser.add_argument('--solve-noise',
+                      type=float,
+                      default=SOLVE_NOISE,
+                      help=f'Plate-solve noise in arcseconds, 1 sigma (default: {SOLVE_NOISE:g})')
+    
+    parser.add_argument('--exposure', '-e',
+                      type=float,
+                      default=DEFAULT_EXPOSURE,
+                      help='Longest plate-solve exposure in seconds; with --solve-latency, '
+                           'sets how long solves after a correction are ignored '
+                           f'(default: {DEFAULT_EXPOSURE:g})')
+    
+    parser.add_argument('--solve-latency',
+                      type=float,
+                      default=DEFAULT_SOLVE_LATENCY,
+                      help='Longest time in seconds from the end of an exposure until its solve '
+                           f'is logged (default: {DEFAULT_SOLVE_LATENCY:g})')
+    
     parser.add_argument('--target', '-t',
                       type=float,
                       default=30.0,
@@ -358,6 +497,10 @@ Workflow:
     
     args = parser.parse_args()
     
+    if args.daemon is not None and MountClient is None:
+        print("ERROR: --daemon needs mount_daemon.py from the python folder")
+        sys.exit(1)
+    
     print("""
 ╔════════════════════════════════════════════════════════════════╗
 ║                                                                ║
@@ -367,10 +510,16 @@ Workflow:
 ╚════════════════════════════════════════════════════════════════╝
     """)
     
-    autopa = PlateS olvingAutoPA(
+    autopa = PlateSolvingAutoPA(
         software=args.software,
         port=args.port,
-        target_error=args.target
+        target_error=args.target,
+        daemon=args.daemon,
+        adaptive=not args.fixed_gains,
+        filtered=not args.no_filter,
+        solve_noise=args.solve_noise,
+        exposure=args.exposure,
+        solve_latency=args.solve_latency
     )
     
     autopa.run()
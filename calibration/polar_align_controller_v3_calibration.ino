@@ -14,14 +14,25 @@
  * Basic:
  *   A<steps> - Move altitude
  *   Z<steps> - Move azimuth (differential)
+ *   M<alt>,<az> - Move altitude and azimuth together
  *   S - Stop all motors
  *   P - Get position
  *   R - Reset position to 0,0
  *   V<speed> - Set speed (1-2000)
+ *   C<accel> - Set acceleration (steps/sec^2, 0 = constant speed; kept
+ *              with the calibration, so CAL:SAVE stores it)
  *   E - Enable motors
  *   D - Disable motors
+ *   T<steps> - Print T:<alt>,<az> every <steps> steps while moving (0 = off)
  *   ? - Status
  * 
+ * Any command may end in "#<seq>" (e.g. A100#7); the controller then
+ * prints "#<seq>" after the command's last reply line.
+ * 
+ * Binary protocol:
+ *   !BIN - Reply OK:BINARY and switch to fixed-size binary frames
+ *          (see BINARY FRAMED PROTOCOL below; opcode 'X' switches back)
+ * 
  * Calibration:
  *   CAL:ALT:<arcsec>:<steps> - Set ALT calibration (arcsec moved in steps)
  *   CAL:AZ:<arcsec>:<steps> - Set AZ calibration  
@@ -57,6 +68,8 @@
 #define MICROSTEPS 16
 #define MAX_SPEED 2000
 #define MIN_PULSE_WIDTH 2
+#define DEFAULT_ACCELERATION 1000  // Steps per second^2
+#define MAX_ACCELERATION 32767
 
 // ============================================
 // CALIBRATION DATA STRUCTURE
@@ -76,6 +89,9 @@ struct CalibrationData {
   // Maximum safe speed
   int16_t maxSpeed;
   
+  // Acceleration in steps/sec^2 for move ramps (0 = constant speed)
+  int16_t acceleration;
+  
   // Calibration status
   bool isCalibrated;
   
@@ -85,9 +101,23 @@ struct CalibrationData {
 
 CalibrationData cal;
 
+// Layout saved by v3.0 firmware before acceleration was added; still
+// loaded so an upgrade keeps the calibration
+struct CalibrationDataV1 {
+  uint16_t magic;
+  float altStepsPerArcsec;
+  float azStepsPerArcsec;
+  int16_t altBacklash;
+  int16_t azBacklash;
+  int16_t maxSpeed;
+  bool isCalibrated;
+  uint16_t checksum;
+};
+
 // EEPROM address for calibration data
 #define CAL_EEPROM_ADDR 0
-#define CAL_MAGIC 0xC411  // Magic number to verify valid data
+#define CAL_MAGIC 0xC412     // Magic number to verify valid data
+#define CAL_MAGIC_V1 0xC411  // CalibrationDataV1
 
 // ============================================
 // POSITION & MOVEMENT STATE
@@ -103,24 +133,53 @@ int lastAltDirection = 0;  // 0=unknown, 1=forward, -1=backward
 int lastAzDirection = 0;
 
 bool isMoving = false;
+
+// Position telemetry interval in steps while moving (0 = off)
+long telemetryInterval = 0;
+
 String inputString = "";
 bool stringComplete = false;
 
+// ============================================
+// BINARY FRAMED PROTOCOL
+// ============================================
+// Command frame (8 bytes):  0xA5 seq opcode param(int32 LE) crc8
+// Reply frame (13 bytes):   0x5A seq opcode status a(int32 LE) b(int32 LE) crc8
+// The CRC-8 (poly 0x07) covers every byte after the sync byte.
+#define FRAME_COMMAND_SYNC 0xA5
+#define FRAME_REPLY_SYNC 0x5A
+#define FRAME_COMMAND_SIZE 8
+#define FRAME_REPLY_SIZE 13
+
+#define FRAME_STATUS_OK 0
+#define FRAME_STATUS_ERROR 1
+#define FRAME_STATUS_BAD_CRC 2
+#define FRAME_STATUS_UNKNOWN 3
+#define FRAME_STATUS_TELEMETRY 4  // Unsolicited 'T' frame: a = ALT, b = AZ
+
+bool binaryMode = false;
+bool binaryRequested = false;
+byte frameBuffer[FRAME_COMMAND_SIZE];
+byte frameLength = 0;
+bool frameComplete = false;
+
 // ============================================
 // CALIBRATION FUNCTIONS
 // ============================================
 
-uint16_t calculateChecksum(CalibrationData* data) {
+uint16_t checksumBytes(const byte* ptr, int size) {
   // Simple checksum: sum of all bytes except checksum field
   uint16_t sum = 0;
-  byte* ptr = (byte*)data;
-  int size = sizeof(CalibrationData) - sizeof(uint16_t);
   for (int i = 0; i < size; i++) {
     sum += ptr[i];
   }
   return sum;
 }
 
+uint16_t calculateChecksum(CalibrationData* data) {
+  return checksumBytes((byte*)data, sizeof(CalibrationData) - sizeof(uint16_t));
+}
+
 void initCalibration() {
   // Default values (approximate estimates)
   cal.magic = CAL_MAGIC;
@@ -137,6 +196,7 @@ void initCalibration() {
   cal.altBacklash = 0;
   cal.azBacklash = 0;
   cal.maxSpeed = 1000;
+  cal.acceleration = DEFAULT_ACCELERATION;
   cal.isCalibrated = false;
   cal.checksum = calculateChecksum(&cal);
 }
@@ -149,10 +209,37 @@ void saveCalibration() {
   Serial.println(CAL_EEPROM_ADDR);
 }
 
+bool loadCalibrationV1() {
+  CalibrationDataV1 old;
+  EEPROM.get(CAL_EEPROM_ADDR, old);
+  
+  if (checksumBytes((byte*)&old, sizeof(old) - sizeof(uint16_t)) != old.checksum) {
+    Serial.println("WARN:Calibration checksum failed");
+    return false;
+  }
+  
+  cal.magic = CAL_MAGIC;
+  cal.altStepsPerArcsec = old.altStepsPerArcsec;
+  cal.azStepsPerArcsec = old.azStepsPerArcsec;
+  cal.altBacklash = old.altBacklash;
+  cal.azBacklash = old.azBacklash;
+  cal.maxSpeed = old.maxSpeed;
+  cal.acceleration = DEFAULT_ACCELERATION;
+  cal.isCalibrated = old.isCalibrated;
+  cal.checksum = calculateChecksum(&cal);
+  Serial.println("OK:CAL_LOADED");
+  Serial.println("INFO:Old calibration format, CAL:SAVE to store acceleration");
+  return true;
+}
+
 bool loadCalibration() {
   CalibrationData temp;
   EEPROM.get(CAL_EEPROM_ADDR, temp);
   
+  if (temp.magic == CAL_MAGIC_V1) {
+    return loadCalibrationV1();
+  }
+  
   // Verify magic number and checksum
   if (temp.magic != CAL_MAGIC) {
     Serial.println("WARN:No valid calibration in EEPROM (magic mismatch)");
@@ -202,6 +289,9 @@ void showCalibration() {
   Serial.print("Max Speed: ");
   Serial.print(cal.maxSpeed);
   Serial.println(" steps/sec");
+  Serial.print("Acceleration: ");
+  Serial.print(cal.acceleration);
+  Serial.println(" steps/sec^2");
   Serial.println("========================");
 }
 
@@ -306,6 +396,33 @@ void processCalibrationCommand(String cmd) {
 // MOTOR CONTROL WITH BACKLASH COMPENSATION
 // ============================================
 
+/*
+ * Microseconds to wait after step i of an n-step move at the given speed
+ * 
+ * Trapezoidal profile: the step rate rises as sqrt(2 * acceleration * k),
+ * k being the steps to the nearer end of the move, until it reaches the
+ * set speed, so moves start and stop gently and cruise in between.
+ */
+unsigned long rampInterval(long i, long n, int speed) {
+  if (cal.acceleration <= 0) return 1000000L / speed;
+  long fromEnd = min(i + 1, n - i);
+  float rate = sqrt(2.0 * cal.acceleration * fromEnd);
+  if (rate >= speed) return 1000000L / speed;
+  return (unsigned long)(1000000.0 / rate);
+}
+
+/*
+ * delayMicroseconds() is only accurate up to 16383 us; the first steps
+ * of a ramp wait longer
+ */
+void waitMicros(unsigned long us) {
+  if (us > 16000) {
+    delay(us / 1000);
+    us %= 1000;
+  }
+  delayMicroseconds(us);
+}
+
 void stepMotor(int stepPin) {
   digitalWrite(stepPin, HIGH);
   delayMicroseconds(MIN_PULSE_WIDTH);
@@ -313,6 +430,39 @@ void stepMotor(int stepPin) {
   delayMicroseconds(MIN_PULSE_WIDTH);
 }
 
+/*
+ * True when the next unread command is a stop. serialEvent() only runs
+ * between loop() iterations, so while a move blocks the stop is still
+ * waiting in the receive buffer; it is answered once the move returns.
+ * In binary mode the next frame is read into frameBuffer (processFrame()
+ * has already released it) and left there for loop() to process.
+ */
+bool stopPending() {
+  if (binaryMode) {
+    readFrameBytes();
+    return frameComplete && frameBuffer[2] == 'S' &&
+           crc8(frameBuffer + 1, FRAME_COMMAND_SIZE - 2) == frameBuffer[FRAME_COMMAND_SIZE - 1];
+  }
+  if (!Serial.available()) return false;
+  char next = Serial.peek();
+  return next == 'S' || next == 's';
+}
+
+/*
+ * Report both positions mid-move: "T:<alt>,<az>" in text mode, or a
+ * FRAME_STATUS_TELEMETRY frame in binary mode
+ */
+void sendTelemetry() {
+  if (binaryMode) {
+    sendFrame(0, 'T', FRAME_STATUS_TELEMETRY, altPosition, azPosition);
+    return;
+  }
+  Serial.print("T:");
+  Serial.print(altPosition);
+  Serial.print(",");
+  Serial.println(azPosition);
+}
+
 void moveAltitude(long steps) {
   if (steps == 0) return;
   
@@ -321,15 +471,17 @@ void moveAltitude(long steps) {
   
   // Backlash compensation
   if (lastAltDirection != 0 && lastAltDirection != direction && cal.altBacklash > 0) {
-    Serial.print("INFO:Compensating ALT backlash: ");
-    Serial.print(cal.altBacklash);
-    Serial.println(" steps");
+    if (!binaryMode) {
+      Serial.print("INFO:Compensating ALT backlash: ");
+      Serial.print(cal.altBacklash);
+      Serial.println(" steps");
+    }
     
     // Take up backlash without counting position
     digitalWrite(ALT_DIR_PIN, direction > 0 ? HIGH : LOW);
     for (int i = 0; i < cal.altBacklash; i++) {
       stepMotor(ALT_STEP_PIN);
-      delayMicroseconds(1000000 / altSpeed);
+      waitMicros(rampInterval(i, cal.altBacklash, altSpeed));
     }
   }
   
@@ -341,10 +493,14 @@ void moveAltitude(long steps) {
   for (long i = 0; i < steps; i++) {
     stepMotor(ALT_STEP_PIN);
     altPosition += direction;
-    delayMicroseconds(1000000 / altSpeed);
+    waitMicros(rampInterval(i, steps, altSpeed));
+    
+    if (telemetryInterval > 0 && (i + 1) % telemetryInterval == 0) {
+      sendTelemetry();
+    }
     
     // Check for stop command every 100 steps
-    if (i % 100 == 0 && stringComplete) {
+    if (i % 100 == 0 && stopPending()) {
       break;
     }
   }
@@ -358,9 +514,11 @@ void moveAzimuthDifferential(long steps) {
   
   // Backlash compensation
   if (lastAzDirection != 0 && lastAzDirection != direction && cal.azBacklash > 0) {
-    Serial.print("INFO:Compensating AZ backlash: ");
-    Serial.print(cal.azBacklash);
-    Serial.println(" steps");
+    if (!binaryMode) {
+      Serial.print("INFO:Compensating AZ backlash: ");
+      Serial.print(cal.azBacklash);
+      Serial.println(" steps");
+    }
     
     // Take up backlash in both motors
     if (direction > 0) {  // Moving EAST
@@ -374,7 +532,7 @@ void moveAzimuthDifferential(long steps) {
     for (int i = 0; i < cal.azBacklash; i++) {
       stepMotor(AZ_WEST_STEP_PIN);
       stepMotor(AZ_EAST_STEP_PIN);
-      delayMicroseconds(1000000 / azSpeed);
+      waitMicros(rampInterval(i, cal.azBacklash, azSpeed));
     }
   }
   
@@ -393,9 +551,96 @@ void moveAzimuthDifferential(long steps) {
     stepMotor(AZ_WEST_STEP_PIN);
     stepMotor(AZ_EAST_STEP_PIN);
     azPosition += direction;
-    delayMicroseconds(1000000 / azSpeed);
+    waitMicros(rampInterval(i, steps, azSpeed));
+    
+    if (telemetryInterval > 0 && (i + 1) % telemetryInterval == 0) {
+      sendTelemetry();
+    }
+    
+    if (i % 100 == 0 && stopPending()) {
+      break;
+    }
+  }
+}
+
+/*
+ * Move altitude and azimuth at the same time
+ * 
+ * The axis with more steps is stepped every loop iteration and the other
+ * one interleaved with Bresenham-style error accumulation, so both finish
+ * together after as long as the longer axis alone would take. Backlash on
+ * both axes is taken up together first.
+ */
+void moveBoth(long altSteps, long azSteps) {
+  long altAbs = abs(altSteps);
+  long azAbs = abs(azSteps);
+  long major = max(altAbs, azAbs);
+  if (major == 0) return;
+  
+  int altDir = (altSteps > 0) ? 1 : -1;
+  int azDir = (azSteps > 0) ? 1 : -1;  // Positive = EAST
+  
+  digitalWrite(ALT_DIR_PIN, altDir > 0 ? HIGH : LOW);
+  digitalWrite(AZ_WEST_DIR_PIN, azDir > 0 ? HIGH : LOW);
+  digitalWrite(AZ_EAST_DIR_PIN, azDir > 0 ? LOW : HIGH);
+  
+  // Backlash compensation, both axes at once
+  int altTakeUp = 0;
+  int azTakeUp = 0;
+  if (altAbs > 0 && lastAltDirection != 0 && lastAltDirection != altDir) {
+    altTakeUp = cal.altBacklash;
+  }
+  if (azAbs > 0 && lastAzDirection != 0 && lastAzDirection != azDir) {
+    azTakeUp = cal.azBacklash;
+  }
+  if (!binaryMode && altTakeUp > 0) {
+    Serial.print("INFO:Compensating ALT backlash: ");
+    Serial.print(altTakeUp);
+    Serial.println(" steps");
+  }
+  if (!binaryMode && azTakeUp > 0) {
+    Serial.print("INFO:Compensating AZ backlash: ");
+    Serial.print(azTakeUp);
+    Serial.println(" steps");
+  }
+  int takeUp = max(altTakeUp, azTakeUp);
+  for (int i = 0; i < takeUp; i++) {
+    if (i < altTakeUp) stepMotor(ALT_STEP_PIN);
+    if (i < azTakeUp) {
+      stepMotor(AZ_WEST_STEP_PIN);
+      stepMotor(AZ_EAST_STEP_PIN);
+    }
+    waitMicros(rampInterval(i, takeUp, altSpeed));
+  }
+  
+  if (altAbs > 0) lastAltDirection = altDir;
+  if (azAbs > 0) lastAzDirection = azDir;
+  
+  // Start half-way so the minor axis steps are centred in the move
+  long altError = major / 2;
+  long azError = major / 2;
+  
+  for (long i = 0; i < major; i++) {
+    altError += altAbs;
+    if (altError >= major) {
+      altError -= major;
+      stepMotor(ALT_STEP_PIN);
+      altPosition += altDir;
+    }
+    azError += azAbs;
+    if (azError >= major) {
+      azError -= major;
+      stepMotor(AZ_WEST_STEP_PIN);
+      stepMotor(AZ_EAST_STEP_PIN);
+      azPosition += azDir;
+    }
+    waitMicros(rampInterval(i, major, altSpeed));
+    
+    if (telemetryInterval > 0 && (i + 1) % telemetryInterval == 0) {
+      sendTelemetry();
+    }
     
-    if (i % 100 == 0 && stringComplete) {
+    if (i % 100 == 0 && stopPending()) {
       break;
     }
   }
@@ -432,6 +677,18 @@ void processCommand(String command) {
     return;
   }
   
+  // Combined move: M<alt>,<az>
+  if (command.startsWith("M")) {
+    int comma = command.indexOf(',');
+    if (comma < 0) {
+      Serial.println("ERROR:Invalid move");
+      return;
+    }
+    moveBoth(command.substring(1, comma).toInt(), command.substring(comma + 1).toInt());
+    Serial.println("OK:MOVE");
+    return;
+  }
+  
   // Stop
   if (command == "S") {
     digitalWrite(ALT_ENABLE_PIN, HIGH);
@@ -474,6 +731,19 @@ void processCommand(String command) {
     return;
   }
   
+  // Set acceleration (stored with the calibration by CAL:SAVE)
+  if (command.startsWith("C")) {
+    long accel = command.substring(1).toInt();
+    if (accel >= 0 && accel <= MAX_ACCELERATION) {
+      cal.acceleration = accel;
+      Serial.print("OK:ACCEL=");
+      Serial.println(accel);
+    } else {
+      Serial.println("ERROR:Invalid acceleration");
+    }
+    return;
+  }
+  
   // Enable motors
   if (command == "E") {
     digitalWrite(ALT_ENABLE_PIN, LOW);
@@ -492,6 +762,26 @@ void processCommand(String command) {
     return;
   }
   
+  // Position telemetry while moving
+  if (command.startsWith("T")) {
+    long interval = command.substring(1).toInt();
+    if (interval >= 0) {
+      telemetryInterval = interval;
+      Serial.print("OK:TELEMETRY=");
+      Serial.println(telemetryInterval);
+    } else {
+      Serial.println("ERROR:Invalid telemetry interval");
+    }
+    return;
+  }
+  
+  // Switch to the binary framed protocol (after this reply)
+  if (command == "!BIN") {
+    Serial.println("OK:BINARY");
+    binaryRequested = true;
+    return;
+  }
+  
   // Status
   if (command == "?") {
     Serial.println("=== STATUS ===");
@@ -502,6 +792,8 @@ void processCommand(String command) {
     Serial.println(azPosition);
     Serial.print("Speed: ");
     Serial.println(altSpeed);
+    Serial.print("Acceleration: ");
+    Serial.println(cal.acceleration);
     Serial.print("Calibrated: ");
     Serial.println(cal.isCalibrated ? "YES" : "NO");
     Serial.println("==============");
@@ -511,6 +803,156 @@ void processCommand(String command) {
   Serial.println("ERROR:Unknown command");
 }
 
+// ============================================
+// BINARY FRAME PROCESSING
+// ============================================
+
+uint8_t crc8(const byte* data, int length) {
+  uint8_t crc = 0;
+  for (int i = 0; i < length; i++) {
+    crc ^= data[i];
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+void putInt32(byte* dest, long value) {
+  for (int i = 0; i < 4; i++) {
+    dest[i] = (value >> (8 * i)) & 0xFF;
+  }
+}
+
+long getInt32(const byte* src) {
+  unsigned long value = 0;
+  for (int i = 3; i >= 0; i--) {
+    value = (value << 8) | src[i];
+  }
+  return (long)value;
+}
+
+void sendFrame(byte seq, byte opcode, byte status, long a, long b) {
+  byte frame[FRAME_REPLY_SIZE];
+  frame[0] = FRAME_REPLY_SYNC;
+  frame[1] = seq;
+  frame[2] = opcode;
+  frame[3] = status;
+  putInt32(frame + 4, a);
+  putInt32(frame + 8, b);
+  frame[FRAME_REPLY_SIZE - 1] = crc8(frame + 1, FRAME_REPLY_SIZE - 2);
+  Serial.write(frame, FRAME_REPLY_SIZE);
+}
+
+void setMotorsEnabled(bool enable) {
+  // TMC2208: LOW = enabled, HIGH = disabled
+  digitalWrite(ALT_ENABLE_PIN, enable ? LOW : HIGH);
+  digitalWrite(AZ_WEST_ENABLE_PIN, enable ? LOW : HIGH);
+  digitalWrite(AZ_EAST_ENABLE_PIN, enable ? LOW : HIGH);
+}
+
+void processFrame() {
+  byte seq = frameBuffer[1];
+  byte opcode = frameBuffer[2];
+  long param = getInt32(frameBuffer + 3);
+  bool crcValid = crc8(frameBuffer + 1, FRAME_COMMAND_SIZE - 2) == frameBuffer[FRAME_COMMAND_SIZE - 1];
+  
+  // Release the buffer so stopPending() can read the next frame while
+  // this one's move runs
+  frameLength = 0;
+  frameComplete = false;
+  
+  if (!crcValid) {
+    sendFrame(seq, opcode, FRAME_STATUS_BAD_CRC, 0, 0);
+    return;
+  }
+  
+  switch (opcode) {
+    case 'A':
+      moveAltitude(param);
+      sendFrame(seq, opcode, FRAME_STATUS_OK, param, altPosition);
+      break;
+      
+    case 'Z':
+      moveAzimuthDifferential(param);
+      sendFrame(seq, opcode, FRAME_STATUS_OK, param, azPosition);
+      break;
+      
+    case 'M': {
+      // ALT in the low 16 bits, AZ in the high 16 bits
+      long altSteps = (int16_t)(param & 0xFFFF);
+      long azSteps = (int16_t)((param >> 16) & 0xFFFF);
+      moveBoth(altSteps, azSteps);
+      sendFrame(seq, opcode, FRAME_STATUS_OK, altSteps, azSteps);
+      break;
+    }
+      
+    case 'S':
+    case 'D':
+      setMotorsEnabled(false);
+      sendFrame(seq, opcode, FRAME_STATUS_OK, 0, 0);
+      break;
+      
+    case 'E':
+      setMotorsEnabled(true);
+      sendFrame(seq, opcode, FRAME_STATUS_OK, 0, 0);
+      break;
+      
+    case 'P':
+      sendFrame(seq, opcode, FRAME_STATUS_OK, altPosition, azPosition);
+      break;
+      
+    case 'R':
+      altPosition = 0;
+      azPosition = 0;
+      lastAltDirection = 0;
+      lastAzDirection = 0;
+      sendFrame(seq, opcode, FRAME_STATUS_OK, 0, 0);
+      break;
+      
+    case 'V':
+      if (param > 0 && param <= MAX_SPEED) {
+        altSpeed = param;
+        azSpeed = param;
+        sendFrame(seq, opcode, FRAME_STATUS_OK, param, 0);
+      } else {
+        sendFrame(seq, opcode, FRAME_STATUS_ERROR, param, 0);
+      }
+      break;
+      
+    case '?':
+      sendFrame(seq, opcode, FRAME_STATUS_OK, altSpeed, cal.isCalibrated ? 1 : 0);
+      break;
+      
+    case 'C':
+      if (param >= 0 && param <= MAX_ACCELERATION) {
+        cal.acceleration = param;
+        sendFrame(seq, opcode, FRAME_STATUS_OK, param, 0);
+      } else {
+        sendFrame(seq, opcode, FRAME_STATUS_ERROR, param, 0);
+      }
+      break;
+      
+    case 'T':
+      if (param >= 0) {
+        telemetryInterval = param;
+        sendFrame(seq, opcode, FRAME_STATUS_OK, param, 0);
+      } else {
+        sendFrame(seq, opcode, FRAME_STATUS_ERROR, param, 0);
+      }
+      break;
+      
+    case 'X':  // Back to the text protocol
+      sendFrame(seq, opcode, FRAME_STATUS_OK, 0, 0);
+      binaryMode = false;
+      break;
+      
+    default:
+      sendFrame(seq, opcode, FRAME_STATUS_UNKNOWN, 0, 0);
+      break;
+  }
+}
+
 // ============================================
 // SETUP
 // ============================================
@@ -559,15 +1001,55 @@ void setup() {
 // ============================================
 
 void loop() {
+  if (frameComplete) {
+    processFrame();
+  }
+  
   if (stringComplete) {
+    String tag = takeCommandTag(inputString);
     processCommand(inputString);
+    echoCommandTag(tag);
     inputString = "";
     stringComplete = false;
+    
+    // Switch only once the text reply (and tag) has gone out
+    if (binaryRequested) {
+      binaryMode = true;
+      binaryRequested = false;
+    }
   }
 }
 
+/*
+ * Split an optional "#<seq>" sequence tag off the end of a command.
+ * Tagged commands are echoed back as "#<seq>" once all of their reply
+ * lines have been sent, so a host that pipelines several commands can
+ * match every reply to the command that produced it.
+ */
+String takeCommandTag(String &cmd) {
+  int hash = cmd.indexOf('#');
+  if (hash < 0) return "";
+  String tag = cmd.substring(hash + 1);
+  cmd.remove(hash);
+  tag.trim();
+  return tag;
+}
+
+void echoCommandTag(String tag) {
+  if (tag.length() == 0) return;
+  Serial.print('#');
+  Serial.println(tag);
+}
+
 void serialEvent() {
-  while (Serial.available()) {
+  if (binaryMode) {
+    readFrameBytes();
+    return;
+  }
+  
+  // Stop at the end of a line: anything after it is the next (pipelined)
+  // command and stays in the receive buffer until this one is processed
+  while (Serial.available() && !stringComplete) {
     char inChar = (char)Serial.read();
     if (inChar == '\n') {
       stringComplete = true;
@@ -576,3 +1058,17 @@ void serialEvent() {
     }
   }
 }
+
+void readFrameBytes() {
+  // Fill one fixed-size frame; bytes before a sync byte are skipped
+  while (Serial.available() && !frameComplete) {
+    byte inByte = Serial.read();
+    if (frameLength == 0 && inByte != FRAME_COMMAND_SYNC) {
+      continue;
+    }
+    frameBuffer[frameLength++] = inByte;
+    if (frameLength == FRAME_COMMAND_SIZE) {
+      frameComplete = true;
+    }
+  }
+}
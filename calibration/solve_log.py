@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+SharpCap/NINA polar alignment log parsing
+
+Extracts the polar alignment error of every plate solve from SharpCap
+and NINA log text. Shared by the live AutoPA tailer and offline tools.
+
+Logs are mostly unrelated chatter, so each format has a marker substring
+that every solve line contains ('AltAzCor=' for SharpCap, '{' for NINA).
+parse_text() finds the markers with str.find and runs the compiled
+pattern only on the lines around them; the rest of a chunk is never
+split into lines or touched by a regex.
+
+Example:
+    errors = parse_text(chunk, 'sharpcap')
+    for error in errors:
+        print(error['timestamp'], error['total_error'])
+"""
+
+import json
+import re
+from typing import Iterator, List, Optional
+
+# SharpCap: "Info ... 21:04:13.123456 ... AltAzCor=Alt=0.52,Az=-0.31" (arcminutes)
+SHARPCAP_MARKER = 'AltAzCor='
+SHARPCAP_PATTERN = re.compile(
+    r'(?:Info)\W*(\d{2}:\d{2}:\d{2}\.\d{6}).*(?:AltAzCor=)(?:Alt=)([-\d.]+)[,](?:Az=)([-\d.]+)')
+
+# NINA: "21:04:13.123 - {"Alt": 31.2, "Az": -18.6, "Total": 36.3}" (arcseconds)
+NINA_MARKER = '{'
+NINA_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{3})\s-\s(\{.*\})')
+
+# Log file names: SharpCap's logs directory, NINA's one log per day
+SHARPCAP_LOG_GLOB = '*.log'
+NINA_LOG_GLOB = '????-??-??.log'
+
+
+def parse_sharpcap_line(line: str) -> Optional[dict]:
+    """
+    Parse one SharpCap log line
+
+    Args:
+        line: Log line
+
+    Returns:
+        Dict with timestamp, alt_error, az_error, total_error (arcseconds),
+        or None if the line is not a polar alignment solve
+    """
+    if SHARPCAP_MARKER not in line:
+        return None
+    match = SHARPCAP_PATTERN.search(line)
+    if not match:
+        return None
+
+    try:
+        # Convert arcminutes to arcseconds
+        alt_error = float(match.group(2)) * 60.0
+        az_error = float(match.group(3)) * 60.0
+    except ValueError:
+        return None
+
+    return {
+        'timestamp': match.group(1),
+        'alt_error': alt_error,
+        'az_error': az_error,
+        'total_error': (alt_error**2 + az_error**2)**0.5
+    }
+
+
+def parse_nina_line(line: str) -> Optional[dict]:
+    """
+    Parse one NINA polar alignment log line
+
+    Args:
+        line: Log line
+
+    Returns:
+        Dict with timestamp, alt_error, az_error, total_error (arcseconds),
+        or None if the line is not a polar alignment solve
+    """
+    if NINA_MARKER not in line:
+        return None
+    match = NINA_PATTERN.search(line)
+    if not match:
+        return None
+
+    try:
+        data = json.loads(match.group(2))
+        return {
+            'timestamp': match.group(1),
+            'alt_error': data.get('Alt', 0),
+            'az_error': data.get('Az', 0),
+            'total_error': data.get('Total', 0)
+        }
+    except (ValueError, AttributeError):
+        return None
+
+
+def timestamp_seconds(timestamp: str) -> float:
+    """
+    Seconds since midnight of a solve timestamp
+
+    Args:
+        timestamp: 'HH:MM:SS.ffffff' (SharpCap) or 'HH:MM:SS.fff' (NINA)
+    """
+    hours, minutes, seconds = timestamp.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+PARSERS = {
+    'sharpcap': (SHARPCAP_MARKER, parse_sharpcap_line),
+    'nina': (NINA_MARKER, parse_nina_line),
+}
+
+
+def candidate_lines(text, marker, start: int = 0, end: Optional[int] = None) -> Iterator:
+    """
+    Yield each line of a buffer that contains the marker (once per line)
+
+    Args:
+        text: Log text, or bytes/mmap with a bytes marker
+        marker: Substring every line of interest contains
+        start: Offset of the first line to search
+        end: Offset just past the last line to search (default: end of buffer)
+    """
+    newline = b'\n' if isinstance(marker, bytes) else '\n'
+    if end is None:
+        end = len(text)
+    pos = text.find(marker, start, end)
+    while pos >= 0:
+        line_start = max(text.rfind(newline, start, pos) + 1, start)
+        line_end = text.find(newline, pos, end)
+        if line_end < 0:
+            line_end = end
+        yield text[line_start:line_end]
+        pos = text.find(marker, line_end, end)
+
+
+def parse_text(text: str, software: str) -> List[dict]:
+    """
+    Parse every solve in a chunk of log text
+
+    Args:
+        text: Log text (complete lines)
+        software: 'sharpcap' or 'nina'
+
+    Returns:
+        Parsed errors in log order
+    """
+    marker, parse_line = PARSERS[software]
+    errors = []
+    for line in candidate_lines(text, marker):
+        error = parse_line(line)
+        if error:
+            errors.append(error)
+    return errors
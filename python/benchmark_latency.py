@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Star Adventurer GTi - Serial Round-Trip Latency Benchmark
+
+Measures the round-trip time of every controller command through
+PolarAlignController.send_command, from writing the command to receiving
+its complete reply.
+
+Commands measured:
+  P, ?, V<speed>, E/D, A0, Z0, A<N>, Z<N> and (v3 firmware) CAL:SHOW
+
+Moves of N steps alternate direction (A<N>, A-<N>, ...) so the mount ends
+where it started. For each command the benchmark reports p50/p95/p99
+latency and sequential throughput in commands per second, plus the
+throughput of pipelined position queries when the firmware supports
+sequence tags.
+
+Results can be written as JSON and compared against an earlier run to
+catch regressions in the host code or the firmware command loop.
+
+Usage:
+  python benchmark_latency.py --port /dev/ttyUSB0 --reps 200
+  python benchmark_latency.py --simulate v3 --output run.json
+  python benchmark_latency.py --simulate v3 --compare run.json
+
+Author: Polar Align Automation Project
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+from typing import List, Optional, Tuple
+
+from polar_align_control import PolarAlignController
+from polar_align_protocol import parse_status
+
+
+# Latency increase (fraction of the baseline p50) reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Percentile with linear interpolation between the closest ranks
+    
+    Args:
+        samples: Measured values (need not be sorted)
+        pct: Percentile, 0-100
+    
+    Returns:
+        Interpolated value (0.0 for no samples)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(latencies: List[float], failures: int, elapsed: float) -> dict:
+    """
+    Build the statistics for one benchmarked command
+    
+    Args:
+        latencies: Round-trip times of successful commands, in seconds
+        failures: Commands that got no reply or an ERROR reply
+        elapsed: Wall-clock time for all repetitions, in seconds
+    
+    Returns:
+        Dictionary of statistics (times in milliseconds)
+    """
+    ms = [t * 1000.0 for t in latencies]
+    count = len(ms) + failures
+    return {
+        'count': count,
+        'failures': failures,
+        'min_ms': round(min(ms), 3) if ms else None,
+        'mean_ms': round(sum(ms) / len(ms), 3) if ms else None,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'max_ms': round(max(ms), 3) if ms else None,
+        'commands_per_sec': round(count / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def benchmark_cases(move_steps: int, speed: int,
+                    include_calibration: bool) -> List[Tuple[str, List[str]]]:
+    """
+    Commands to benchmark
+    
+    Each case cycles through its command list, one command per repetition.
+    
+    Args:
+        move_steps: Step count for the non-zero moves
+        speed: Speed to (re)set with the V command
+        include_calibration: Include CAL:SHOW (v3 firmware only)
+    
+    Returns:
+        List of (case name, commands)
+    """
+    cases = [
+        ('P', ['P']),
+        ('?', ['?']),
+        ('V', [f'V{speed}']),
+        ('E/D', ['E', 'D']),
+        ('A0', ['A0']),
+        ('Z0', ['Z0']),
+        (f'A{move_steps}', [f'A{move_steps}', f'A-{move_steps}']),
+        (f'Z{move_steps}', [f'Z{move_steps}', f'Z-{move_steps}']),
+    ]
+    if include_calibration:
+        cases.append(('CAL:SHOW', ['CAL:SHOW']))
+    return cases
+
+
+def command_timeout(controller: PolarAlignController, command: str) -> float:
+    """Reply timeout for a command, allowing for the time a move takes"""
+    timeout = controller.reply_timeout
+    if command[:1] in ('A', 'Z') and len(command) > 1:
+        try:
+            steps = abs(int(command[1:]))
+        except ValueError:
+            steps = 0
+        timeout += 2.0 * steps / max(1, controller.current_speed)
+    return timeout
+
+
+def run_case(controller: PolarAlignController, commands: List[str],
+             reps: int, warmup: int) -> dict:
+    """
+    Time one benchmark case
+    
+    Args:
+        controller: Connected controller
+        commands: Commands to cycle through
+        reps: Timed repetitions
+        warmup: Untimed repetitions run first
+    
+    Returns:
+        Statistics from summarize()
+    """
+    for i in range(warmup):
+        command = commands[i % len(commands)]
+        controller.send_command(command, command_timeout(controller, command))
+    
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    
+    for i in range(reps):
+        command = commands[i % len(commands)]
+        timeout = command_timeout(controller, command)
+        
+        sent = time.perf_counter()
+        response = controller.send_command(command, timeout)
+        latency = time.perf_counter() - sent
+        
+        if response is None or response.startswith('ERROR'):
+            failures += 1
+        else:
+            latencies.append(latency)
+    
+    return summarize(latencies, failures, time.perf_counter() - start)
+
+
+def run_pipelined(controller: PolarAlignController, reps: int,
+                  batch: int) -> Optional[dict]:
+    """
+    Measure throughput of pipelined position queries
+    
+    Args:
+        controller: Connected controller with pipelining enabled
+        reps: Total number of queries
+        batch: Queries written back-to-back per batch
+    
+    Returns:
+        Statistics (latency is per batch), or None if pipelining is off
+    """
+    if not (controller.pipelining or controller.binary):
+        return None
+    
+    latencies = []
+    failures = 0
+    sent_total = 0
+    start = time.perf_counter()
+    
+    while sent_total < reps:
+        count = min(batch, reps - sent_total)
+        sent = time.perf_counter()
+        responses = controller.send_pipelined(['P'] * count)
+        latency = time.perf_counter() - sent
+        
+        missing = sum(1 for r in responses if r is None)
+        failures += missing
+        if not missing:
+            latencies.append(latency)
+        sent_total += count
+    
+    elapsed = time.perf_counter() - start
+    result = summarize(latencies, 0, elapsed)
+    result['batch'] = batch
+    result['count'] = sent_total
+    result['failures'] = failures
+    result['commands_per_sec'] = round(sent_total / elapsed, 2) if elapsed > 0 else None
+    return result
+
+
+def detect_firmware(controller: PolarAlignController) -> str:
+    """Tell v2 and v3 firmware apart from their status block"""
+    status = parse_status(controller.send_command('?') or '')
+    return status['firmware'] if status else 'v2'
+
+
+def compare_results(current: dict, baseline: dict,
+                    threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare two benchmark runs
+    
+    Args:
+        current: Results of this run
+        baseline: Results loaded from an earlier run
+        threshold: Fractional p50 increase reported as a regression
+    
+    Returns:
+        Names of the commands that regressed
+    """
+    regressions = []
+    print(f"\n{'Command':<12}{'base p50':>12}{'p50':>12}{'change':>10}")
+    print("-" * 46)
+    
+    for name, stats in current['commands'].items():
+        base = baseline.get('commands', {}).get(name)
+        if not base or not base.get('p50_ms'):
+            continue
+        change = (stats['p50_ms'] - base['p50_ms']) / base['p50_ms']
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<12}{base['p50_ms']:>10.2f}ms{stats['p50_ms']:>10.2f}ms"
+              f"{change * 100:>+9.1f}%{flag}")
+    
+    return regressions
+
+
+def print_results(results: dict):
+    """Print the benchmark results as a table"""
+    print(f"\nFirmware {results['firmware']} on {results['port']} "
+          f"({results['mode']} mode, {results['repetitions']} repetitions)\n")
+    print(f"{'Command':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'cmd/s':>10}{'fail':>6}")
+    print("-" * 58)
+    
+    rows = list(results['commands'].items())
+    if results.get('pipelined'):
+        rows.append((f"P x{results['pipelined']['batch']} pipe", results['pipelined']))
+    
+    for name, stats in rows:
+        print(f"{name:<12}{stats['p50_ms']:>8.2f}ms{stats['p95_ms']:>8.2f}ms"
+              f"{stats['p99_ms']:>8.2f}ms{stats['commands_per_sec'] or 0:>10.1f}"
+              f"{stats['failures']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serial round-trip latency benchmark for the polar alignment controller',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python benchmark_latency.py --port /dev/ttyUSB0
+    python benchmark_latency.py --simulate v3 --reps 200 --output baseline.json
+    python benchmark_latency.py --simulate v3 --compare baseline.json
+    python benchmark_latency.py --port COM3 --mode binary --move-steps 200
+"""
+    )
+    
+    parser.add_argument('--port', '-p',
+                      help='Serial port (auto-detect if neither --port nor --simulate)')
+    
+    parser.add_argument('--simulate',
+                      choices=['v2', 'v3'],
+                      help='Benchmark against firmware_simulator.py instead of hardware')
+    
+    parser.add_argument('--reps', '-n',
+                      type=int,
+                      default=100,
+                      help='Timed repetitions per command (default: 100)')
+    
+    parser.add_argument('--warmup',
+                      type=int,
+                      default=3,
+                      help='Untimed repetitions per command (default: 3)')
+    
+    parser.add_argument('--move-steps',
+                      type=int,
+                      default=100,
+                      help='Steps for the A<N>/Z<N> moves (default: 100)')
+    
+    parser.add_argument('--mode',
+                      choices=['text', 'tagged', 'binary'],
+                      default='text',
+                      help='Protocol mode to benchmark (default: text)')
+    
+    parser.add_argument('--batch',
+                      type=int,
+                      default=10,
+                      help='Commands per pipelined batch (default: 10)')
+    
+    parser.add_argument('--output', '-o',
+                      help='Write results to this JSON file')
+    
+    parser.add_argument('--compare', '-c',
+                      help='Compare against results from an earlier run')
+    
+    args = parser.parse_args()
+    
+    sim = None
+    port = args.port
+    if args.simulate:
+        from firmware_simulator import FirmwareSimulator
+        sim = FirmwareSimulator(firmware=args.simulate)
+        port = sim.start()
+    
+    controller = PolarAlignController()
+    if not controller.connect(port):
+        print("ERROR: Could not connect to controller")
+        if sim:
+            sim.stop()
+        sys.exit(1)
+    
+    try:
+        firmware = detect_firmware(controller)
+        
+        if args.mode != 'text' and not controller.enable_pipelining():
+            print("ERROR: Firmware does not support tagged commands")
+            sys.exit(1)
+        if args.mode == 'binary' and not controller.enable_binary():
+            print("ERROR: Firmware does not support binary mode")
+            sys.exit(1)
+        
+        cases = benchmark_cases(args.move_steps, controller.current_speed,
+                                include_calibration=firmware == 'v3' and args.mode != 'binary')
+        
+        results = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'host': platform.node(),
+            'port': f"simulator ({args.simulate})" if sim else controller.serial.port,
+            'firmware': firmware,
+            'mode': args.mode,
+            'repetitions': args.reps,
+            'move_steps': args.move_steps,
+            'speed': controller.current_speed,
+            'commands': {},
+        }
+        
+        for name, commands in cases:
+            print(f"Benchmarking {name}...")
+            results['commands'][name] = run_case(controller, commands, args.reps, args.warmup)
+        
+        if args.mode != 'text':
+            print("Benchmarking pipelined P...")
+            results['pipelined'] = run_pipelined(controller, args.reps, args.batch)
+        
+        if args.mode == 'binary':
+            controller.disable_binary()
+    
+    finally:
+        controller.disconnect()
+        if sim:
+            sim.stop()
+    
+    print_results(results)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline)
+        if regressions:
+            print(f"\n{len(regressions)} command(s) regressed by more than "
+                  f"{REGRESSION_THRESHOLD * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(2)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1053 @@
+#!/usr/bin/env python3
+"""
+Star Adventurer GTi - Firmware Simulator
+
+Simulates the Arduino controller on a pseudo-terminal so the Python tools
+can run without hardware. The simulator speaks the same serial protocol
+as either firmware:
+  
+  v2 - arduino/polar_align_controller.ino
+  v3 - calibration/polar_align_controller_v3_calibration.ino
+
+MODELLED BEHAVIOUR:
+------------------
+- Blocking moves: a move takes steps / speed seconds and its reply is
+  only sent once the move has finished, just like the firmware
+- Acceleration ramps: C<accel> sets the trapezoidal profile every move
+  is timed with (part of the EEPROM calibration on v3)
+- Combined M<alt>,<az> moves with both axes interleaved, so they take as
+  long as the longer axis alone
+- Stop check every 100 steps (v3): a waiting 'S' (an S frame in binary
+  mode) ends the move early
+- Backlash (v3): reversing an axis first takes up the calibrated
+  backlash steps without counting position
+- EEPROM (v3): CAL:SAVE/CAL:LOAD use a JSON file that survives restarts
+- Auto-reset: opening the port reboots the "Arduino" (banner, position
+  counters back to 0) unless reset_on_open is False. On Linux every open
+  is seen through inotify, so closing and reopening the port at once
+  resets it too, as the DTR edge would. Opens while it is still booting
+  belong to the same reset
+- "#<seq>" command tags and, for v3, the binary framed protocol
+- T<n> position telemetry every n steps while moving
+- Serial transmit time at the configured baud rate
+
+Usage:
+  python firmware_simulator.py --firmware v3 --eeprom sim_eeprom.json
+  python polar_align_control.py /dev/pts/5
+
+From Python:
+  sim = FirmwareSimulator(firmware='v2', speedup=10)
+  port = sim.start()
+  controller.connect(port)
+  ...
+  sim.stop()
+
+Author: Polar Align Automation Project
+"""
+
+import os
+import re
+import pty
+import ctypes
+import math
+import json
+import time
+import select
+import argparse
+import threading
+import tty
+from itertools import accumulate, chain
+from typing import List, Optional, Tuple
+
+from polar_align_protocol import (
+    COMMAND_FRAME, FRAME_COMMAND_SYNC, FRAME_REPLY_SYNC, REPLY_FRAME,
+    STATUS_OK, STATUS_ERROR, STATUS_BAD_CRC, STATUS_UNKNOWN, STATUS_TELEMETRY, crc8,
+    unpack_move_param
+)
+
+
+# Firmware constants
+MAX_SPEED = 2000
+MICROSTEPS = 16
+STEPS_PER_REV = 200
+MIN_PULSE_WIDTH = 2      # Microseconds
+DEFAULT_ACCELERATION = 1000
+MAX_ACCELERATION = 32767
+CAL_MAGIC = 0xC412
+CAL_MAGIC_V1 = 0xC411    # EEPROM layout from before acceleration was stored
+
+# Time from port open until setup() runs (bootloader wait)
+BOOT_DELAY = 1.5
+
+# Steps between stop checks in the v3 move loops
+STOP_CHECK_INTERVAL = 100
+
+# inotify event mask for opens of the watched path
+IN_OPEN = 0x00000020
+
+_INT_PATTERN = re.compile(r'\s*([-+]?\d+)')
+_FLOAT_PATTERN = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+))')
+
+
+def to_int(text: str) -> int:
+    """Arduino String.toInt(): leading integer, 0 if there is none"""
+    match = _INT_PATTERN.match(text)
+    return int(match.group(1)) if match else 0
+
+
+def to_float(text: str) -> float:
+    """Arduino String.toFloat(): leading number, 0.0 if there is none"""
+    match = _FLOAT_PATTERN.match(text)
+    return float(match.group(1)) if match else 0.0
+
+
+def ramp_interval(i: int, steps: int, speed: int, acceleration: int) -> int:
+    """
+    rampInterval(): microseconds the firmware waits after step i of a move
+    
+    Args:
+        i: Step index (0-based)
+        steps: Steps in the move
+        speed: Cruise speed in steps per second
+        acceleration: Steps per second^2 (0 = constant speed)
+    """
+    cruise = 1000000 // speed
+    if acceleration <= 0:
+        return cruise
+    rate = math.sqrt(2.0 * acceleration * min(i + 1, steps - i))
+    if rate >= speed:
+        return cruise
+    return int(1000000.0 / rate)
+
+
+def interleaved_steps(iterations: int, steps: int, major: int) -> int:
+    """
+    Steps an axis of moveBoth() has taken after some loop iterations
+    
+    Args:
+        iterations: Loop iterations run so far
+        steps: The axis' commanded steps (signed)
+        major: Total iterations (steps of the longer axis)
+    
+    Returns:
+        Signed steps taken
+    """
+    # Error accumulator starts at major / 2 and gains abs(steps) per iteration
+    count = (iterations * abs(steps) + major // 2) // major
+    return count if steps >= 0 else -count
+
+
+def default_calibration() -> dict:
+    """Calibration values set by initCalibration() in the v3 firmware"""
+    return {
+        'alt_steps_per_arcsec': 89.0,
+        'az_steps_per_arcsec': 25.0,
+        'alt_backlash': 0,
+        'az_backlash': 0,
+        'max_speed': 1000,
+        'acceleration': DEFAULT_ACCELERATION,
+        'is_calibrated': False,
+    }
+
+
+class OpenWatch:
+    """
+    Notices every open of the simulated port through inotify (Linux)
+    
+    A program that closes the port and opens it again between two polls
+    never shows up as a hang-up on the master side. The open itself is
+    still an inotify event on the device node. Elsewhere opened() is
+    always False and only hang-ups are seen.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Start watching a port
+        
+        Args:
+            path: Device path of the pseudo-terminal slave
+        """
+        self.fd = None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        if libc.inotify_add_watch(fd, os.fsencode(path), IN_OPEN) < 0:
+            os.close(fd)
+            return
+        self.fd = fd
+    
+    def opened(self) -> bool:
+        """Check whether the port has been opened since the last call"""
+        if self.fd is None:
+            return False
+        opened = False
+        while True:
+            try:
+                # Only IN_OPEN is watched, so any event is an open
+                opened = bool(os.read(self.fd, 4096)) or opened
+            except OSError:
+                return opened
+    
+    def close(self):
+        """Stop watching"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class FirmwareSimulator:
+    """Simulated polar alignment controller attached to a pseudo-terminal"""
+    
+    def __init__(self, firmware: str = 'v3', eeprom_path: Optional[str] = None,
+                 speedup: float = 1.0, reset_on_open: bool = True,
+                 baudrate: int = 115200):
+        """
+        Create the simulator (call start() to open the pseudo-terminal)
+        
+        Args:
+            firmware: 'v2' or 'v3'
+            eeprom_path: JSON file backing the v3 EEPROM (in memory if None)
+            speedup: Run motion, boot and transmit delays this many times
+                     faster than real time
+            reset_on_open: Reboot when a program opens the port, like an
+                           Uno/Nano with DTR auto-reset
+            baudrate: Baud rate used to pace replies
+        """
+        if firmware not in ('v2', 'v3'):
+            raise ValueError(f"Unknown firmware version: {firmware}")
+        
+        self.firmware = firmware
+        self.eeprom_path = eeprom_path
+        self.speedup = speedup
+        self.reset_on_open = reset_on_open
+        self.baudrate = baudrate
+        
+        self.master_fd = None
+        self.slave_fd = None
+        self.port = None
+        
+        self._thread = None
+        self._running = threading.Event()
+        self._rx = bytearray()
+        self._eeprom = None
+        self._port_open = False
+        self._opens: Optional[OpenWatch] = None
+        
+        # Firmware state (set by _boot)
+        self.alt_position = 0
+        self.az_position = 0
+        self.speed = 800
+        self.step_interval = 1000
+        self.motors_enabled = False
+        self.last_alt_direction = 0
+        self.last_az_direction = 0
+        self.telemetry_interval = 0
+        self.acceleration = DEFAULT_ACCELERATION
+        self.binary_mode = False
+        self.cal = default_calibration()
+        
+        # Statistics
+        self.commands_processed = 0
+        self.moves_interrupted = 0
+    
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    
+    def start(self) -> str:
+        """
+        Open the pseudo-terminal and start the firmware thread
+        
+        Returns:
+            Device path to pass to the tools (e.g. /dev/pts/5)
+        """
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        
+        # Only keep the slave open long enough to configure it, so a
+        # client opening the port shows up as the hang-up clearing
+        os.close(self.slave_fd)
+        self.slave_fd = None
+        self._opens = OpenWatch(self.port)
+        
+        if not self.reset_on_open:
+            self._boot(banner=False)
+        
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self.port
+    
+    def stop(self):
+        """Stop the firmware thread and close the pseudo-terminal"""
+        self._running.clear()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+        if self._opens:
+            self._opens.close()
+            self._opens = None
+    
+    def _sleep(self, seconds: float):
+        """Sleep for a simulated duration"""
+        if seconds > 0:
+            time.sleep(seconds / self.speedup)
+    
+    def _boot(self, banner: bool = True):
+        """Power-on reset: clear state and run setup()"""
+        self.alt_position = 0
+        self.az_position = 0
+        self.speed = 800
+        self.step_interval = 1000
+        self.last_alt_direction = 0
+        self.last_az_direction = 0
+        self.telemetry_interval = 0
+        self.acceleration = DEFAULT_ACCELERATION
+        self.binary_mode = False
+        self._rx.clear()
+        
+        if self.firmware == 'v2':
+            self.motors_enabled = True
+            if banner:
+                self._println("READY")
+                self._println("Star Adventurer GTi Polar Alignment Controller v2.0")
+                self._println("Differential AZ Control Enabled")
+                self._print_help()
+        else:
+            self.motors_enabled = False
+            self.cal = default_calibration()
+            loaded = self._load_calibration(quiet=not banner)
+            if banner:
+                if not loaded:
+                    self._println("INFO:Using default calibration values")
+                self._println("Star Adventurer GTi Polar Alignment Controller v3.0")
+                self._println("With Calibration Support")
+                self._println("Ready. Type '?' for status or 'CAL:SHOW' for calibration.")
+    
+    # ------------------------------------------------------------------
+    # Serial I/O
+    # ------------------------------------------------------------------
+    
+    def _run(self):
+        """Firmware main loop: wait for the port, then process commands"""
+        poller = select.poll()
+        poller.register(self.master_fd, select.POLLIN)
+        
+        while self._running.is_set():
+            events = poller.poll(50)
+            hung_up = any(flags & select.POLLHUP for _, flags in events)
+            
+            if self._opens.opened():
+                # (Re)opened, possibly too quickly for a hang-up to show
+                self._port_open = False
+            
+            if hung_up:
+                # No program has the port open
+                self._port_open = False
+                time.sleep(0.02)
+                continue
+            
+            if not self._port_open:
+                self._port_open = True
+                if self.reset_on_open:
+                    self._sleep(BOOT_DELAY)
+                    self._read_available()
+                    self._boot()
+                    # connect() opens the port twice back to back (fast
+                    # open, then the probe); opens during the boot are
+                    # part of this reset and must not start another
+                    self._opens.opened()
+            
+            self._read_available()
+            while self._running.is_set() and self._process_next():
+                self.commands_processed += 1
+    
+    def _read_available(self):
+        """Move any received bytes into the receive buffer"""
+        while True:
+            try:
+                ready, _, _ = select.select([self.master_fd], [], [], 0)
+                if not ready:
+                    return
+                data = os.read(self.master_fd, 4096)
+            except OSError:
+                return
+            if not data:
+                return
+            self._rx.extend(data)
+    
+    def _write(self, data: bytes):
+        """Transmit bytes, taking as long as the UART would"""
+        try:
+            os.write(self.master_fd, data)
+        except OSError:
+            return
+        self._sleep(len(data) * 10 / self.baudrate)
+    
+    def _println(self, text: str = ''):
+        self._write(text.encode() + b'\r\n')
+    
+    def _process_next(self) -> bool:
+        """
+        Run the next complete command in the receive buffer
+        
+        Returns:
+            True if a command was processed
+        """
+        if self.binary_mode:
+            return self._process_frame()
+        
+        end = self._rx.find(b'\n')
+        if end < 0:
+            return False
+        line = self._rx[:end].decode('latin-1')
+        del self._rx[:end + 1]
+        
+        # takeCommandTag()
+        switch_to_binary = False
+        tag = ''
+        if '#' in line:
+            line, tag = line.split('#', 1)
+            tag = tag.strip()
+        
+        if self.firmware == 'v2':
+            self._process_v2(line)
+        else:
+            switch_to_binary = self._process_v3(line)
+        
+        if tag:
+            self._println(f"#{tag}")
+        
+        if switch_to_binary:
+            self.binary_mode = True
+        return True
+    
+    def _stop_pending(self) -> bool:
+        """stopPending(): is the next unread command a stop?"""
+        self._read_available()
+        if self.binary_mode:
+            # The next whole frame, left in the buffer for _process_frame()
+            start = self._rx.find(bytes([FRAME_COMMAND_SYNC]))
+            if start < 0 or len(self._rx) - start < COMMAND_FRAME.size:
+                return False
+            raw = bytes(self._rx[start:start + COMMAND_FRAME.size])
+            return raw[2] == ord('S') and crc8(raw[1:-1]) == raw[-1]
+        return bool(self._rx) and self._rx[:1] in (b'S', b's')
+    
+    # ------------------------------------------------------------------
+    # Motion
+    # ------------------------------------------------------------------
+    
+    def _step_times(self, steps: int, motors: int) -> List[float]:
+        """
+        Seconds from the start of a step loop until each step is done
+        
+        Returns:
+            List whose entry n is the time taken by the first n steps
+        """
+        if self.firmware == 'v2':
+            pulse = MIN_PULSE_WIDTH
+            acceleration = self.acceleration
+        else:
+            # stepMotor() holds each pulse high then low
+            pulse = 2 * MIN_PULSE_WIDTH * motors
+            acceleration = self.cal['acceleration']
+        delays = ((pulse + ramp_interval(i, steps, self.speed, acceleration)) / 1e6
+                  for i in range(steps))
+        return list(accumulate(chain([0.0], delays)))
+    
+    def _run_steps(self, steps: int, motors: int, check_stop: bool,
+                   axis: Optional[str] = None, direction: int = 0,
+                   both: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Spend the time for a blocking step loop
+        
+        Args:
+            steps: Number of steps
+            motors: Motors pulsed per step (1 for ALT, 2 for AZ)
+            check_stop: Poll for a waiting stop every 100 steps
+            axis: 'ALT', 'AZ' or 'BOTH' to count position (and send
+                  telemetry), None for uncounted backlash steps
+            direction: +1 or -1
+            both: (alt, az) steps interleaved over the loop when axis is 'BOTH'
+        
+        Returns:
+            Steps actually taken
+        """
+        times = self._step_times(steps, motors)
+        telemetry = self.telemetry_interval if axis else 0
+        start = time.monotonic()
+        start_position = (self.alt_position, self.az_position)
+        taken = 0
+        
+        while taken < steps:
+            # Run up to the next point where the firmware does something
+            # other than step: a stop check after steps 1, 101, 201, ...
+            # or a telemetry report every telemetry_interval steps
+            target = steps
+            if check_stop:
+                target = min(target, 1 if taken == 0 else
+                             (taken - 1) // STOP_CHECK_INTERVAL * STOP_CHECK_INTERVAL
+                             + STOP_CHECK_INTERVAL + 1)
+            if telemetry:
+                target = min(target, (taken // telemetry + 1) * telemetry)
+            
+            block = target - taken
+            taken = target
+            if axis == 'ALT':
+                self.alt_position += direction * block
+            elif axis == 'AZ':
+                self.az_position += direction * block
+            elif axis == 'BOTH':
+                self.alt_position = start_position[0] + interleaved_steps(taken, both[0], steps)
+                self.az_position = start_position[1] + interleaved_steps(taken, both[1], steps)
+            
+            remaining = start + times[taken] / self.speedup - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            
+            if telemetry and taken % telemetry == 0:
+                self._send_telemetry()
+            
+            if check_stop and (taken - 1) % STOP_CHECK_INTERVAL == 0 and self._stop_pending():
+                self.moves_interrupted += 1
+                break
+        
+        return taken
+    
+    def _send_telemetry(self):
+        """sendTelemetry()"""
+        if self.binary_mode:
+            self._send_frame(0, ord('T'), STATUS_TELEMETRY,
+                             self.alt_position, self.az_position)
+        else:
+            self._println(f"T:{self.alt_position},{self.az_position}")
+    
+    def _take_backlash(self, direction: int, last_direction: int,
+                       backlash: int, axis: str, motors: int):
+        """Backlash compensation before reversing an axis (v3)"""
+        if last_direction == 0 or last_direction == direction or backlash <= 0:
+            return
+        if not self.binary_mode:
+            self._println(f"INFO:Compensating {axis} backlash: {backlash} steps")
+        self._run_steps(backlash, motors, check_stop=False)
+    
+    def move_altitude(self, steps: int):
+        """moveAltitude()"""
+        if steps == 0:
+            return
+        direction = 1 if steps > 0 else -1
+        
+        if self.firmware == 'v3':
+            self._take_backlash(direction, self.last_alt_direction,
+                                self.cal['alt_backlash'], 'ALT', 1)
+            self.last_alt_direction = direction
+        
+        self._run_steps(abs(steps), 1, check_stop=self.firmware == 'v3',
+                        axis='ALT', direction=direction)
+    
+    def move_azimuth(self, steps: int):
+        """moveAzimuthDifferential()"""
+        if steps == 0:
+            return
+        direction = 1 if steps > 0 else -1
+        
+        if self.firmware == 'v3':
+            self._take_backlash(direction, self.last_az_direction,
+                                self.cal['az_backlash'], 'AZ', 2)
+            self.last_az_direction = direction
+        
+        self._run_steps(abs(steps), 2, check_stop=self.firmware == 'v3',
+                        axis='AZ', direction=direction)
+    
+    def move_both(self, alt_steps: int, az_steps: int):
+        """moveBoth()"""
+        major = max(abs(alt_steps), abs(az_steps))
+        if major == 0:
+            return
+        alt_direction = 1 if alt_steps > 0 else -1
+        az_direction = 1 if az_steps > 0 else -1
+        
+        if self.firmware == 'v3':
+            # Both axes take up their backlash in the same loop
+            take_up = []
+            if alt_steps and self.last_alt_direction not in (0, alt_direction):
+                take_up.append(('ALT', self.cal['alt_backlash']))
+            if az_steps and self.last_az_direction not in (0, az_direction):
+                take_up.append(('AZ', self.cal['az_backlash']))
+            take_up = [(axis, steps) for axis, steps in take_up if steps > 0]
+            if not self.binary_mode:
+                for axis, steps in take_up:
+                    self._println(f"INFO:Compensating {axis} backlash: {steps} steps")
+            if take_up:
+                self._run_steps(max(steps for _, steps in take_up), 3, check_stop=False)
+            if alt_steps:
+                self.last_alt_direction = alt_direction
+            if az_steps:
+                self.last_az_direction = az_direction
+        
+        self._run_steps(major, 3, check_stop=self.firmware == 'v3',
+                        axis='BOTH', both=(alt_steps, az_steps))
+    
+    # ------------------------------------------------------------------
+    # v2 protocol
+    # ------------------------------------------------------------------
+    
+    def _process_v2(self, cmd: str):
+        """processCommand() from the v2 firmware"""
+        cmd = cmd.strip()
+        if not cmd:
+            return
+        
+        command = cmd[0]
+        param = cmd[1:]
+        upper = command.upper()
+        
+        if upper == 'H':
+            self._print_help()
+        elif upper == 'S':
+            self._println("OK:STOPPED")
+        elif upper == 'E':
+            self.motors_enabled = True
+            self._println("OK:ENABLED")
+        elif upper == 'D':
+            self.motors_enabled = False
+            self._println("OK:DISABLED")
+        elif upper in ('A', 'Z'):
+            if param:
+                steps = to_int(param)
+                if upper == 'A':
+                    self.move_altitude(steps)
+                    self._println(f"OK:ALT_MOVE:{steps}")
+                else:
+                    self.move_azimuth(steps)
+                    self._println(f"OK:AZ_MOVE:{steps}")
+            else:
+                self._println("ERROR:NO_PARAMETER")
+        elif upper == 'M':
+            comma = param.find(',')
+            if comma > 0:
+                alt_steps, az_steps = to_int(param[:comma]), to_int(param[comma + 1:])
+                self.move_both(alt_steps, az_steps)
+                self._println(f"OK:MOVE:{alt_steps},{az_steps}")
+            else:
+                self._println("ERROR:NO_PARAMETER")
+        elif upper == 'P':
+            self._println(f"POS:ALT:{self.alt_position}:AZ:{self.az_position}")
+        elif upper == 'R':
+            self.alt_position = 0
+            self.az_position = 0
+            self._println("OK:RESET")
+        elif upper == 'V':
+            if param:
+                speed = to_int(param)
+                if 0 < speed <= MAX_SPEED:
+                    self.speed = speed
+                    self.step_interval = 1000000 // speed
+                    self._println(f"OK:SPEED:{speed}")
+                else:
+                    self._println("ERROR:INVALID_SPEED")
+        elif upper == 'C':
+            if param and 0 <= to_int(param) <= MAX_ACCELERATION:
+                self.acceleration = to_int(param)
+                self._println(f"OK:ACCEL:{self.acceleration}")
+            else:
+                self._println("ERROR:INVALID_ACCEL")
+        elif upper == 'T':
+            if param and to_int(param) >= 0:
+                self.telemetry_interval = to_int(param)
+                self._println(f"OK:TELEMETRY:{self.telemetry_interval}")
+            else:
+                self._println("ERROR:INVALID_INTERVAL")
+        elif upper == 'B':
+            for line in ("START", "This is a manual procedure",
+                         "1. Manually adjust screws to center position",
+                         "2. Use small test moves to verify balance",
+                         "3. Reset position when centered", "READY"):
+                self._println(f"BALANCE:{line}")
+        elif command == '?':
+            self._println("STATUS:")
+            self._println(f"  ALT Position: {self.alt_position}")
+            self._println(f"  AZ Position: {self.az_position} (+ = East, - = West)")
+            self._println(f"  Speed: {self.speed} steps/sec")
+            self._println(f"  Acceleration: {self.acceleration} steps/sec^2")
+            self._println(f"  Microsteps: {MICROSTEPS}")
+            self._println(f"  Steps/Rev: {STEPS_PER_REV * MICROSTEPS}")
+            self._println("  AZ Mode: DIFFERENTIAL (synchronized opposing screws)")
+        else:
+            self._println(f"ERROR:UNKNOWN_COMMAND:{command}")
+    
+    def _print_help(self):
+        """printHelp() from the v2 firmware"""
+        rule = "==================================="
+        for line in (
+            rule,
+            "COMMANDS:",
+            "  H or h          - Show this help",
+            "  S or s          - Stop all motors",
+            "  E or e          - Enable motors",
+            "  D or d          - Disable motors",
+            "  A<steps>        - Move ALT motor (+/- steps)",
+            "  Z<steps>        - Move AZ (+ = East, - = West)",
+            "  M<alt>,<az>     - Move ALT and AZ together",
+            "  P or p          - Get current positions",
+            "  R or r          - Reset position counters to 0",
+            "  V<speed>        - Set speed (steps/sec)",
+            "  C<accel>        - Set acceleration (steps/sec^2, 0 = constant speed)",
+            "  T<steps>        - Report T:<alt>,<az> every n steps while moving (0 = off)",
+            "  B or b          - Balance AZ screws (guide)",
+            "  ?               - Print status",
+            "  <cmd>#<seq>     - Tagged command, echoes #<seq> when done",
+            rule,
+            "AZIMUTH DIFFERENTIAL CONTROL:",
+            "  Z100   - Move EAST (west tightens, east loosens)",
+            "  Z-100  - Move WEST (west loosens, east tightens)",
+            rule,
+            "EXAMPLES:",
+            "  A1600          - Move ALT 1600 steps forward",
+            "  A-800          - Move ALT 800 steps backward",
+            "  Z200           - Move AZ 200 steps EAST",
+            "  Z-200          - Move AZ 200 steps WEST",
+            "  M400,-100      - ALT 400 up and AZ 100 WEST at once",
+            "  V1000          - Set speed to 1000 steps/sec",
+            rule,
+        ):
+            self._println(line)
+    
+    # ------------------------------------------------------------------
+    # v3 protocol
+    # ------------------------------------------------------------------
+    
+    def _process_v3(self, command: str) -> bool:
+        """
+        processCommand() from the v3 firmware
+        
+        Returns:
+            True if the firmware should switch to binary frames
+        """
+        command = command.strip().upper()
+        if not command:
+            return False
+        
+        if command.startswith('CAL:'):
+            self._process_calibration(command)
+        elif command.startswith('A'):
+            self.move_altitude(to_int(command[1:]))
+            self._println("OK:ALT_MOVE")
+        elif command.startswith('Z'):
+            self.move_azimuth(to_int(command[1:]))
+            self._println("OK:AZ_MOVE")
+        elif command.startswith('M'):
+            comma = command.find(',')
+            if comma < 0:
+                self._println("ERROR:Invalid move")
+            else:
+                self.move_both(to_int(command[1:comma]), to_int(command[comma + 1:]))
+                self._println("OK:MOVE")
+        elif command == 'S':
+            self.motors_enabled = False
+            self._println("OK:STOPPED")
+        elif command == 'P':
+            self._println(f"POS:ALT={self.alt_position},AZ={self.az_position}")
+        elif command == 'R':
+            self.alt_position = 0
+            self.az_position = 0
+            self.last_alt_direction = 0
+            self.last_az_direction = 0
+            self._println("OK:RESET")
+        elif command.startswith('V'):
+            speed = to_int(command[1:])
+            if 0 < speed <= MAX_SPEED:
+                self.speed = speed
+                self._println(f"OK:SPEED={speed}")
+            else:
+                self._println("ERROR:Invalid speed")
+        elif command.startswith('C'):
+            accel = to_int(command[1:])
+            if 0 <= accel <= MAX_ACCELERATION:
+                self.cal['acceleration'] = accel
+                self._println(f"OK:ACCEL={accel}")
+            else:
+                self._println("ERROR:Invalid acceleration")
+        elif command == 'E':
+            self.motors_enabled = True
+            self._println("OK:ENABLED")
+        elif command == 'D':
+            self.motors_enabled = False
+            self._println("OK:DISABLED")
+        elif command.startswith('T'):
+            interval = to_int(command[1:])
+            if interval >= 0:
+                self.telemetry_interval = interval
+                self._println(f"OK:TELEMETRY={interval}")
+            else:
+                self._println("ERROR:Invalid telemetry interval")
+        elif command == '!BIN':
+            self._println("OK:BINARY")
+            return True
+        elif command == '?':
+            self._println("=== STATUS ===")
+            self._println("Firmware: v3.0 with Calibration")
+            self._println(f"Position: ALT={self.alt_position}, AZ={self.az_position}")
+            self._println(f"Speed: {self.speed}")
+            self._println(f"Acceleration: {self.cal['acceleration']}")
+            self._println(f"Calibrated: {'YES' if self.cal['is_calibrated'] else 'NO'}")
+            self._println("==============")
+        else:
+            self._println("ERROR:Unknown command")
+        return False
+    
+    def _process_calibration(self, cmd: str):
+        """processCalibrationCommand() from the v3 firmware"""
+        cal = self.cal
+        
+        if cmd.startswith('CAL:ALT:') or cmd.startswith('CAL:AZ:'):
+            axis = 'ALT' if cmd.startswith('CAL:ALT:') else 'AZ'
+            start = len(f'CAL:{axis}:')
+            colon = cmd.find(':', start)
+            if colon > 0:
+                arcsec = to_float(cmd[start:colon])
+                steps = to_int(cmd[colon + 1:])
+                if arcsec > 0 and steps > 0:
+                    key = f'{axis.lower()}_steps_per_arcsec'
+                    cal[key] = steps / arcsec
+                    cal['is_calibrated'] = True
+                    self._println(f"OK:{axis}_CAL_SET")
+                    self._println(f"INFO:{axis} calibration: {cal[key]:.2f} steps/arcsec")
+                else:
+                    self._println(f"ERROR:Invalid {axis} calibration values")
+        
+        elif cmd.startswith('CAL:ALTBL:') or cmd.startswith('CAL:AZBL:'):
+            axis = 'ALT' if cmd.startswith('CAL:ALTBL:') else 'AZ'
+            backlash = to_int(cmd[len(f'CAL:{axis}BL:'):])
+            if backlash >= 0:
+                cal[f'{axis.lower()}_backlash'] = backlash
+                self._println(f"OK:{axis}_BACKLASH_SET")
+                self._println(f"INFO:{axis} backlash: {backlash} steps")
+        
+        elif cmd == 'CAL:SAVE':
+            self._save_calibration()
+            self._println("OK:CAL_SAVED")
+            self._println("INFO:Calibration saved to EEPROM at address 0")
+        
+        elif cmd == 'CAL:LOAD':
+            if self._load_calibration():
+                self._show_calibration()
+            else:
+                self._println("ERROR:Failed to load calibration")
+        
+        elif cmd == 'CAL:SHOW':
+            self._show_calibration()
+        
+        elif cmd == 'CAL:RESET':
+            self.cal = default_calibration()
+            self._println("OK:CAL_RESET")
+            self._println("INFO:Calibration reset to defaults")
+            self._show_calibration()
+        
+        else:
+            self._println("ERROR:Unknown calibration command")
+    
+    def _show_calibration(self):
+        """showCalibration() from the v3 firmware"""
+        cal = self.cal
+        self._println("=== CALIBRATION DATA ===")
+        self._println(f"Calibrated: {'YES' if cal['is_calibrated'] else 'NO'}")
+        self._println()
+        self._println("Steps per arcsecond:")
+        self._println(f"  ALT: {cal['alt_steps_per_arcsec']:.2f} steps/arcsec")
+        self._println(f"  AZ:  {cal['az_steps_per_arcsec']:.2f} steps/arcsec")
+        self._println()
+        self._println("Backlash:")
+        self._println(f"  ALT: {cal['alt_backlash']} steps")
+        self._println(f"  AZ:  {cal['az_backlash']} steps")
+        self._println()
+        self._println(f"Max Speed: {cal['max_speed']} steps/sec")
+        self._println(f"Acceleration: {cal['acceleration']} steps/sec^2")
+        self._println("========================")
+    
+    def _save_calibration(self):
+        """EEPROM.put(): keep the data and write it to the backing file"""
+        self._eeprom = dict(self.cal, magic=CAL_MAGIC)
+        if self.eeprom_path:
+            with open(self.eeprom_path, 'w') as f:
+                json.dump(self._eeprom, f, indent=2)
+    
+    def _load_calibration(self, quiet: bool = False) -> bool:
+        """loadCalibration(): read the EEPROM and validate the magic number"""
+        data = self._eeprom
+        if self.eeprom_path and os.path.exists(self.eeprom_path):
+            try:
+                with open(self.eeprom_path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = None
+        
+        if not data or data.get('magic') not in (CAL_MAGIC, CAL_MAGIC_V1):
+            if not quiet:
+                self._println("WARN:No valid calibration in EEPROM (magic mismatch)")
+            return False
+        
+        # Old records have no acceleration and get the default
+        self.cal = {key: data.get(key, value) for key, value in default_calibration().items()}
+        self._eeprom = data
+        if not quiet:
+            self._println("OK:CAL_LOADED")
+            if data['magic'] == CAL_MAGIC_V1:
+                self._println("INFO:Old calibration format, CAL:SAVE to store acceleration")
+        return True
+    
+    # ------------------------------------------------------------------
+    # v3 binary frames
+    # ------------------------------------------------------------------
+    
+    def _process_frame(self) -> bool:
+        """
+        readFrameBytes() + processFrame() from the v3 firmware
+        
+        Returns:
+            True if a frame was processed
+        """
+        start = self._rx.find(bytes([FRAME_COMMAND_SYNC]))
+        if start < 0:
+            self._rx.clear()
+            return False
+        del self._rx[:start]
+        if len(self._rx) < COMMAND_FRAME.size:
+            return False
+        
+        raw = bytes(self._rx[:COMMAND_FRAME.size])
+        del self._rx[:COMMAND_FRAME.size]
+        _, seq, opcode, param, crc = COMMAND_FRAME.unpack(raw)
+        op = chr(opcode)
+        
+        if crc8(raw[1:-1]) != crc:
+            self._send_frame(seq, opcode, STATUS_BAD_CRC)
+        elif op == 'A':
+            self.move_altitude(param)
+            self._send_frame(seq, opcode, STATUS_OK, param, self.alt_position)
+        elif op == 'Z':
+            self.move_azimuth(param)
+            self._send_frame(seq, opcode, STATUS_OK, param, self.az_position)
+        elif op == 'M':
+            alt_steps, az_steps = unpack_move_param(param)
+            self.move_both(alt_steps, az_steps)
+            self._send_frame(seq, opcode, STATUS_OK, alt_steps, az_steps)
+        elif op in ('S', 'D', 'E'):
+            self.motors_enabled = op == 'E'
+            self._send_frame(seq, opcode, STATUS_OK)
+        elif op == 'P':
+            self._send_frame(seq, opcode, STATUS_OK, self.alt_position, self.az_position)
+        elif op == 'R':
+            self.alt_position = 0
+            self.az_position = 0
+            self.last_alt_direction = 0
+            self.last_az_direction = 0
+            self._send_frame(seq, opcode, STATUS_OK)
+        elif op == 'V':
+            if 0 < param <= MAX_SPEED:
+                self.speed = param
+                self._send_frame(seq, opcode, STATUS_OK, param)
+            else:
+                self._send_frame(seq, opcode, STATUS_ERROR, param)
+        elif op == '?':
+            self._send_frame(seq, opcode, STATUS_OK, self.speed,
+                             1 if self.cal['is_calibrated'] else 0)
+        elif op == 'C':
+            if 0 <= param <= MAX_ACCELERATION:
+                self.cal['acceleration'] = param
+                self._send_frame(seq, opcode, STATUS_OK, param)
+            else:
+                self._send_frame(seq, opcode, STATUS_ERROR, param)
+        elif op == 'T':
+            if param >= 0:
+                self.telemetry_interval = param
+                self._send_frame(seq, opcode, STATUS_OK, param)
+            else:
+                self._send_frame(seq, opcode, STATUS_ERROR, param)
+        elif op == 'X':
+            self._send_frame(seq, opcode, STATUS_OK)
+            self.binary_mode = False
+        else:
+            self._send_frame(seq, opcode, STATUS_UNKNOWN)
+        return True
+    
+    def _send_frame(self, seq: int, opcode: int, status: int, a: int = 0, b: int = 0):
+        """sendFrame()"""
+        body = REPLY_FRAME.pack(FRAME_REPLY_SYNC, seq, opcode, status, a, b, 0)
+        self._write(body[:-1] + bytes([crc8(body[1:-1])]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Simulated polar alignment controller on a pseudo-terminal',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python firmware_simulator.py
+    python firmware_simulator.py --firmware v2 --link /tmp/ttyPOLAR
+    python firmware_simulator.py --eeprom sim_eeprom.json --speedup 10
+
+Then point any tool at the printed port, e.g.:
+    python polar_align_control.py /dev/pts/5
+    python ../calibration/calibration_wizard.py /dev/pts/5
+"""
+    )
+    
+    parser.add_argument('--firmware', '-f',
+                      choices=['v2', 'v3'],
+                      default='v3',
+                      help='Firmware protocol to simulate (default: v3)')
+    
+    parser.add_argument('--eeprom', '-e',
+                      help='JSON file backing the simulated EEPROM (v3)')
+    
+    parser.add_argument('--speedup',
+                      type=float,
+                      default=1.0,
+                      help='Run faster than real time by this factor (default: 1)')
+    
+    parser.add_argument('--no-reset',
+                      action='store_true',
+                      help='Do not reboot when the port is opened (DTR reset disabled)')
+    
+    parser.add_argument('--link', '-l',
+                      help='Also create a symlink to the port at this path')
+    
+    args = parser.parse_args()
+    
+    sim = FirmwareSimulator(firmware=args.firmware, eeprom_path=args.eeprom,
+                            speedup=args.speedup, reset_on_open=not args.no_reset)
+    port = sim.start()
+    
+    if args.link:
+        if os.path.islink(args.link):
+            os.unlink(args.link)
+        os.symlink(port, args.link)
+    
+    print(f"Simulated {args.firmware} controller on {port}")
+    if args.link:
+        print(f"  (linked as {args.link})")
+    print("Press Ctrl+C to stop")
+    
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nProcessed {sim.commands_processed} commands")
+    finally:
+        sim.stop()
+        if args.link and os.path.islink(args.link):
+            os.unlink(args.link)
+
+
+if __name__ == "__main__":
+    main()
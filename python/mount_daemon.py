@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+"""
+Star Adventurer GTi - Mount Daemon
+
+Keeps one PolarAlignController session open and shares it between tools.
+
+Opening the serial port resets the Arduino, which takes about two seconds
+and zeroes its position counters, and only one program can hold the port
+at a time. The daemon opens the port once and serves any number of clients
+over a Unix socket, so the CLI can watch the mount while AutoPA drives it.
+
+Protocol:
+  Newline-delimited JSON-RPC 2.0. Each request is one line:
+    {"jsonrpc": "2.0", "id": 1, "method": "move_altitude", "params": [200]}
+  and is answered with one line:
+    {"jsonrpc": "2.0", "id": 1, "result": true,
+     "output": "Altitude moved 200 steps\\n", "state": {...}}
+  "output" carries what the controller printed while serving the request
+  and "state" the controller's position, speed and mode afterwards.
+
+Methods:
+  The PolarAlignController methods in MountDaemon.CONTROLLER_METHODS run
+  one at a time, in the order they arrive. "stop" skips the queue so it
+  can interrupt a move another client started. "submit" and "start_move"
+  return a handle id at once; "wait" blocks on a handle. Moves from
+  "start_move" go through a MoveQueue, so moves requested while one is
+  running are merged per axis. "state" returns the state snapshot alone.
+
+Usage:
+  python mount_daemon.py --port /dev/ttyUSB0
+  python mount_daemon.py --simulate v3
+  python polar_align_control.py --daemon
+
+Author: Polar Align Automation Project
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from typing import Optional, Tuple
+
+from move_queue import MoveQueue, QueuedMove
+from polar_align_control import DEFAULT_ACCELERATION, PolarAlignController
+
+
+# Socket the daemon listens on unless told otherwise (next to the port cache)
+DEFAULT_SOCKET = os.path.join(os.path.expanduser('~'), '.polar_align_mount.sock')
+
+# Longest single 'wait' call a client makes (seconds); the connection is
+# free for other calls such as stop between them
+WAIT_SLICE = 0.1
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class CallOutput:
+    """
+    sys.stdout replacement that captures what is printed while serving a call
+    
+    The controller reports progress with print(). Each client thread
+    captures its own output so it can be returned with the reply; every
+    other thread (the serial reader, the daemon itself) prints as usual.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def capture(self):
+        """Start capturing output printed by the calling thread"""
+        self._local.buffer = io.StringIO()
+    
+    def release(self) -> str:
+        """Stop capturing and return what the calling thread printed"""
+        buffer = getattr(self._local, 'buffer', None)
+        self._local.buffer = None
+        return buffer.getvalue() if buffer else ''
+    
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class MountDaemon:
+    """
+    Serves one controller session to clients on a Unix socket
+    """
+    
+    # Controller methods clients may call by name; they run one at a time
+    CONTROLLER_METHODS = (
+        'send_command', 'get_position', 'update_position', 'move_altitude',
+        'move_azimuth', 'move_both', 'enable_motors', 'reset_position', 'set_speed',
+        'set_acceleration', 'set_telemetry', 'get_calibration', 'get_status',
+        'estimate_move_duration', 'estimate_move_both_duration', 'enable_pipelining',
+    )
+    
+    # Controller attributes sent to clients with every reply
+    STATE_FIELDS = (
+        'port', 'connected', 'alt_position', 'az_position', 'current_speed',
+        'acceleration', 'reply_timeout', 'pipelining', 'binary', 'alt_backlash', 'az_backlash',
+        'telemetry_interval', 'live_position', 'combined_moves',
+    )
+    
+    def __init__(self, controller: PolarAlignController,
+                 socket_path: str = DEFAULT_SOCKET):
+        """
+        Initialize the daemon
+        
+        Args:
+            controller: Connected controller to share
+            socket_path: Unix socket to listen on
+        """
+        self.controller = controller
+        self.socket_path = socket_path
+        self.server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self.output: Optional[CallOutput] = None
+        self.clients = 0
+        
+        # Held while a controller method runs, so commands from different
+        # clients are not interleaved
+        self._command_lock = threading.Lock()
+        self._next_handle = 0
+        self._handle_lock = threading.Lock()
+        self.moves = MoveQueue(controller, lock=self._command_lock)
+    
+    def start(self) -> bool:
+        """
+        Bind the socket
+        
+        Returns:
+            True if the daemon is ready to serve
+        """
+        if os.path.exists(self.socket_path):
+            if daemon_running(self.socket_path):
+                print(f"ERROR: A mount daemon is already listening on {self.socket_path}")
+                return False
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(self.socket_path)
+        
+        daemon = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon.serve_client(self.rfile, self.wfile)
+        
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        except OSError as e:
+            print(f"ERROR: Could not listen on {self.socket_path} - {e}")
+            return False
+        self.server.daemon_threads = True
+        # The socket gives full control of the mount; keep it to this user
+        os.chmod(self.socket_path, 0o600)
+        
+        self.output = CallOutput(sys.stdout)
+        sys.stdout = self.output
+        return True
+    
+    def serve_forever(self):
+        """Serve clients until interrupted"""
+        print(f"Mount daemon listening on {self.socket_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+    
+    def close(self):
+        """Stop listening and remove the socket"""
+        self.moves.close()
+        if self.server:
+            self.server.server_close()
+            self.server = None
+        if self.output:
+            sys.stdout = self.output._stream
+            self.output = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+    
+    def serve_client(self, rfile, wfile):
+        """
+        Answer one client's requests until it disconnects
+        
+        Args:
+            rfile: Binary stream of request lines
+            wfile: Binary stream for the replies
+        """
+        self.clients += 1
+        print(f"Client connected ({self.clients} active)")
+        # Handles from submit/start_move belong to the connection
+        handles = {}
+        
+        try:
+            for raw in rfile:
+                if not raw.strip():
+                    continue
+                reply = self.handle_request(raw, handles)
+                wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+                wfile.flush()
+        except (OSError, ValueError):
+            # Client went away mid-reply
+            pass
+        finally:
+            self.clients -= 1
+            print(f"Client disconnected ({self.clients} active)")
+    
+    def handle_request(self, raw: bytes, handles: dict) -> dict:
+        """
+        Run one JSON-RPC request
+        
+        Args:
+            raw: Request line as received
+            handles: The connection's open handles
+        
+        Returns:
+            Reply object
+        """
+        try:
+            request = json.loads(raw.decode('utf-8'))
+        except ValueError as e:
+            return rpc_error(None, PARSE_ERROR, f"Parse error: {e}")
+        
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return rpc_error(None, INVALID_REQUEST, "Invalid request")
+        
+        request_id = request.get('id')
+        method = request['method']
+        params = request.get('params', [])
+        if not isinstance(params, list):
+            return rpc_error(request_id, INVALID_PARAMS, "params must be a list")
+        
+        call = self.lookup(method, handles)
+        if call is None:
+            return rpc_error(request_id, METHOD_NOT_FOUND, f"Unknown method: {method}")
+        
+        self.output.capture()
+        try:
+            result = call(*params)
+        except (TypeError, ValueError) as e:
+            self.output.release()
+            return rpc_error(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            self.output.release()
+            return rpc_error(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        
+        return {
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'result': result,
+            'output': self.output.release(),
+            'state': self.state(),
+        }
+    
+    def lookup(self, method: str, handles: dict):
+        """
+        Find the callable a request names
+        
+        Args:
+            method: Method name from the request
+            handles: The connection's open handles
+        
+        Returns:
+            Callable taking the request params, or None if unknown
+        """
+        if method in self.CONTROLLER_METHODS:
+            def locked(*params):
+                with self._command_lock:
+                    return getattr(self.controller, method)(*params)
+            return locked
+        
+        if method == 'stop':
+            # Not queued behind the lock: the firmware checks for a stop
+            # while it moves, so this can cut another client's move short;
+            # queued moves that have not been sent are dropped
+            return self.moves.stop
+        if method == 'state':
+            return self.state
+        if method in ('submit', 'start_move', 'wait'):
+            return lambda *params: getattr(self, method)(handles, *params)
+        return None
+    
+    def state(self) -> dict:
+        """Snapshot of the controller state clients mirror"""
+        return {name: getattr(self.controller, name) for name in self.STATE_FIELDS}
+    
+    def _add_handle(self, handles: dict, handle) -> int:
+        with self._handle_lock:
+            self._next_handle += 1
+            handles[self._next_handle] = handle
+            return self._next_handle
+    
+    def submit(self, handles: dict, command: str) -> Optional[int]:
+        """Write a command without waiting; returns a handle id for wait"""
+        with self._command_lock:
+            pending = self.controller.submit(command)
+        return self._add_handle(handles, pending) if pending else None
+    
+    def start_move(self, handles: dict, axis: str, steps: int) -> dict:
+        """
+        Queue a move without waiting for it to finish
+        
+        Returns:
+            {'handle', 'starts_in', 'duration'} with estimated times in
+            seconds from now (monotonic clocks are not shared between
+            processes)
+        """
+        move = self.moves.submit(axis, int(steps))
+        current = self.moves.current
+        return {
+            'handle': self._add_handle(handles, move),
+            'starts_in': max(0.0, current.expected_end - time.monotonic()) if current else 0.0,
+            'duration': self.controller.estimate_move_duration(axis, int(steps)),
+        }
+    
+    def wait(self, handles: dict, handle_id: int, timeout: Optional[float] = None):
+        """
+        Block on a handle from submit or start_move
+        
+        Returns:
+            Reply text for a submitted command, {'succeeded', 'cancelled'}
+            for a move, or None if it has not finished within the timeout;
+            the handle is released once it has finished
+        """
+        handle = handles.get(handle_id)
+        if handle is None:
+            raise ValueError(f"Unknown handle: {handle_id}")
+        result = handle.wait(timeout)
+        if not handle.done():
+            return None
+        del handles[handle_id]
+        if isinstance(handle, QueuedMove):
+            return {'succeeded': bool(result), 'cancelled': handle.cancelled}
+        return result
+
+
+def rpc_error(request_id, code: int, message: str) -> dict:
+    """Build a JSON-RPC error reply"""
+    return {'jsonrpc': '2.0', 'id': request_id,
+            'error': {'code': code, 'message': message}}
+
+
+def daemon_running(socket_path: str = DEFAULT_SOCKET) -> bool:
+    """Check whether a daemon is accepting connections on a socket"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+class RemoteCommand:
+    """
+    A command the daemon has written, waiting for its reply
+    
+    Stands in for PendingCommand in daemon clients.
+    """
+    
+    def __init__(self, client: 'MountClient', handle_id: int):
+        self.client = client
+        self.handle_id = handle_id
+        self.response: Optional[str] = None
+        self._done = False
+    
+    def done(self) -> bool:
+        """Check whether the reply has been collected"""
+        return self._done
+    
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Block until the reply arrives
+        
+        Args:
+            timeout: Seconds to wait (None waits forever)
+        
+        Returns:
+            Reply text or None on timeout
+        """
+        if not self._done:
+            self.response = self.client.wait(self.handle_id, timeout)
+            self._done = self.response is not None
+        return self.response
+
+
+class RemoteMoveHandle:
+    """
+    Completion handle for a move started through the daemon
+    
+    Stands in for MoveHandle in daemon clients.
+    """
+    
+    def __init__(self, client: 'MountClient', handle_id: int, axis: str, steps: int,
+                 start: float, duration: float):
+        self.client = client
+        self.handle_id = handle_id
+        self.axis = axis
+        self.steps = steps
+        self.start = start
+        self.duration = duration
+        self.succeeded: Optional[bool] = None
+        self.cancelled = False
+    
+    @property
+    def expected_end(self) -> float:
+        """Predicted time.monotonic() at which the motion ends"""
+        return self.start + self.duration
+    
+    def done(self) -> bool:
+        """Check whether the outcome has been collected"""
+        return self.succeeded is not None
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the move finishes
+        
+        Args:
+            timeout: Maximum seconds to wait (defaults to the move's deadline)
+        
+        Returns:
+            True if the firmware acknowledged the move and it was not cut
+            short by a stop
+        """
+        if self.succeeded is None:
+            result = self.client.wait(self.handle_id, timeout)
+            if result is not None:
+                self.succeeded = bool(result['succeeded'])
+                self.cancelled = bool(result['cancelled'])
+        return bool(self.succeeded)
+
+
+class MountClient:
+    """
+    Thin client for a running mount daemon
+    
+    Offers the PolarAlignController methods the tools use, so it can be
+    passed wherever a controller is expected. Output the controller prints
+    in the daemon is printed here, and the controller's position, speed
+    and mode are mirrored as attributes after every call.
+    """
+    
+    def __init__(self, socket_path: str = DEFAULT_SOCKET):
+        """
+        Initialize the client
+        
+        Args:
+            socket_path: Unix socket the daemon listens on
+        """
+        self.socket_path = socket_path
+        self.sock: Optional[socket.socket] = None
+        self.connected = False
+        self._file = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        # Whether the last call was answered with an error
+        self.failed = False
+        
+        # Mirrored controller state (see MountDaemon.STATE_FIELDS)
+        self.port = None
+        self.alt_position = 0
+        self.az_position = 0
+        self.current_speed = 800
+        self.acceleration = DEFAULT_ACCELERATION
+        self.reply_timeout = 1.0
+        self.pipelining = False
+        self.binary = False
+        self.alt_backlash = 0
+        self.az_backlash = 0
+        self.telemetry_interval = 0
+        self.live_position = None
+        self.combined_moves = True
+        
+        # Movement presets (in steps), as in PolarAlignController
+        self.FINE_STEP = 10
+        self.SMALL_STEP = 50
+        self.MEDIUM_STEP = 200
+        self.LARGE_STEP = 800
+    
+    def connect(self, port: Optional[str] = None) -> bool:
+        """
+        Connect to the daemon
+        
+        Args:
+            port: Ignored (the daemon owns the serial port); accepted so
+                  callers can treat the client as a controller
+        
+        Returns:
+            True if connected
+        """
+        try:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.socket_path)
+        except OSError as e:
+            print(f"ERROR: No mount daemon on {self.socket_path} - {e}")
+            print("Start one with: python mount_daemon.py")
+            self.sock = None
+            return False
+        
+        self._file = self.sock.makefile('rwb')
+        self.connected = True
+        if self.call('state') is None:
+            self.disconnect()
+            return False
+        print(f"Connected to mount daemon ({self.port})")
+        return True
+    
+    def disconnect(self):
+        """Disconnect from the daemon (the serial session stays open)"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        if self.connected:
+            self.connected = False
+            print("Disconnected from mount daemon")
+    
+    def call(self, method: str, *params):
+        """
+        Call a daemon method
+        
+        Args:
+            method: Method name
+            *params: Positional parameters
+        
+        Returns:
+            The method's result, or None on error
+        """
+        if not self.connected:
+            print("ERROR: Not connected")
+            return None
+        
+        with self._lock:
+            self._next_id += 1
+            request = {'jsonrpc': '2.0', 'id': self._next_id,
+                       'method': method, 'params': list(params)}
+            try:
+                self._file.write(json.dumps(request).encode('utf-8') + b'\n')
+                self._file.flush()
+                raw = self._file.readline()
+            except OSError as e:
+                raw = b''
+                print(f"ERROR: Mount daemon connection failed - {e}")
+        
+        if not raw:
+            print("ERROR: Mount daemon closed the connection")
+            self.connected = False
+            return None
+        
+        reply = json.loads(raw.decode('utf-8'))
+        if reply.get('output'):
+            print(reply['output'], end='')
+        if 'error' in reply:
+            print(f"ERROR: {reply['error']['message']}")
+            self.failed = True
+            return None
+        self.failed = False
+        for name, value in reply.get('state', {}).items():
+            setattr(self, name, value)
+        if method == 'state':
+            for name, value in reply['result'].items():
+                setattr(self, name, value)
+        return reply['result']
+    
+    def wait(self, handle_id: int, timeout: Optional[float] = None):
+        """
+        Block on a daemon handle in short 'wait' calls
+        
+        The connection carries one call at a time, so a single long wait
+        would hold up stop() from another thread until the move finished.
+        
+        Args:
+            handle_id: Handle from submit or start_move
+            timeout: Seconds to wait (None waits until it finishes)
+        
+        Returns:
+            The daemon's wait result, or None on timeout or error
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            limit = WAIT_SLICE if end is None else max(0.0, min(WAIT_SLICE, end - time.monotonic()))
+            result = self.call('wait', handle_id, limit)
+            if result is not None or self.failed or not self.connected:
+                return result
+            if end is not None and time.monotonic() >= end:
+                return None
+    
+    def send_command(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Send a command and wait for its reply"""
+        return self.call('send_command', command, timeout)
+    
+    def submit(self, command: str) -> Optional[RemoteCommand]:
+        """Write a command without waiting for its reply"""
+        handle_id = self.call('submit', command)
+        return RemoteCommand(self, handle_id) if handle_id is not None else None
+    
+    def _start_move(self, axis: str, steps: int) -> Optional[RemoteMoveHandle]:
+        started = self.call('start_move', axis, steps)
+        if started is None:
+            return None
+        return RemoteMoveHandle(self, started['handle'], axis, steps,
+                                time.monotonic() + started['starts_in'],
+                                started['duration'])
+    
+    def start_move_altitude(self, steps: int) -> Optional[RemoteMoveHandle]:
+        """Start an altitude move without waiting for it to finish"""
+        return self._start_move('ALT', steps)
+    
+    def start_move_azimuth(self, steps: int) -> Optional[RemoteMoveHandle]:
+        """Start a differential azimuth move without waiting for it to finish"""
+        return self._start_move('AZ', steps)
+    
+    def move_altitude(self, steps: int) -> bool:
+        """Move altitude motor and wait for the move to finish"""
+        return bool(self.call('move_altitude', steps))
+    
+    def move_azimuth(self, steps: int) -> bool:
+        """Move azimuth in differential mode and wait for the move to finish"""
+        return bool(self.call('move_azimuth', steps))
+    
+    def move_both(self, alt_steps: int, az_steps: int) -> bool:
+        """Move altitude and azimuth together and wait for both to finish"""
+        return bool(self.call('move_both', alt_steps, az_steps))
+    
+    def estimate_move_duration(self, axis: str, steps: int) -> float:
+        """Predict how long a move will take at the current speed"""
+        return self.call('estimate_move_duration', axis, steps) or 0.0
+    
+    def estimate_move_both_duration(self, alt_steps: int, az_steps: int) -> float:
+        """Predict how long a combined ALT + AZ move will take"""
+        return self.call('estimate_move_both_duration', alt_steps, az_steps) or 0.0
+    
+    def stop(self) -> bool:
+        """Stop all motor movement, including moves other clients started"""
+        return bool(self.call('stop'))
+    
+    def enable_motors(self, enable: bool = True) -> bool:
+        """Enable or disable motors"""
+        return bool(self.call('enable_motors', enable))
+    
+    def get_position(self) -> Tuple[int, int]:
+        """Get current motor positions"""
+        position = self.call('get_position')
+        return tuple(position) if position else (0, 0)
+    
+    def update_position(self, force: bool = False):
+        """Update the position tracking in the daemon"""
+        self.call('update_position', force)
+    
+    def reset_position(self) -> bool:
+        """Reset position counters to zero"""
+        return bool(self.call('reset_position'))
+    
+    def set_speed(self, speed: int) -> bool:
+        """Set motor speed"""
+        return bool(self.call('set_speed', speed))
+    
+    def set_acceleration(self, acceleration: int) -> bool:
+        """Set how fast moves ramp up to (and down from) the set speed"""
+        return bool(self.call('set_acceleration', acceleration))
+    
+    def set_telemetry(self, interval: int) -> bool:
+        """Have the firmware report positions while it moves (see live_position)"""
+        return bool(self.call('set_telemetry', interval))
+    
+    def enable_pipelining(self) -> bool:
+        """Switch the shared session to tagged, pipelined commands"""
+        return bool(self.call('enable_pipelining'))
+    
+    def get_calibration(self) -> Optional[dict]:
+        """Read the calibration stored in the firmware (v3 only)"""
+        return self.call('get_calibration')
+    
+    def get_status(self) -> dict:
+        """Get controller status"""
+        return self.call('get_status') or {'connected': False}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Share one polar alignment controller session between tools',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python mount_daemon.py --port /dev/ttyUSB0
+    python mount_daemon.py --simulate v3
+    python mount_daemon.py --socket /tmp/mount.sock
+
+Clients:
+    python polar_align_control.py --daemon [socket]
+    python calibration_wizard.py --daemon [socket]
+    python plate_solving_autopa.py --software nina --daemon [socket]
+"""
+    )
+    
+    parser.add_argument('--port', '-p',
+                      help='Serial port (auto-detect if neither --port nor --simulate)')
+    
+    parser.add_argument('--simulate',
+                      choices=['v2', 'v3'],
+                      help='Serve firmware_simulator.py instead of hardware')
+    
+    parser.add_argument('--socket', '-s',
+                      default=DEFAULT_SOCKET,
+                      help=f'Unix socket to listen on (default: {DEFAULT_SOCKET})')
+    
+    args = parser.parse_args()
+    
+    if not hasattr(socket, 'AF_UNIX'):
+        print("ERROR: The mount daemon needs Unix domain sockets")
+        sys.exit(1)
+    
+    sim = None
+    port = args.port
+    if args.simulate:
+        from firmware_simulator import FirmwareSimulator
+        sim = FirmwareSimulator(firmware=args.simulate)
+        port = sim.start()
+    
+    controller = PolarAlignController()
+    if not controller.connect(port):
+        print("ERROR: Could not connect to controller")
+        if sim:
+            sim.stop()
+        sys.exit(1)
+    
+    # Backlash from the firmware calibration times the moves (v3 only)
+    controller.get_calibration()
+    
+    daemon = MountDaemon(controller, args.socket)
+    try:
+        if not daemon.start():
+            sys.exit(1)
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        controller.disconnect()
+        if sim:
+            sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Star Adventurer GTi - Coalescing Move Queue
+
+Sits in front of a PolarAlignController and holds moves back while the
+firmware is busy, so moves requested in quick succession can be merged
+before they are sent.
+
+Each firmware move blocks until it has finished and is acknowledged, so
+a script or UI that calls move_azimuth(50) five times pays for five
+moves, five acks and any back-and-forth between them. The queue keeps
+one move in flight. Moves requested meanwhile wait on the host, where
+consecutive moves of the same axis are merged into one net move; moves
+that cancel out are never sent at all.
+
+stop() never waits behind queued motion: it drops every move that has
+not been sent yet and goes straight to the controller, so the firmware
+sees the stop while the current move is still running.
+
+Jog mode in polar_align_control.py and the mount daemon's start_move
+both send their moves through a MoveQueue.
+
+Example:
+    queue = MoveQueue(controller)
+    for _ in range(5):
+        queue.submit('AZ', 50)      # sent as one AZ move (after the first)
+    queue.submit('AZ', -100)        # merged into it
+    queue.wait_idle()
+    queue.close()
+
+Author: Polar Align Automation Project
+"""
+
+import threading
+from typing import List, Optional
+
+
+class QueuedMove:
+    """
+    A move requested through the queue
+
+    Resolves once the firmware move it was merged into has finished, or
+    when it is cancelled by stop().
+    """
+
+    def __init__(self, axis: str, steps: int):
+        """
+        Initialize the queued move
+
+        Args:
+            axis: 'ALT' or 'AZ'
+            steps: Requested steps
+        """
+        self.axis = axis
+        self.steps = steps
+        self.succeeded: Optional[bool] = None
+        self.cancelled = False
+        self._done = threading.Event()
+
+    def done(self) -> bool:
+        """Check whether the move has finished or been cancelled"""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the move has finished
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            True if the firmware acknowledged the move it was merged into
+            and did not cut it short (or the merged moves cancelled out)
+        """
+        self._done.wait(timeout)
+        return bool(self.succeeded)
+
+    def _resolve(self, succeeded: bool, cancelled: bool = False):
+        self.succeeded = succeeded
+        self.cancelled = cancelled
+        self._done.set()
+
+
+class MoveQueue:
+    """
+    Merges queued same-axis moves and lets stop() jump the queue
+    """
+
+    def __init__(self, controller, lock: Optional[threading.Lock] = None):
+        """
+        Initialize the queue and start its dispatcher thread
+
+        Args:
+            controller: Connected PolarAlignController (or mount daemon client)
+            lock: Held while each move is started, for callers that share
+                the controller with other threads (e.g. the mount daemon)
+        """
+        self.controller = controller
+        self.current = None  # Handle of the move in flight
+        self._send_lock = lock if lock is not None else threading.Lock()
+        self._queue: List[QueuedMove] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._busy = False
+        self._closed = False
+        self._stops = 0
+
+        # Statistics
+        self.moves_requested = 0
+        self.moves_sent = 0
+        self.moves_cancelled = 0
+
+        self._thread = threading.Thread(target=self._dispatch_loop,
+                                        name="polar-align-move-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, axis: str, steps: int) -> QueuedMove:
+        """
+        Queue a move without waiting for it
+
+        Args:
+            axis: 'ALT' or 'AZ'
+            steps: Steps to move (ALT: + = up, AZ: + = EAST)
+
+        Returns:
+            QueuedMove to wait on
+        """
+        if axis not in ('ALT', 'AZ'):
+            raise ValueError(f"axis must be 'ALT' or 'AZ', not {axis!r}")
+
+        move = QueuedMove(axis, steps)
+        with self._lock:
+            if self._closed:
+                move._resolve(False, cancelled=True)
+                return move
+            self.moves_requested += 1
+            self._queue.append(move)
+            self._wake.notify()
+        return move
+
+    def move_altitude(self, steps: int) -> bool:
+        """Queue an altitude move and wait for it to finish"""
+        return self.submit('ALT', steps).wait()
+
+    def move_azimuth(self, steps: int) -> bool:
+        """Queue a differential azimuth move and wait for it to finish"""
+        return self.submit('AZ', steps).wait()
+
+    def pending_steps(self) -> dict:
+        """
+        Net steps per axis queued but not yet sent
+
+        Returns:
+            {'ALT': steps, 'AZ': steps}
+        """
+        with self._lock:
+            net = {'ALT': 0, 'AZ': 0}
+            for move in self._queue:
+                net[move.axis] += move.steps
+            return net
+
+    def stop(self) -> bool:
+        """
+        Drop every queued move and stop the motors at once
+
+        The move already running is cut short by the firmware's stop
+        check, and the requests merged into it are resolved as cancelled
+        if it was; moves still queued are resolved as cancelled.
+
+        Returns:
+            True if the controller acknowledged the stop
+        """
+        with self._lock:
+            self._stops += 1
+        self._cancel_queued()
+        return self.controller.stop()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued move has been sent and has finished
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            True if the queue is idle
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self):
+        """Cancel queued moves and stop the dispatcher thread"""
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+        self._cancel_queued()
+        self._thread.join(timeout=2)
+
+    def _cancel_queued(self):
+        """Resolve every move that has not been sent as cancelled"""
+        with self._lock:
+            dropped, self._queue = self._queue, []
+            self.moves_cancelled += len(dropped)
+            self._idle.notify_all()
+        for move in dropped:
+            move._resolve(False, cancelled=True)
+
+    def _take_batch(self) -> List[QueuedMove]:
+        """
+        Take the leading run of same-axis moves off the queue (lock held)
+
+        Moves of the other axis stay queued in order behind it.
+        """
+        axis = self._queue[0].axis
+        count = 1
+        while count < len(self._queue) and self._queue[count].axis == axis:
+            count += 1
+        batch, self._queue = self._queue[:count], self._queue[count:]
+        return batch
+
+    def _dispatch_loop(self):
+        """Send merged moves one at a time, waiting for each to finish"""
+        while True:
+            with self._lock:
+                self._wake.wait_for(lambda: self._queue or self._closed)
+                if self._closed:
+                    return
+                batch = self._take_batch()
+                self._busy = True
+                stops = self._stops
+
+            axis = batch[0].axis
+            net = sum(move.steps for move in batch)
+            handle = None
+            cancelled = False
+            if net != 0:
+                # The caller's lock is taken first: stop() only needs
+                # self._lock, so it never waits behind another client's
+                # command. Checking for a stop and starting the move under
+                # self._lock means a stop either drops the batch or comes
+                # after the start and cuts the move short.
+                with self._send_lock, self._lock:
+                    if self._stops != stops:
+                        self.moves_cancelled += len(batch)
+                        cancelled = True
+                    elif axis == 'ALT':
+                        handle = self.controller.start_move_altitude(net)
+                    else:
+                        handle = self.controller.start_move_azimuth(net)
+                    if handle is not None:
+                        self.moves_sent += 1
+                        self.current = handle
+            if handle is not None:
+                succeeded = handle.wait()
+                # A stop that arrives once the batch is sent cuts the merged
+                # move short; every request in it shares that outcome
+                cancelled = handle.cancelled
+                self.current = None
+            else:
+                succeeded = net == 0 and not cancelled
+
+            for move in batch:
+                move._resolve(succeeded, cancelled)
+
+            with self._lock:
+                self._busy = False
+                self._idle.notify_all()
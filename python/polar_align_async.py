@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+"""
+Star Adventurer GTi - asyncio Polar Alignment Control
+
+AsyncPolarAlignController offers the same commands as PolarAlignController
+(move_altitude, move_azimuth, get_position, stop, set_speed, get_status,
+...) as coroutines. Replies are awaited instead of slept for, so one event
+loop can drive several mounts alongside cameras, domes and other devices
+without a thread per device.
+
+Replies are matched to commands by the same ReplyRouter the threaded
+controller uses, including sequence-tagged pipelining.
+
+Example:
+    async def main():
+        mount = AsyncPolarAlignController('/dev/ttyUSB0')
+        if await mount.connect():
+            await mount.move_altitude(200)
+            print(await mount.get_position())
+            await mount.disconnect()
+    
+    asyncio.run(main())
+
+Requirements:
+- Python 3.7+
+- pyserial
+- pyserial-asyncio
+
+Author: Polar Align Automation Project
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Tuple
+
+import serial.tools.list_ports
+
+try:
+    import serial_asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    serial_asyncio = None
+
+from polar_align_control import (DEFAULT_ACCELERATION, MoveHandle, PendingCommand, ReplyRouter,
+                                 is_likely_controller, move_duration)
+from polar_align_protocol import parse_ack, parse_position, parse_status, parse_telemetry
+
+
+class AsyncPendingCommand(PendingCommand):
+    """
+    A pending command whose reply can be awaited on the event loop
+    """
+    
+    def __init__(self, command: str, tag: Optional[int] = None):
+        super().__init__(command, tag)
+        self._future = asyncio.get_running_loop().create_future()
+    
+    def _resolve(self, response: Optional[str]):
+        """Store the reply and complete the future"""
+        super()._resolve(response)
+        if not self._future.done():
+            self._future.set_result(response)
+    
+    async def wait_async(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Await the reply
+        
+        Args:
+            timeout: Seconds to wait (None waits forever)
+        
+        Returns:
+            Reply text (multi-line replies joined by newlines) or None on timeout
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            # Stay queued so a late reply is not mistaken for a later one
+            self.abandoned = True
+            return None
+
+
+class AsyncMoveHandle(MoveHandle):
+    """
+    Completion handle for a move, awaitable on the event loop
+    """
+    
+    async def wait_async(self, timeout: Optional[float] = None) -> bool:
+        """
+        Await the end of the move
+        
+        Args:
+            timeout: Maximum seconds to wait (defaults to the move's deadline).
+                     Returning early leaves the move in flight.
+        
+        Returns:
+            True if the firmware acknowledged the move and it was not cut
+            short by a stop
+        """
+        if self.done():
+            return self.succeeded
+        
+        limit = self.remaining() if timeout is None else min(timeout, self.remaining())
+        try:
+            response = await asyncio.wait_for(asyncio.shield(self.pending._future), limit)
+            self._finish(response)
+        except asyncio.TimeoutError:
+            if time.monotonic() >= self.deadline:
+                self.pending.abandoned = True
+                self._finish(None)
+        return bool(self.succeeded)
+
+
+class AsyncPolarAlignController:
+    """
+    asyncio controller for Star Adventurer GTi polar alignment automation
+    """
+    
+    def __init__(self, port: Optional[str] = None, baudrate: int = 115200):
+        """
+        Initialize the controller
+        
+        Args:
+            port: Serial port name (e.g., 'COM3' or '/dev/ttyUSB0')
+            baudrate: Serial communication speed
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.connected = False
+        self.alt_position = 0
+        self.az_position = 0
+        self.current_speed = 800
+        
+        # Acceleration the firmware ramps moves with (steps/sec^2)
+        self.acceleration = DEFAULT_ACCELERATION
+        
+        # Seconds to wait for a reply before giving up
+        self.reply_timeout = 1.0
+        
+        # Positions are dead-reckoned from acknowledged moves and checked
+        # against the firmware counters at most this often (seconds)
+        self.position_sync_interval = 5.0
+        self._last_position_sync = 0.0
+        self._position_stale = True
+        
+        # Backlash (steps) taken up when an axis reverses, the last commanded
+        # direction per axis (None = unknown) and the predicted end of the
+        # queued moves, used to time move completion
+        self.alt_backlash = 0
+        self.az_backlash = 0
+        self._last_direction = {'ALT': None, 'AZ': None}
+        self._motion_end = 0.0
+        # Moves sent and possibly still running, marked when a stop is sent
+        self._moves: List[AsyncMoveHandle] = []
+        
+        # Position telemetry pushed by the firmware while moving
+        self.telemetry_interval = 0
+        self.live_position: Optional[Tuple[int, int]] = None
+        self._telemetry_callbacks = []
+        self._telemetry_queues: List[asyncio.Queue] = []
+        
+        self.router = ReplyRouter()
+        self.pipelining = False
+        self._next_tag = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        
+        # Movement presets (in steps)
+        self.FINE_STEP = 10      # Very fine adjustment
+        self.SMALL_STEP = 50     # Small adjustment
+        self.MEDIUM_STEP = 200   # Medium adjustment
+        self.LARGE_STEP = 800    # Large adjustment
+    
+    def list_ports(self) -> list:
+        """
+        List all available serial ports
+        
+        Returns:
+            List of available port names
+        """
+        ports = serial.tools.list_ports.comports()
+        return [port.device for port in ports]
+    
+    def find_candidate_ports(self) -> list:
+        """
+        List serial ports that look like an Arduino
+        
+        Returns:
+            Port names that pass the USB VID/description filter
+        """
+        ports = serial.tools.list_ports.comports()
+        return [port.device for port in ports if is_likely_controller(port)]
+    
+    async def connect(self, port: Optional[str] = None) -> bool:
+        """
+        Connect to the Arduino controller
+        
+        Args:
+            port: Serial port to connect to (tries every likely port if None)
+        
+        Returns:
+            True if connection successful, False otherwise
+        """
+        if serial_asyncio is None:
+            print("ERROR: AsyncPolarAlignController requires pyserial-asyncio")
+            print("Install it with: pip install pyserial-asyncio")
+            return False
+        
+        if port:
+            self.port = port
+        
+        # Unrelated ports are never opened, as in the threaded controller
+        candidates = [self.port] if self.port else self.find_candidate_ports()
+        if not candidates:
+            print("ERROR: No Arduino-like serial ports found")
+            return False
+        
+        for p in candidates:
+            if await self._open(p):
+                return True
+        
+        print("ERROR: Could not connect to controller")
+        return False
+    
+    async def _open(self, port: str) -> bool:
+        """Open one port and wait for the firmware's READY banner"""
+        try:
+            print(f"Trying port {port}...")
+            reader, writer = await serial_asyncio.open_serial_connection(
+                url=port, baudrate=self.baudrate)
+        except Exception as e:
+            print(f"ERROR: Connection failed - {e}")
+            return False
+        
+        # Opening the port alone does not reset the Arduino once a threaded
+        # tool has left DTR asserted (see remember_port), so pulse DTR and
+        # wait for the banner
+        await self._reset(writer.transport.serial)
+        try:
+            while True:
+                raw = await asyncio.wait_for(reader.readline(), timeout=3.0)
+                if b'READY' in raw.upper():
+                    break
+        except (asyncio.TimeoutError, OSError):
+            writer.close()
+            return False
+        
+        # Print the rest of the startup messages
+        while True:
+            try:
+                raw = await asyncio.wait_for(reader.readline(), timeout=0.5)
+            except asyncio.TimeoutError:
+                break
+            print(raw.decode('utf-8', errors='replace').strip())
+        
+        self.port = port
+        self._reader, self._writer = reader, writer
+        self.connected = True
+        self._last_direction = {'ALT': None, 'AZ': None}
+        self._motion_end = 0.0
+        self._read_task = asyncio.ensure_future(self._read_loop())
+        print(f"Connected to {port}")
+        return True
+    
+    @staticmethod
+    async def _reset(ser: serial.Serial):
+        """Pulse DTR to reset the Arduino without blocking the event loop"""
+        try:
+            ser.dtr = False
+            await asyncio.sleep(0.05)
+            ser.dtr = True
+        except (serial.SerialException, OSError):
+            # Ports without modem lines (e.g. pseudo-terminals)
+            pass
+    
+    async def disconnect(self):
+        """Disconnect from the controller"""
+        if self._read_task:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+            self._read_task = None
+        
+        self.router.cancel_all()
+        
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+            self.connected = False
+            print("Disconnected")
+    
+    async def _read_loop(self):
+        """Read lines from the port and hand them to the reply router"""
+        try:
+            while True:
+                raw = await self._reader.readline()
+                if not raw:
+                    break
+                line = raw.decode('utf-8', errors='replace').strip()
+                position = parse_telemetry(line)
+                if position:
+                    self._telemetry(*position)
+                elif line:
+                    self.router.feed(line)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            print(f"ERROR: Serial read failed - {e}")
+        finally:
+            self.connected = False
+            self.router.cancel_all()
+            # End any telemetry iterators
+            for queue in self._telemetry_queues:
+                queue.put_nowait(None)
+    
+    def _telemetry(self, alt: int, az: int):
+        """Record a telemetry report and hand it to subscribers"""
+        self.live_position = (alt, az)
+        for queue in self._telemetry_queues:
+            queue.put_nowait((alt, az))
+        for callback in list(self._telemetry_callbacks):
+            try:
+                callback(alt, az)
+            except Exception as e:
+                print(f"ERROR: Telemetry callback failed - {e}")
+    
+    def submit(self, command: str, tagged: Optional[bool] = None) -> Optional[AsyncPendingCommand]:
+        """
+        Write a command without waiting for its reply
+        
+        Args:
+            command: Command string to send
+            tagged: Append a sequence tag (defaults to whether pipelining is on)
+        
+        Returns:
+            AsyncPendingCommand to await, or None if not connected
+        """
+        if not self.connected or not self._writer:
+            print("ERROR: Not connected")
+            return None
+        
+        if tagged is None:
+            tagged = self.pipelining
+        
+        tag = None
+        if tagged:
+            tag = self._next_tag
+            self._next_tag = (self._next_tag + 1) % 10000
+        
+        # Registering and writing happen without yielding to the loop, so
+        # the pending order always matches the order the firmware sees
+        pending = AsyncPendingCommand(command, tag)
+        self.router.register(pending)
+        self._writer.write(f"{pending.wire_command}\n".encode('utf-8'))
+        return pending
+    
+    async def send_command(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Send a command to the controller and await its reply
+        
+        Args:
+            command: Command string to send
+            timeout: Seconds to wait for the reply (defaults to reply_timeout)
+        
+        Returns:
+            Response from controller or None if error
+        """
+        pending = self.submit(command)
+        if pending is None:
+            return None
+        
+        try:
+            await self._writer.drain()
+        except Exception as e:
+            self.router.discard(pending)
+            print(f"ERROR: Command failed - {e}")
+            return None
+        
+        return await pending.wait_async(self.reply_timeout if timeout is None else timeout)
+    
+    async def enable_pipelining(self, timeout: float = 0.3) -> bool:
+        """
+        Switch to tagged, pipelined commands if the firmware supports them
+        
+        Returns:
+            True if pipelining is enabled
+        """
+        pending = self.submit("P", tagged=True)
+        if pending is None:
+            return False
+        
+        if await pending.wait_async(timeout) is None:
+            self.router.discard(pending)
+            self.pipelining = False
+            print("Firmware does not echo command tags - pipelining disabled")
+            return False
+        
+        self.pipelining = True
+        return True
+    
+    async def send_pipelined(self, commands: List[str],
+                             timeout: Optional[float] = None) -> List[Optional[str]]:
+        """
+        Send several commands back-to-back and await all of their replies
+        
+        Args:
+            commands: Command strings to send, in order
+            timeout: Seconds to wait for all replies (defaults to reply_timeout)
+        
+        Returns:
+            Replies in command order (None for any that failed or timed out)
+        """
+        if timeout is None:
+            timeout = self.reply_timeout
+        
+        if not self.pipelining:
+            return [await self.send_command(c, timeout) for c in commands]
+        
+        pending = [self.submit(c) for c in commands]
+        await self._writer.drain()
+        
+        async def reply(p):
+            return await p.wait_async(timeout) if p else None
+        
+        return list(await asyncio.gather(*(reply(p) for p in pending)))
+    
+    def estimate_move_duration(self, axis: str, steps: int) -> float:
+        """
+        Predict how long a move will take at the current speed
+        
+        Args:
+            axis: 'ALT' or 'AZ'
+            steps: Steps to move
+        
+        Returns:
+            Duration in seconds, including backlash on a reversal
+        """
+        if steps == 0:
+            return 0.0
+        direction = 1 if steps > 0 else -1
+        backlash = self.alt_backlash if axis == 'ALT' else self.az_backlash
+        if self._last_direction[axis] == direction:
+            backlash = 0
+        return move_duration(steps, self.current_speed, backlash, self.acceleration)
+    
+    async def _start_move(self, axis: str, steps: int) -> Optional[AsyncMoveHandle]:
+        """Write a move command and return its completion handle"""
+        duration = self.estimate_move_duration(axis, steps)
+        letter = 'A' if axis == 'ALT' else 'Z'
+        
+        pending = self.submit(f"{letter}{steps}")
+        if pending is None:
+            return None
+        
+        start = max(time.monotonic(), self._motion_end)
+        self._motion_end = start + duration
+        if steps != 0:
+            self._last_direction[axis] = 1 if steps > 0 else -1
+        handle = AsyncMoveHandle(axis, steps, pending, start, duration,
+                                 self.reply_timeout, on_finish=self._move_finished)
+        self._moves = [h for h in self._moves if not h.done()] + [handle]
+        
+        try:
+            await self._writer.drain()
+        except Exception as e:
+            self.router.discard(pending)
+            print(f"ERROR: Command failed - {e}")
+            return None
+        return handle
+    
+    def _move_finished(self, handle: MoveHandle):
+        """Dead-reckon the position from a finished move"""
+        if not handle.succeeded:
+            # No acknowledgement, or cut short by a stop: the firmware
+            # counters are read back instead of adding the commanded steps
+            self._position_stale = True
+        elif handle.axis == 'ALT':
+            self.alt_position += handle.steps
+        else:
+            self.az_position += handle.steps
+    
+    async def start_move_altitude(self, steps: int) -> Optional[AsyncMoveHandle]:
+        """
+        Start an altitude move without waiting for it to finish
+        
+        Args:
+            steps: Number of steps (positive = up, negative = down)
+        
+        Returns:
+            AsyncMoveHandle to await, or None if the command could not be sent
+        """
+        return await self._start_move('ALT', steps)
+    
+    async def start_move_azimuth(self, steps: int) -> Optional[AsyncMoveHandle]:
+        """
+        Start a differential azimuth move without waiting for it to finish
+        
+        Args:
+            steps: Number of steps (positive = EAST, negative = WEST)
+        
+        Returns:
+            AsyncMoveHandle to await, or None if the command could not be sent
+        """
+        return await self._start_move('AZ', steps)
+    
+    async def move_altitude(self, steps: int) -> bool:
+        """
+        Move altitude motor and await the end of the move
+        
+        Args:
+            steps: Number of steps (positive = up, negative = down)
+        
+        Returns:
+            True if successful
+        """
+        handle = await self.start_move_altitude(steps)
+        if handle and await handle.wait_async():
+            print(f"Altitude moved {steps} steps")
+            await self.update_position()
+            return True
+        return False
+    
+    async def move_azimuth(self, steps: int) -> bool:
+        """
+        Move azimuth in differential mode (dual opposing motors)
+        
+        Args:
+            steps: Number of steps (positive = EAST, negative = WEST)
+        
+        Returns:
+            True if successful
+        """
+        handle = await self.start_move_azimuth(steps)
+        if handle and await handle.wait_async():
+            direction = "EAST" if steps > 0 else "WEST"
+            print(f"Azimuth moved {abs(steps)} steps {direction}")
+            await self.update_position()
+            return True
+        return False
+    
+    async def stop(self) -> bool:
+        """
+        Stop all motor movement
+        
+        Returns:
+            True if successful
+        """
+        # Moves still running may be cut short; their acknowledgements are
+        # checked against their predicted end
+        for handle in self._moves:
+            handle.stop_requested = True
+        
+        # The reply comes once any move in progress has ended
+        busy = max(0.0, self._motion_end - time.monotonic())
+        response = await self.send_command("S", self.reply_timeout + busy)
+        # A stop may interrupt a move, so re-read the firmware counters next
+        self._position_stale = True
+        if response and 'OK:STOPPED' in response:
+            if all(handle.done() for handle in self._moves):
+                # Cut-short moves ended earlier than predicted
+                self._motion_end = time.monotonic()
+            print("Motors stopped")
+            return True
+        return False
+    
+    async def enable_motors(self, enable: bool = True) -> bool:
+        """
+        Enable or disable motors
+        
+        Args:
+            enable: True to enable, False to disable
+        
+        Returns:
+            True if successful
+        """
+        response = await self.send_command("E" if enable else "D")
+        
+        if response:
+            if enable and 'OK:ENABLED' in response:
+                print("Motors enabled")
+                return True
+            elif not enable and 'OK:DISABLED' in response:
+                print("Motors disabled")
+                return True
+        return False
+    
+    async def get_position(self) -> Tuple[int, int]:
+        """
+        Get current motor positions
+        
+        Returns:
+            Tuple of (altitude_position, azimuth_position)
+        """
+        response = await self.send_command("P")
+        position = parse_position(response) if response else None
+        if position:
+            self.alt_position, self.az_position = position
+            self._last_position_sync = time.monotonic()
+            self._position_stale = False
+            return position
+        
+        return (0, 0)
+    
+    async def update_position(self, force: bool = False):
+        """
+        Update internal position tracking
+        
+        Positions are dead-reckoned from acknowledged moves; the firmware
+        is only asked when position_sync_interval has passed, after an
+        interrupted move, or when forced.
+        
+        Args:
+            force: Query the firmware regardless of the interval
+        """
+        due = time.monotonic() - self._last_position_sync >= self.position_sync_interval
+        if force or due or self._position_stale:
+            await self.get_position()
+    
+    async def reset_position(self) -> bool:
+        """
+        Reset position counters to zero
+        
+        Returns:
+            True if successful
+        """
+        response = await self.send_command("R")
+        if response and 'OK:RESET' in response:
+            self.alt_position = 0
+            self.az_position = 0
+            self._last_direction = {'ALT': None, 'AZ': None}
+            self._last_position_sync = time.monotonic()
+            self._position_stale = False
+            print("Position reset to 0,0")
+            return True
+        return False
+    
+    async def set_speed(self, speed: int) -> bool:
+        """
+        Set motor speed
+        
+        Args:
+            speed: Speed in steps per second (1-2000)
+        
+        Returns:
+            True if successful
+        """
+        if speed < 1 or speed > 2000:
+            print("ERROR: Speed must be between 1 and 2000")
+            return False
+        
+        response = await self.send_command(f"V{speed}")
+        if response and 'OK:SPEED' in response:
+            self.current_speed = speed
+            print(f"Speed set to {speed} steps/sec")
+            return True
+        return False
+    
+    async def set_acceleration(self, acceleration: int) -> bool:
+        """
+        Set how fast moves ramp up to (and down from) the set speed
+        
+        Args:
+            acceleration: Steps per second^2 (1-32767, 0 = constant speed)
+        
+        Returns:
+            True if successful
+        """
+        if acceleration < 0 or acceleration > 32767:
+            print("ERROR: Acceleration must be between 0 and 32767")
+            return False
+        
+        response = await self.send_command(f"C{acceleration}")
+        ack = parse_ack(response) if response else None
+        if ack and ack.name == 'ACCEL':
+            self.acceleration = acceleration
+            print(f"Acceleration set to {acceleration} steps/sec^2")
+            return True
+        return False
+    
+    async def set_telemetry(self, interval: int) -> bool:
+        """
+        Have the firmware report positions while it moves
+        
+        Args:
+            interval: Steps between reports (0 turns telemetry off)
+        
+        Returns:
+            True if the firmware accepted the interval
+        """
+        if interval < 0:
+            print("ERROR: Telemetry interval must be 0 or more")
+            return False
+        
+        response = await self.send_command(f"T{interval}")
+        ack = parse_ack(response) if response else None
+        if ack and ack.name == 'TELEMETRY':
+            self.telemetry_interval = interval
+            return True
+        return False
+    
+    def add_telemetry_callback(self, callback):
+        """Call callback(alt, az) for every telemetry report"""
+        self._telemetry_callbacks.append(callback)
+    
+    def remove_telemetry_callback(self, callback):
+        """Stop passing telemetry reports to a callback"""
+        if callback in self._telemetry_callbacks:
+            self._telemetry_callbacks.remove(callback)
+    
+    async def telemetry(self):
+        """
+        Iterate over telemetry reports as they arrive
+        
+        Example:
+            async for alt, az in mount.telemetry():
+                print(alt, az)
+        
+        Yields:
+            (altitude, azimuth) position tuples, until disconnected
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._telemetry_queues.append(queue)
+        try:
+            while True:
+                report = await queue.get()
+                if report is None:
+                    return
+                yield report
+        finally:
+            self._telemetry_queues.remove(queue)
+    
+    async def get_status(self) -> dict:
+        """
+        Get controller status
+        
+        Returns:
+            Dictionary with status information
+        """
+        response = await self.send_command("?")
+        
+        status = {
+            'connected': self.connected,
+            'alt_position': self.alt_position,
+            'az_position': self.az_position,
+            'speed': self.current_speed,
+            'mode': 'Differential AZ (3 motors: ALT + West + East)'
+        }
+        
+        if response:
+            print(response)
+            firmware = parse_status(response)
+            if firmware:
+                status['firmware'] = firmware
+                self.acceleration = firmware.get('acceleration', self.acceleration)
+        
+        print(f"\nPython Controller Status:")
+        print(f"  Mode: {status['mode']}")
+        print(f"  Connected: {status['connected']}")
+        print(f"  ALT Position: {status['alt_position']}")
+        print(f"  AZ Position: {status['az_position']} (+ = East, - = West)")
+        print(f"  Speed: {status['speed']} steps/sec")
+        
+        return status
@@ -31,7 +31,10 @@ sends "move AZ" commands and the Arduino handles the differential control.
 
 Features:
 - Serial communication with Arduino controller
+- Background reader thread matching replies to commands
+- Move completion handles timed from steps, speed and backlash
 - Manual motor control
+- Continuous jog mode driven by held keys
 - Position tracking
 - Speed adjustment
 - Simple CLI interface
@@ -48,8 +51,566 @@ import serial
 import serial.tools.list_ports
 import time
 import sys
+import os
+import json
+import math
+import queue
 import threading
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+try:
+    import termios
+    import tty
+    import select
+except ImportError:  # Windows
+    termios = None
+
+from move_queue import MoveQueue
+from polar_align_protocol import (BINARY_ACK, BINARY_HANDSHAKE, BLOCK_REPLIES, REPLY_PREFIXES,
+                                  STATUS_TELEMETRY, FrameDecoder, encode_text_command,
+                                  expected_reply, frame_to_text, is_block_end, pack_move_param,
+                                  parse_ack, parse_calibration, parse_position, parse_status,
+                                  parse_tag, parse_telemetry)
+
+
+# USB vendor IDs of Arduino boards and the USB-serial bridges on their clones
+ARDUINO_USB_VIDS = {
+    0x2341,  # Arduino
+    0x2A03,  # Arduino.org
+    0x1A86,  # QinHeng CH340/CH341
+    0x0403,  # FTDI
+    0x10C4,  # Silicon Labs CP210x
+}
+
+# Port description keywords (same as CalibrationWizard.find_arduino)
+ARDUINO_DESCRIPTIONS = ('USB', 'Arduino', 'CH340')
+
+
+def is_likely_controller(port_info) -> bool:
+    """
+    Check whether a port could be the Arduino, without opening it
+    
+    Args:
+        port_info: Entry from serial.tools.list_ports.comports()
+    """
+    if port_info.vid is not None and port_info.vid in ARDUINO_USB_VIDS:
+        return True
+    description = port_info.description or ''
+    return any(keyword in description for keyword in ARDUINO_DESCRIPTIONS)
+
+
+# Last port that answered, remembered between runs for fast reconnects
+PORT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.polar_align_port.json')
+
+
+def remember_port(ser: serial.Serial):
+    """
+    Remember a working port and keep DTR asserted after it is closed
+    
+    The Arduino resets on a DTR edge. Leaving DTR asserted on close means
+    the next open (with fast_open) does not reset it, so the firmware keeps
+    running along with its position counters.
+    
+    Args:
+        ser: Open port the controller answered on
+    """
+    serial_number = None
+    for info in serial.tools.list_ports.comports():
+        if info.device == ser.port:
+            serial_number = info.serial_number
+            break
+    
+    try:
+        with open(PORT_CACHE_FILE, 'w') as f:
+            json.dump({'port': ser.port, 'serial_number': serial_number}, f)
+    except OSError:
+        pass
+    
+    if termios is not None:
+        try:
+            attrs = termios.tcgetattr(ser.fd)
+            attrs[2] &= ~termios.HUPCL
+            termios.tcsetattr(ser.fd, termios.TCSANOW, attrs)
+        except (OSError, termios.error):
+            pass
+
+
+def find_cached_port() -> Optional[str]:
+    """
+    Find the remembered port, following its USB serial number if the
+    device name has changed since it was cached
+    
+    Returns:
+        Port name, or None if nothing usable is cached
+    """
+    try:
+        with open(PORT_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    ports = serial.tools.list_ports.comports()
+    if cache.get('serial_number'):
+        for info in ports:
+            if info.serial_number == cache['serial_number']:
+                return info.device
+    
+    if any(info.device == cache.get('port') for info in ports):
+        return cache['port']
+    return None
+
+
+def fast_open(port: Optional[str] = None, baudrate: int = 115200,
+              timeout: float = 0.3) -> Optional[serial.Serial]:
+    """
+    Open the controller without resetting it, if its firmware is running
+    
+    The port is opened with DTR/RTS left as they are and probed with "?".
+    Running firmware answers within a few milliseconds; if nothing answers
+    the port is closed and the caller falls back to the reset-and-wait path.
+    
+    Args:
+        port: Port to try (defaults to the remembered one)
+        baudrate: Serial communication speed
+        timeout: Seconds to wait for the status reply
+        
+    Returns:
+        Open port positioned after the status reply, or None
+    """
+    port = port or find_cached_port()
+    if not port:
+        return None
+    
+    ser = serial.Serial()
+    ser.port = port
+    ser.baudrate = baudrate
+    ser.timeout = 0.05
+    if os.name == 'nt':
+        # Windows only raises DTR/RTS on open if asked to
+        ser.dtr = False
+        ser.rts = False
+    
+    try:
+        ser.open()
+        ser.reset_input_buffer()
+        ser.write(b"?\n")
+        ser.flush()
+    except (serial.SerialException, OSError):
+        ser.close()
+        return None
+    
+    # Read the whole status block so it does not reach the reply router
+    answered = False
+    buffer = bytearray()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        buffer.extend(ser.read(ser.in_waiting or 1))
+        while b'\n' in buffer:
+            raw, _, buffer = buffer.partition(b'\n')
+            line = raw.decode('utf-8', errors='replace').strip()
+            if line.startswith(BLOCK_REPLIES['?']):
+                answered = True
+            if answered and is_block_end(line):
+                return ser
+    
+    ser.close()
+    return None
+
+
+def reset_arduino(ser: serial.Serial):
+    """Pulse DTR to reset the Arduino (needed when DTR is held across opens)"""
+    try:
+        ser.dtr = False
+        time.sleep(0.05)
+        ser.dtr = True
+    except (serial.SerialException, OSError):
+        # Ports without modem lines (e.g. pseudo-terminals)
+        pass
+
+
+class PendingCommand:
+    """
+    A command written to the controller that is waiting for its reply
+    """
+    
+    def __init__(self, command: str, tag: Optional[int] = None):
+        """
+        Initialize the pending command
+        
+        Args:
+            command: Command string as written to the controller (without tag)
+            tag: Sequence tag the firmware echoes once the reply is complete
+        """
+        self.command = command
+        self.tag = tag
+        self.expect, self.block = expected_reply(command)
+        self.lines: List[str] = []
+        self.response: Optional[str] = None
+        self.abandoned = False
+        self.created = time.monotonic()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._callback_lock = threading.Lock()
+    
+    def accepts(self, line: str) -> bool:
+        """Check whether a line read from the controller belongs to this command"""
+        if line.startswith('ERROR:'):
+            return True
+        if self.block:
+            return bool(self.lines) or line.startswith(self.block)
+        return self.expect is None or line.startswith(self.expect)
+    
+    def completes(self, line: str) -> bool:
+        """Check whether an accepted line is the last one of the reply"""
+        if self.tag is not None:
+            # Tagged commands are complete only when their tag is echoed
+            return False
+        if self.block and not line.startswith('ERROR:'):
+            return is_block_end(line)
+        return True
+    
+    def done(self) -> bool:
+        """Check whether the reply has arrived"""
+        return self._done.is_set()
+    
+    @property
+    def wire_command(self) -> str:
+        """Command as written to the port, including any sequence tag"""
+        if self.tag is None:
+            return self.command
+        return f"{self.command}#{self.tag}"
+    
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Block until the reply arrives
+        
+        Args:
+            timeout: Seconds to wait (None waits forever)
+            
+        Returns:
+            Reply text (multi-line replies joined by newlines) or None on timeout
+        """
+        if self._done.wait(timeout):
+            return self.response
+        # Leave the entry queued so a late reply is absorbed here instead of
+        # being mistaken for the reply to a later command
+        self.abandoned = True
+        return None
+    
+    def add_done_callback(self, callback):
+        """
+        Call callback(pending) once the reply has arrived
+        
+        Callbacks run on the reader thread, so they must not send commands.
+        A callback added after the reply arrived is called immediately.
+        """
+        with self._callback_lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+    
+    def _resolve(self, response: Optional[str]):
+        """Store the reply and wake the waiting caller"""
+        self.response = response
+        with self._callback_lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+# Time each firmware step loop iteration spends besides the speed delay
+# (step pulses and digitalWrite calls), in seconds
+STEP_OVERHEAD = 10e-6
+
+# Firmware default acceleration in steps/sec^2 (0 would be constant speed)
+DEFAULT_ACCELERATION = 1000
+
+# Seconds before its predicted end a move has to be acknowledged, after a
+# stop was sent, to count as cut short by the firmware's stop check
+STOP_TOLERANCE = 0.05
+
+
+def ramp_duration(steps: int, speed: int, acceleration: int = 0) -> float:
+    """
+    Time the firmware's step delays add up to for one run of steps
+    
+    The firmware ramps the step rate up at acceleration steps/sec^2 until
+    it reaches speed, cruises, and ramps down again over the last steps
+    (a triangle profile if the run is too short to reach speed).
+    
+    Args:
+        steps: Steps in the run
+        speed: Cruise speed in steps per second
+        acceleration: Steps per second^2 (0 = constant speed)
+        
+    Returns:
+        Duration in seconds
+    """
+    steps = abs(steps)
+    speed = max(1, speed)
+    if acceleration <= 0:
+        return steps / speed
+    ramp_steps = speed * speed / (2.0 * acceleration)
+    if steps >= 2 * ramp_steps:
+        return steps / speed + speed / acceleration
+    return 2.0 * math.sqrt(steps / acceleration)
+
+
+def move_duration(steps: int, speed: int, backlash: int = 0,
+                  acceleration: int = 0) -> float:
+    """
+    Predict how long the firmware spends on a blocking move
+    
+    Args:
+        steps: Steps to move (sign ignored)
+        speed: Speed in steps per second
+        backlash: Backlash steps taken up before the move
+        acceleration: Ramp rate in steps/sec^2 (0 = constant speed); the
+                      backlash take-up ramps separately
+        
+    Returns:
+        Duration in seconds
+    """
+    if steps == 0:
+        return 0.0
+    duration = 0.0
+    for run in (abs(steps), max(0, backlash)):
+        if run:
+            duration += ramp_duration(run, speed, acceleration) + run * STEP_OVERHEAD
+    return duration
+
+
+# Command letter of each kind of move ('BOTH' is the combined M<alt>,<az>)
+MOVE_COMMANDS = {'ALT': 'A', 'AZ': 'Z', 'BOTH': 'M'}
+
+
+def split_move(axis: str, steps) -> dict:
+    """
+    Steps each axis turns in a move
+    
+    Args:
+        axis: 'ALT', 'AZ' or 'BOTH'
+        steps: Steps, or (alt, az) steps for 'BOTH'
+    
+    Returns:
+        Steps keyed by 'ALT' / 'AZ'
+    """
+    if axis == 'BOTH':
+        return dict(zip(('ALT', 'AZ'), steps))
+    return {axis: steps}
+
+
+class MoveHandle:
+    """
+    Completion handle for a move the firmware is executing
+    
+    The firmware acknowledges a move only once the motion has finished, so
+    instead of the fixed reply timeout a handle waits until the predicted
+    end of the move (allowing for moves queued ahead of it) plus
+    reply_timeout. The controller's position is updated as soon as the
+    acknowledgement arrives, whether or not anyone is waiting.
+    
+    The firmware acknowledges a move it cut short on a stop just like a
+    finished one. A move acknowledged clearly before its predicted end
+    after a stop was sent is reported as cancelled and not succeeded.
+    """
+    
+    def __init__(self, axis: str, steps: int, pending: PendingCommand,
+                 start: float, duration: float, slack: float, on_finish=None):
+        """
+        Initialize the handle
+        
+        Args:
+            axis: 'ALT', 'AZ' or 'BOTH'
+            steps: Commanded steps ((alt, az) for 'BOTH')
+            pending: The move command waiting for its acknowledgement
+            start: Predicted time.monotonic() at which the motion starts
+            duration: Predicted motion time in seconds
+            slack: Extra seconds to allow before giving up
+            on_finish: Called with the handle once the move has finished
+                       or timed out
+        """
+        self.axis = axis
+        self.steps = steps
+        self.pending = pending
+        self.start = start
+        self.duration = duration
+        self.deadline = start + duration + slack
+        self.response: Optional[str] = None
+        self.succeeded: Optional[bool] = None
+        self.cancelled = False
+        # Set by the controller when it sends a stop while the move runs
+        self.stop_requested = False
+        self._on_finish = on_finish
+        self._lock = threading.Lock()
+        pending.add_done_callback(lambda p: self._finish(p.response))
+    
+    @property
+    def expected_end(self) -> float:
+        """Predicted time.monotonic() at which the motion ends"""
+        return self.start + self.duration
+    
+    def done(self) -> bool:
+        """Check whether the move has finished (or timed out)"""
+        return self.succeeded is not None
+    
+    def remaining(self) -> float:
+        """Seconds left until the handle gives up"""
+        return max(0.0, self.deadline - time.monotonic())
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the move finishes
+        
+        Args:
+            timeout: Maximum seconds to wait (defaults to the move's deadline).
+                     Returning early leaves the move in flight.
+            
+        Returns:
+            True if the firmware acknowledged the move and it was not cut
+            short by a stop
+        """
+        if self.done():
+            return self.succeeded
+        
+        limit = self.remaining() if timeout is None else min(timeout, self.remaining())
+        if self.pending._done.wait(limit):
+            self._finish(self.pending.response)
+        elif time.monotonic() >= self.deadline:
+            # Leave the command queued so a late acknowledgement is absorbed
+            self.pending.abandoned = True
+            self._finish(None)
+        return bool(self.succeeded)
+    
+    def _finish(self, response: Optional[str]):
+        """Record the outcome once (reader thread or waiting caller)"""
+        with self._lock:
+            if self.succeeded is not None:
+                return
+            self.response = response
+            prefix = REPLY_PREFIXES[MOVE_COMMANDS[self.axis]][0]
+            self.succeeded = bool(response and prefix in response)
+            if (self.succeeded and self.stop_requested
+                    and time.monotonic() < self.expected_end - STOP_TOLERANCE):
+                self.succeeded = False
+                self.cancelled = True
+        if self._on_finish:
+            self._on_finish(self)
+
+
+class ReplyRouter:
+    """
+    Matches lines read from the controller to the commands waiting for them
+    
+    The firmware handles one command at a time, so replies come back in the
+    order the commands were written. Each line goes to the oldest pending
+    command that accepts it; lines nobody is waiting for (INFO/WARN notes,
+    startup banners) are put on the ``messages`` queue. Tagged commands are
+    completed by their "#<seq>" echo rather than by their reply line.
+    """
+    
+    # Seconds an abandoned command keeps waiting to absorb its late reply
+    ABANDONED_TTL = 60.0
+    
+    def __init__(self):
+        self._pending: List[PendingCommand] = []
+        self._lock = threading.Lock()
+        self.messages: queue.Queue = queue.Queue()
+    
+    def register(self, pending: PendingCommand):
+        """Queue a command that has been (or is about to be) written"""
+        with self._lock:
+            self._pending.append(pending)
+    
+    def discard(self, pending: PendingCommand):
+        """Forget a command whose write failed"""
+        with self._lock:
+            if pending in self._pending:
+                self._pending.remove(pending)
+    
+    def feed(self, line: str):
+        """
+        Route one line read from the controller
+        
+        Args:
+            line: Stripped, non-empty reply line
+        """
+        tag = parse_tag(line)
+        if tag is not None:
+            self.resolve_tag(tag)
+            return
+        
+        with self._lock:
+            self._prune()
+            target = self._match(line)
+            if target is None:
+                self.messages.put(line)
+                return
+            target.lines.append(line)
+            if not target.completes(line):
+                return
+            self._pending.remove(target)
+        target._resolve('\n'.join(target.lines))
+    
+    def resolve_tag(self, tag: int):
+        """Complete the command with this tag and any tagged ones before it"""
+        with self._lock:
+            # An echo nobody is waiting for (a timed-out probe, or a frame
+            # whose seq byte was corrupted) must not take other commands
+            index = next((i for i, p in enumerate(self._pending) if p.tag == tag), None)
+            if index is None:
+                return
+            # The firmware is sequential, so an older tag that was never
+            # echoed will not be echoed any more
+            head, rest = self._pending[:index + 1], self._pending[index + 1:]
+            finished = [p for p in head if p.tag is not None]
+            self._pending = [p for p in head if p.tag is None] + rest
+        for p in finished:
+            p._resolve('\n'.join(p.lines) if p.lines else None)
+    
+    def cancel_all(self):
+        """Wake every waiting caller with no reply (used on disconnect)"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for p in pending:
+            p._resolve(None)
+    
+    def _match(self, line: str) -> Optional[PendingCommand]:
+        """
+        Find the pending command a line belongs to (lock held)
+
+        A command still being waited on takes the line before any abandoned
+        one. The firmware answers in order, so once a later command gets
+        its reply the abandoned commands ahead of it never will and are
+        dropped; otherwise one lost reply would shift every later reply of
+        the same kind onto the wrong command. Abandoned commands only absorb
+        late replies nobody else accepts, and never an error.
+        """
+        error = line.startswith('ERROR:')
+        late = None
+        for index, p in enumerate(self._pending):
+            # An open block owns every line until it is closed
+            if p.block and p.lines:
+                return p
+            if p.abandoned:
+                if late is None and not error and p.accepts(line):
+                    late = p
+                continue
+            # An error answers the oldest command still being waited on
+            if error or p.accepts(line):
+                ahead = [q for q in self._pending[:index] if not q.abandoned]
+                self._pending = ahead + self._pending[index:]
+                return p
+        return late
+    
+    def _prune(self):
+        """Drop abandoned commands whose reply is never coming (lock held)"""
+        now = time.monotonic()
+        self._pending = [p for p in self._pending
+                         if not (p.abandoned and now - p.created > self.ABANDONED_TTL)]
 
 
 class PolarAlignController:
@@ -73,6 +634,54 @@ class PolarAlignController:
         self.az_position = 0
         self.current_speed = 800
         
+        # Acceleration the firmware ramps moves with (steps/sec^2), from
+        # set_acceleration(), the calibration or the status block
+        self.acceleration = DEFAULT_ACCELERATION
+        
+        # Seconds to wait for a reply before giving up
+        self.reply_timeout = 1.0
+        
+        # Positions are dead-reckoned from acknowledged moves and checked
+        # against the firmware counters at most this often (seconds)
+        self.position_sync_interval = 5.0
+        self._last_position_sync = 0.0
+        self._position_stale = True
+        
+        # Backlash (steps) the firmware takes up when an axis reverses, from
+        # the firmware calibration; used to predict move durations
+        self.alt_backlash = 0
+        self.az_backlash = 0
+        # Last commanded direction per axis (None = unknown)
+        self._last_direction = {'ALT': None, 'AZ': None}
+        # Predicted time.monotonic() at which queued moves have finished
+        self._motion_end = 0.0
+        # Moves sent and possibly still running, marked when a stop is sent
+        self._moves: List[MoveHandle] = []
+        
+        # Background reader and reply correlation
+        self.router = ReplyRouter()
+        self._reader: Optional[threading.Thread] = None
+        self._reader_stop = threading.Event()
+        self._write_lock = threading.Lock()
+        
+        # Firmware understands the combined M<alt>,<az> move (cleared when
+        # it answers one with an error)
+        self.combined_moves = True
+        
+        # Sequence tags for pipelined commands (needs firmware tag echo)
+        self.pipelining = False
+        self._next_tag = 0
+        
+        # Binary framed protocol (see polar_align_protocol), switched by
+        # the reader thread when the firmware acknowledges it
+        self.binary = False
+        self._decoder: Optional[FrameDecoder] = None
+        
+        # Position telemetry pushed by the firmware while moving
+        self.telemetry_interval = 0
+        self.live_position: Optional[Tuple[int, int]] = None
+        self._telemetry_callbacks = []
+        
         # Movement presets (in steps)
         self.FINE_STEP = 10      # Very fine adjustment
         self.SMALL_STEP = 50     # Small adjustment
@@ -89,125 +698,582 @@ class PolarAlignController:
         ports = serial.tools.list_ports.comports()
         return [port.device for port in ports]
     
-    def connect(self, port: Optional[str] = None) -> bool:
+    def find_candidate_ports(self) -> list:
+        """
+        List serial ports that look like an Arduino
+        
+        Returns:
+            Port names that pass the USB VID/description filter
+        """
+        ports = serial.tools.list_ports.comports()
+        return [port.device for port in ports if is_likely_controller(port)]
+    
+    def connect(self, port: Optional[str] = None, fast: bool = True) -> bool:
         """
         Connect to the Arduino controller
         
         Args:
             port: Serial port to connect to (uses auto-detect if None)
+            fast: First try the given or remembered port without resetting
+                  the Arduino
             
         Returns:
             True if connection successful, False otherwise
         """
         if port:
             self.port = port
+        
+        if fast:
+            ser = fast_open(self.port, self.baudrate)
+            if ser is not None:
+                self.port = ser.port
+                self.serial = ser
+                self.connected = True
+                print(f"Connected to {self.port} (firmware already running)")
+                remember_port(ser)
+                self._start_reader()
+                # The firmware kept its counters, so pick them up
+                self.update_position()
+                return True
             
         if not self.port:
-            # Try to auto-detect Arduino
-            ports = self.list_ports()
-            if not ports:
-                print("ERROR: No serial ports found")
-                return False
-            
-            # Try each port
-            for p in ports:
+            return self._auto_detect()
+        
+        try:
+            ser = self._probe_port(self.port)
+        except Exception as e:
+            print(f"ERROR: Connection failed - {e}")
+            return False
+        
+        if ser is None:
+            return False
+        
+        self._attach(ser)
+        return True
+    
+    def _auto_detect(self) -> bool:
+        """
+        Probe every likely port at once and keep the first that says READY
+        
+        Returns:
+            True if a controller was found and connected
+        """
+        ports = self.find_candidate_ports()
+        if not ports:
+            print("ERROR: No Arduino-like serial ports found")
+            return False
+        
+        print(f"Probing {len(ports)} port(s): {', '.join(ports)}")
+        found = threading.Event()
+        winner = None
+        
+        # Each probe waits out its own Arduino reset, so probing in parallel
+        # costs one reset delay instead of one per port
+        with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+            probes = [pool.submit(self._probe_port, p, found) for p in ports]
+            for probe in as_completed(probes):
                 try:
-                    print(f"Trying port {p}...")
-                    test_serial = serial.Serial(p, self.baudrate, timeout=2)
-                    time.sleep(2)  # Wait for Arduino reset
-                    
-                    # Check for READY message
-                    if test_serial.in_waiting:
-                        response = test_serial.readline().decode('utf-8').strip()
-                        if 'READY' in response:
-                            self.port = p
-                            self.serial = test_serial
-                            self.connected = True
-                            print(f"Connected to {p}")
-                            
-                            # Read startup messages
-                            time.sleep(0.5)
-                            while self.serial.in_waiting:
-                                msg = self.serial.readline().decode('utf-8').strip()
-                                print(msg)
-                            
-                            return True
-                    
-                    test_serial.close()
-                except Exception as e:
+                    ser = probe.result()
+                except Exception:
                     continue
-            
+                if ser is None:
+                    continue
+                if winner is None:
+                    winner = ser
+                    found.set()
+                else:
+                    ser.close()
+        
+        if winner is None:
             print("ERROR: Could not auto-detect controller")
             return False
         
-        try:
-            self.serial = serial.Serial(self.port, self.baudrate, timeout=1)
-            time.sleep(2)  # Wait for Arduino reset
-            
-            # Check for READY message
-            if self.serial.in_waiting:
-                response = self.serial.readline().decode('utf-8').strip()
-                if 'READY' in response:
-                    self.connected = True
-                    print(f"Connected to {self.port}")
-                    
-                    # Read startup messages
-                    time.sleep(0.5)
-                    while self.serial.in_waiting:
-                        msg = self.serial.readline().decode('utf-8').strip()
-                        print(msg)
-                    
-                    return True
-            
-            return False
+        self.port = winner.port
+        self._attach(winner)
+        return True
+    
+    def _probe_port(self, port: str,
+                    cancel: Optional[threading.Event] = None,
+                    timeout: float = 3.0) -> Optional[serial.Serial]:
+        """
+        Open a port and wait for the firmware's startup banner
+        
+        Opening the port resets the Arduino. Its banner (READY on v2,
+        "Ready." on v3) arrives once the bootloader hands over, which is
+        usually well under the old fixed 2 s wait.
+        
+        Args:
+            port: Serial port to open
+            cancel: Event that aborts the probe (another port already won)
+            timeout: Seconds to wait for the banner
             
-        except Exception as e:
-            print(f"ERROR: Connection failed - {e}")
-            return False
+        Returns:
+            The open port positioned after the banner, or None
+        """
+        ser = serial.Serial(port, self.baudrate, timeout=0.1)
+        reset_arduino(ser)
+        buffer = bytearray()
+        deadline = time.monotonic() + timeout
+        
+        while time.monotonic() < deadline:
+            if cancel is not None and cancel.is_set():
+                break
+            buffer.extend(ser.read(ser.in_waiting or 1))
+            if b'READY' in buffer.upper():
+                return ser
+        
+        ser.close()
+        return None
+    
+    def _attach(self, ser: serial.Serial):
+        """Adopt a probed port: print its startup messages and start the reader"""
+        self.serial = ser
+        self.connected = True
+        self._last_direction = {'ALT': None, 'AZ': None}
+        self._motion_end = 0.0
+        print(f"Connected to {self.port}")
+        remember_port(ser)
+        
+        # Read startup messages until the firmware goes quiet
+        self.serial.timeout = 0.2
+        while True:
+            msg = self.serial.readline()
+            if not msg:
+                break
+            print(msg.decode('utf-8', errors='replace').strip())
+        
+        self._start_reader()
     
     def disconnect(self):
         """Disconnect from the controller"""
+        self._stop_reader()
         if self.serial and self.serial.is_open:
             self.serial.close()
             self.connected = False
             print("Disconnected")
     
-    def send_command(self, command: str) -> Optional[str]:
+    def _start_reader(self):
+        """Start the background thread that reads every line from the port"""
+        self._reader_stop.clear()
+        # Short read timeout so the reader notices a stop request promptly
+        self.serial.timeout = 0.1
+        self._reader = threading.Thread(target=self._read_loop,
+                                        name=f"polar-align-reader-{self.port}",
+                                        daemon=True)
+        self._reader.start()
+    
+    def _stop_reader(self):
+        """Stop the reader thread and release any waiting callers"""
+        self._reader_stop.set()
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=2)
+        self._reader = None
+        self.router.cancel_all()
+    
+    def _read_loop(self):
+        """Read lines from the port and hand them to the reply router"""
+        buffer = bytearray()
+        
+        while not self._reader_stop.is_set():
+            try:
+                # Block for one byte (bounded by the port timeout), then take
+                # whatever else is already waiting
+                chunk = self.serial.read(self.serial.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError, AttributeError) as e:
+                if not self._reader_stop.is_set():
+                    print(f"ERROR: Serial read failed - {e}")
+                    self.connected = False
+                break
+            
+            if not chunk:
+                continue
+            
+            buffer.extend(chunk)
+            self._consume(buffer)
+        
+        self.router.cancel_all()
+    
+    def _consume(self, buffer: bytearray):
+        """Route every complete text line or binary frame in the buffer"""
+        while buffer:
+            if self.binary:
+                frames = self._decoder.feed(bytes(buffer))
+                buffer.clear()
+                for frame in frames:
+                    if frame.status == STATUS_TELEMETRY:
+                        self._telemetry(frame.a, frame.b)
+                        continue
+                    for line in frame_to_text(frame):
+                        self.router.feed(line)
+                    self.router.resolve_tag(frame.seq)
+                    if frame.opcode == 'X':
+                        # Back to text: whatever follows is text again
+                        self.binary = False
+                        buffer.extend(self._decoder.buffer)
+                        self._decoder = None
+                        break
+                continue
+            
+            end = buffer.find(b'\n')
+            if end < 0:
+                return
+            line = buffer[:end].decode('utf-8', errors='replace').strip()
+            del buffer[:end + 1]
+            if line == BINARY_ACK:
+                # Every byte after this line is framed; switch before the
+                # waiting caller wakes up and sends its next command
+                self._decoder = FrameDecoder()
+                self.binary = True
+            position = parse_telemetry(line)
+            if position:
+                self._telemetry(*position)
+            elif line:
+                self.router.feed(line)
+    
+    def _telemetry(self, alt: int, az: int):
+        """Record a telemetry report and pass it to the callbacks"""
+        self.live_position = (alt, az)
+        for callback in list(self._telemetry_callbacks):
+            try:
+                callback(alt, az)
+            except Exception as e:
+                print(f"ERROR: Telemetry callback failed - {e}")
+    
+    def submit(self, command: str, tagged: Optional[bool] = None) -> Optional[PendingCommand]:
         """
-        Send a command to the controller
+        Write a command without waiting for its reply
         
         Args:
             command: Command string to send
+            tagged: Append a sequence tag (defaults to whether pipelining is on)
             
         Returns:
-            Response from controller or None if error
+            PendingCommand to wait on, or None if the write failed
         """
         if not self.connected or not self.serial:
             print("ERROR: Not connected")
             return None
         
+        if tagged is None:
+            tagged = self.pipelining
+        
+        # Encoding can fail before the command is registered (e.g. a binary
+        # parameter outside int32)
+        pending = None
         try:
-            # Send command
-            self.serial.write(f"{command}\n".encode('utf-8'))
-            self.serial.flush()
+            # Register and write under one lock so the pending order always
+            # matches the order the firmware sees
+            with self._write_lock:
+                if self.binary:
+                    # Frames always carry a one-byte sequence number
+                    tag = self._next_tag % 256
+                    data = encode_text_command(command, tag)
+                    if data is None:
+                        print(f"ERROR: '{command}' is not available in binary mode")
+                        return None
+                else:
+                    tag = self._next_tag if tagged else None
+                    data = None
+                if tag is not None:
+                    self._next_tag = (self._next_tag + 1) % 10000
+                
+                pending = PendingCommand(command, tag)
+                if data is None:
+                    data = f"{pending.wire_command}\n".encode('utf-8')
+                self.router.register(pending)
+                self.serial.write(data)
+                self.serial.flush()
+        except Exception as e:
+            if pending is not None:
+                self.router.discard(pending)
+            print(f"ERROR: Command failed - {e}")
+            return None
+        
+        return pending
+    
+    def send_command(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Send a command to the controller and wait for its reply
+        
+        Args:
+            command: Command string to send
+            timeout: Seconds to wait for the reply (defaults to reply_timeout)
             
-            # Wait for response
-            time.sleep(0.1)
+        Returns:
+            Response from controller or None if error
+        """
+        pending = self.submit(command)
+        if pending is None:
+            return None
+        
+        return pending.wait(self.reply_timeout if timeout is None else timeout)
+    
+    def enable_pipelining(self, timeout: float = 0.3) -> bool:
+        """
+        Switch to tagged, pipelined commands if the firmware supports them
+        
+        Sends a tagged position query; firmware with tag support echoes the
+        tag back. Older firmware does not, and pipelining stays off because
+        it would merge back-to-back commands into one line.
+        
+        Args:
+            timeout: Seconds to wait for the tag echo
             
-            # Read response
-            if self.serial.in_waiting:
-                response = self.serial.readline().decode('utf-8').strip()
-                return response
+        Returns:
+            True if pipelining is enabled
+        """
+        pending = self.submit("P", tagged=True)
+        if pending is None:
+            return False
+        
+        if pending.wait(timeout) is None:
+            self.router.discard(pending)
+            self.pipelining = False
+            print("Firmware does not echo command tags - pipelining disabled")
+            return False
+        
+        self.pipelining = True
+        return True
+    
+    def enable_binary(self) -> bool:
+        """
+        Switch the firmware to the binary framed protocol
+        
+        Commands keep their text form in the API and are framed on the way
+        out; replies are translated back to text. CAL:* and other text-only
+        commands are unavailable until disable_binary() is called. Call this
+        while no other commands are in flight.
+        
+        Returns:
+            True if the firmware switched to binary frames
+        """
+        if self.binary:
+            return True
+        
+        pending = self.submit(BINARY_HANDSHAKE, tagged=False)
+        if pending is None:
+            return False
+        
+        response = pending.wait(self.reply_timeout)
+        if response != BINARY_ACK:
+            print("Firmware does not support the binary protocol")
+            return False
+        
+        print("Binary protocol enabled")
+        return True
+    
+    def disable_binary(self) -> bool:
+        """
+        Return the firmware to the text protocol
+        
+        Returns:
+            True if the firmware is (back) in text mode
+        """
+        if not self.binary:
+            return True
+        
+        response = self.send_command("X")
+        return bool(response and response.startswith('OK:'))
+    
+    def send_pipelined(self, commands: List[str],
+                       timeout: Optional[float] = None) -> List[Optional[str]]:
+        """
+        Send several commands back-to-back and collect all of their replies
+        
+        With pipelining enabled every command is written at once and the
+        replies are matched by sequence tag as they arrive, so the only dead
+        time is the firmware's own processing. Without it the commands are
+        sent one at a time.
+        
+        Args:
+            commands: Command strings to send, in order
+            timeout: Seconds to wait for all replies (defaults to reply_timeout)
+            
+        Returns:
+            Replies in command order (None for any that failed or timed out)
+        """
+        if timeout is None:
+            timeout = self.reply_timeout
+        
+        if not (self.pipelining or self.binary):
+            return [self.send_command(c, timeout) for c in commands]
+        
+        pending = [self.submit(c) for c in commands]
+        deadline = time.monotonic() + timeout
+        
+        responses = []
+        for p in pending:
+            if p is None:
+                responses.append(None)
+                continue
+            responses.append(p.wait(max(0.0, deadline - time.monotonic())))
+        return responses
+    
+    def estimate_move_duration(self, axis: str, steps: int) -> float:
+        """
+        Predict how long a move will take at the current speed
+        
+        Backlash is included when the move reverses the axis (or the last
+        direction is unknown), as the firmware takes it up first.
+        
+        Args:
+            axis: 'ALT' or 'AZ'
+            steps: Steps to move
+            
+        Returns:
+            Duration in seconds
+        """
+        if steps == 0:
+            return 0.0
+        direction = 1 if steps > 0 else -1
+        backlash = self.alt_backlash if axis == 'ALT' else self.az_backlash
+        if self._last_direction[axis] == direction:
+            backlash = 0
+        return move_duration(steps, self.current_speed, backlash, self.acceleration)
+    
+    def estimate_move_both_duration(self, alt_steps: int, az_steps: int) -> float:
+        """
+        Predict how long a combined ALT + AZ move will take
+        
+        The firmware interleaves the two axes, so the move lasts as long as
+        the longer axis, after both have taken up any backlash together.
+        
+        Args:
+            alt_steps: Altitude steps
+            az_steps: Azimuth steps
             
+        Returns:
+            Duration in seconds
+        """
+        backlash = 0
+        for axis, steps in (('ALT', alt_steps), ('AZ', az_steps)):
+            direction = 1 if steps > 0 else -1
+            if steps != 0 and self._last_direction[axis] != direction:
+                backlash = max(backlash, self.alt_backlash if axis == 'ALT' else self.az_backlash)
+        return move_duration(max(abs(alt_steps), abs(az_steps)), self.current_speed,
+                             backlash, self.acceleration)
+    
+    def _start_move(self, axis: str, steps: int) -> Optional[MoveHandle]:
+        """Write a move command and return its completion handle"""
+        duration = self.estimate_move_duration(axis, steps)
+        return self._queue_move(axis, steps, f"{MOVE_COMMANDS[axis]}{steps}", duration)
+    
+    def _queue_move(self, axis: str, steps, command: str,
+                    duration: float) -> Optional[MoveHandle]:
+        """Write a move command timed to start after the queued moves"""
+        pending = self.submit(command)
+        if pending is None:
             return None
+        
+        # The firmware runs one move at a time, so this one starts when
+        # the moves already queued have finished
+        start = max(time.monotonic(), self._motion_end)
+        self._motion_end = start + duration
+        for name, moved in split_move(axis, steps).items():
+            if moved != 0:
+                self._last_direction[name] = 1 if moved > 0 else -1
+        
+        handle = MoveHandle(axis, steps, pending, start, duration,
+                            self.reply_timeout, on_finish=self._move_finished)
+        self._moves = [h for h in self._moves if not h.done()] + [handle]
+        return handle
+    
+    def _move_finished(self, handle: MoveHandle):
+        """Dead-reckon the position from a finished move"""
+        if not handle.succeeded:
+            # No acknowledgement, or cut short by a stop: the firmware
+            # counters are read back instead of adding the commanded steps
+            self._position_stale = True
+            return
+        moved = split_move(handle.axis, handle.steps)
+        self.alt_position += moved.get('ALT', 0)
+        self.az_position += moved.get('AZ', 0)
+    
+    def start_move_altitude(self, steps: int) -> Optional[MoveHandle]:
+        """
+        Start an altitude move without waiting for it to finish
+        
+        Args:
+            steps: Number of steps (positive = up, negative = down)
             
-        except Exception as e:
-            print(f"ERROR: Command failed - {e}")
+        Returns:
+            MoveHandle to wait on, or None if the command could not be sent
+        """
+        return self._start_move('ALT', steps)
+    
+    def start_move_azimuth(self, steps: int) -> Optional[MoveHandle]:
+        """
+        Start a differential azimuth move without waiting for it to finish
+        
+        Args:
+            steps: Number of steps (positive = EAST, negative = WEST)
+            
+        Returns:
+            MoveHandle to wait on, or None if the command could not be sent
+        """
+        return self._start_move('AZ', steps)
+    
+    def start_move_both(self, alt_steps: int, az_steps: int) -> Optional[MoveHandle]:
+        """
+        Start a combined ALT + AZ move without waiting for it to finish
+        
+        Needs firmware with the M<alt>,<az> command; older firmware answers
+        with an error, which the handle reports as a failed move.
+        
+        Args:
+            alt_steps: Altitude steps (positive = up, negative = down)
+            az_steps: Azimuth steps (positive = EAST, negative = WEST)
+            
+        Returns:
+            MoveHandle to wait on (steps is (alt, az)), or None if the
+            command could not be sent
+        """
+        if self.binary and pack_move_param(alt_steps, az_steps) is None:
+            # Binary frames carry at most MAX_FRAME_MOVE steps per axis
             return None
+        duration = self.estimate_move_both_duration(alt_steps, az_steps)
+        return self._queue_move('BOTH', (alt_steps, az_steps),
+                                f"M{alt_steps},{az_steps}", duration)
+    
+    def move_both(self, alt_steps: int, az_steps: int) -> bool:
+        """
+        Move altitude and azimuth together and wait for both to finish
+        
+        The firmware interleaves the step pulses so both axes finish at
+        the same time, taking max(t_alt, t_az) instead of t_alt + t_az.
+        Firmware without the combined move gets the two moves one after
+        the other instead.
+        
+        Args:
+            alt_steps: Altitude steps (positive = up, negative = down)
+            az_steps: Azimuth steps (positive = EAST, negative = WEST)
+            
+        Returns:
+            True if successful
+        """
+        if self.combined_moves:
+            handle = self.start_move_both(alt_steps, az_steps)
+            if handle and handle.wait():
+                print(f"Moved ALT {alt_steps} and AZ {az_steps} steps together")
+                self.update_position()
+                return True
+            if handle and (handle.response is None or handle.cancelled):
+                # No reply at all, or cut short by a stop: nothing to retry
+                return False
+            if handle:
+                print("Firmware has no combined move - moving one axis at a time")
+                self.combined_moves = False
+        
+        ok = True
+        if alt_steps != 0:
+            ok = self.move_altitude(alt_steps)
+        if az_steps != 0:
+            ok = self.move_azimuth(az_steps) and ok
+        return ok
     
     def move_altitude(self, steps: int) -> bool:
         """
-        Move altitude motor
+        Move altitude motor and wait for the move to finish
         
         Args:
             steps: Number of steps (positive = up, negative = down)
@@ -215,8 +1281,8 @@ class PolarAlignController:
         Returns:
             True if successful
         """
-        response = self.send_command(f"A{steps}")
-        if response and 'OK:ALT_MOVE' in response:
+        handle = self.start_move_altitude(steps)
+        if handle and handle.wait():
             print(f"Altitude moved {steps} steps")
             self.update_position()
             return True
@@ -238,8 +1304,8 @@ class PolarAlignController:
         Returns:
             True if successful
         """
-        response = self.send_command(f"Z{steps}")
-        if response and 'OK:AZ_MOVE' in response:
+        handle = self.start_move_azimuth(steps)
+        if handle and handle.wait():
             direction = "EAST" if steps > 0 else "WEST"
             print(f"Azimuth moved {abs(steps)} steps {direction}")
             print(f"  (West screw: {'tightening' if steps > 0 else 'loosening'}, "
@@ -255,8 +1321,21 @@ class PolarAlignController:
         Returns:
             True if successful
         """
-        response = self.send_command("S")
+        # Moves still running may be cut short; their acknowledgements are
+        # checked against their predicted end
+        for handle in self._moves:
+            handle.stop_requested = True
+        
+        # The reply comes once any move in progress has ended (or been cut
+        # short by the firmware's stop check)
+        busy = max(0.0, self._motion_end - time.monotonic())
+        response = self.send_command("S", self.reply_timeout + busy)
+        # A stop may interrupt a move, so re-read the firmware counters next
+        self._position_stale = True
         if response and 'OK:STOPPED' in response:
+            if all(handle.done() for handle in self._moves):
+                # Cut-short moves ended earlier than predicted
+                self._motion_end = time.monotonic()
             print("Motors stopped")
             return True
         return False
@@ -291,19 +1370,30 @@ class PolarAlignController:
             Tuple of (altitude_position, azimuth_position)
         """
         response = self.send_command("P")
-        if response and response.startswith('POS:'):
-            # Parse: POS:ALT:1234:AZ:5678
-            parts = response.split(':')
-            if len(parts) >= 5:
-                self.alt_position = int(parts[2])
-                self.az_position = int(parts[4])
-                return (self.alt_position, self.az_position)
+        position = parse_position(response) if response else None
+        if position:
+            self.alt_position, self.az_position = position
+            self._last_position_sync = time.monotonic()
+            self._position_stale = False
+            return position
         
         return (0, 0)
     
-    def update_position(self):
-        """Update internal position tracking"""
-        self.get_position()
+    def update_position(self, force: bool = False):
+        """
+        Update internal position tracking
+        
+        The local position is kept up to date from acknowledged moves, so
+        the firmware is only asked (with P) when the last check is older
+        than position_sync_interval, after an interrupted move, or when
+        forced.
+        
+        Args:
+            force: Query the firmware regardless of the interval
+        """
+        due = time.monotonic() - self._last_position_sync >= self.position_sync_interval
+        if force or due or self._position_stale:
+            self.get_position()
     
     def reset_position(self) -> bool:
         """
@@ -316,6 +1406,9 @@ class PolarAlignController:
         if response and 'OK:RESET' in response:
             self.alt_position = 0
             self.az_position = 0
+            self._last_direction = {'ALT': None, 'AZ': None}
+            self._last_position_sync = time.monotonic()
+            self._position_stale = False
             print("Position reset to 0,0")
             return True
         return False
@@ -341,6 +1434,89 @@ class PolarAlignController:
             return True
         return False
     
+    def set_acceleration(self, acceleration: int) -> bool:
+        """
+        Set how fast moves ramp up to (and down from) the set speed
+        
+        Ramping lets the steppers reach speeds they cannot start at. On the
+        v3 firmware the value is part of the calibration and is stored by
+        CAL:SAVE.
+        
+        Args:
+            acceleration: Steps per second^2 (1-32767, 0 = constant speed)
+            
+        Returns:
+            True if successful
+        """
+        if acceleration < 0 or acceleration > 32767:
+            print("ERROR: Acceleration must be between 0 and 32767")
+            return False
+        
+        response = self.send_command(f"C{acceleration}")
+        ack = parse_ack(response) if response else None
+        if ack and ack.name == 'ACCEL':
+            self.acceleration = acceleration
+            print(f"Acceleration set to {acceleration} steps/sec^2")
+            return True
+        return False
+    
+    def set_telemetry(self, interval: int) -> bool:
+        """
+        Have the firmware report positions while it moves
+        
+        Each report ("T:<alt>,<az>") updates live_position and is passed
+        to the telemetry callbacks. Reports cost serial time inside the
+        firmware's step loop, so keep the interval to tens of steps or more.
+        
+        Args:
+            interval: Steps between reports (0 turns telemetry off)
+            
+        Returns:
+            True if the firmware accepted the interval
+        """
+        if interval < 0:
+            print("ERROR: Telemetry interval must be 0 or more")
+            return False
+        
+        response = self.send_command(f"T{interval}")
+        ack = parse_ack(response) if response else None
+        if ack and ack.name == 'TELEMETRY':
+            self.telemetry_interval = interval
+            return True
+        return False
+    
+    def add_telemetry_callback(self, callback):
+        """
+        Call callback(alt, az) for every telemetry report
+        
+        Callbacks run on the reader thread, so they must not send commands.
+        """
+        self._telemetry_callbacks.append(callback)
+    
+    def remove_telemetry_callback(self, callback):
+        """Stop passing telemetry reports to a callback"""
+        if callback in self._telemetry_callbacks:
+            self._telemetry_callbacks.remove(callback)
+    
+    def get_calibration(self) -> Optional[dict]:
+        """
+        Read the calibration stored in the firmware (v3 only)
+        
+        The backlash and acceleration values are also used to time move
+        completion.
+        
+        Returns:
+            Dictionary from parse_calibration(), or None if the firmware
+            has no calibration support
+        """
+        response = self.send_command("CAL:SHOW")
+        cal = parse_calibration(response) if response else None
+        if cal:
+            self.alt_backlash = cal.get('alt_backlash', self.alt_backlash)
+            self.az_backlash = cal.get('az_backlash', self.az_backlash)
+            self.acceleration = cal.get('acceleration', self.acceleration)
+        return cal
+    
     def get_status(self) -> dict:
         """
         Get controller status
@@ -359,12 +1535,12 @@ class PolarAlignController:
         }
         
         if response:
+            # Multi-line status block, collected by the reader thread
             print(response)
-            # Read multi-line status
-            time.sleep(0.2)
-            while self.serial.in_waiting:
-                line = self.serial.readline().decode('utf-8').strip()
-                print(line)
+            firmware = parse_status(response)
+            if firmware:
+                status['firmware'] = firmware
+                self.acceleration = firmware.get('acceleration', self.acceleration)
         
         print(f"\nPython Controller Status:")
         print(f"  Mode: {status['mode']}")
@@ -394,12 +1570,14 @@ def print_menu():
     print("  P - Get current position")
     print("  0 - Reset position to 0,0")
     print("  V - Set speed")
+    print("  L - Set acceleration")
     print("  X - Stop all motors")
     print("  + - Enable motors")
     print("  - - Disable motors")
     print("  ? - Show status")
     print("  M - Show this menu")
     print("  C - Clear position display")
+    print("  JOG - Continuous jog mode (hold keys to move)")
     print("  QUIT - Exit program")
     print("="*60)
     print("\nNOTE: AZ uses differential control - both motors move")
@@ -407,48 +1585,158 @@ def print_menu():
     print("="*60)
 
 
+# Jog keys (same letters as the menu): axis, direction and step preset
+JOG_KEYS = {
+    'q': ('ALT', 1, 'FINE_STEP'), 'w': ('ALT', 1, 'SMALL_STEP'),
+    'e': ('ALT', 1, 'MEDIUM_STEP'), 'r': ('ALT', 1, 'LARGE_STEP'),
+    'a': ('ALT', -1, 'FINE_STEP'), 's': ('ALT', -1, 'SMALL_STEP'),
+    'd': ('ALT', -1, 'MEDIUM_STEP'), 'f': ('ALT', -1, 'LARGE_STEP'),
+    't': ('AZ', -1, 'FINE_STEP'), 'y': ('AZ', -1, 'SMALL_STEP'),
+    'u': ('AZ', -1, 'MEDIUM_STEP'), 'i': ('AZ', -1, 'LARGE_STEP'),
+    'g': ('AZ', 1, 'FINE_STEP'), 'h': ('AZ', 1, 'SMALL_STEP'),
+    'j': ('AZ', 1, 'MEDIUM_STEP'), 'k': ('AZ', 1, 'LARGE_STEP'),
+}
+
+# Seconds of motion key presses may queue up while a move is running, so
+# a held key does not keep the mount moving long after it is released
+JOG_MAX_QUEUED = 0.5
+
+# Steps between telemetry reports while jogging
+JOG_TELEMETRY_INTERVAL = 25
+
+
+def jog(controller):
+    """
+    Continuous jog mode: move while keys are held down
+    
+    The terminal is read a key at a time and each key press is sent
+    through a MoveQueue, so repeats that arrive while a move is still
+    running are merged into one larger move per axis, which starts as
+    soon as the running one finishes. The position line is redrawn in
+    place from telemetry while the mount moves.
+    
+    Args:
+        controller: Connected PolarAlignController (or mount daemon client)
+    """
+    if termios is None or not sys.stdin.isatty():
+        print("Jog mode needs an interactive POSIX terminal")
+        return
+    
+    print("\nJOG MODE - hold a movement key (same keys as the menu) to move")
+    print("  SPACE - stop    ENTER / ESC - leave jog mode\n")
+    
+    # Live positions while moving, restored when jog mode ends
+    telemetry = controller.telemetry_interval
+    if not telemetry:
+        controller.set_telemetry(JOG_TELEMETRY_INTERVAL)
+    
+    moves = MoveQueue(controller)
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    
+    try:
+        tty.setcbreak(fd)
+        while True:
+            ready, _, _ = select.select([sys.stdin], [], [], 0.05)
+            keys = os.read(fd, 64).decode(errors='ignore') if ready else ''
+            
+            if any(key in '\r\n\x1b' for key in keys):
+                break
+            if ' ' in keys:
+                moves.stop()
+                keys = ''
+            
+            limit = max(controller.LARGE_STEP, int(controller.current_speed * JOG_MAX_QUEUED))
+            for key in keys.lower():
+                if key not in JOG_KEYS:
+                    continue
+                axis, direction, preset = JOG_KEYS[key]
+                queued = moves.pending_steps()[axis]
+                steps = max(-limit, min(limit, queued + direction * getattr(controller, preset)))
+                if steps != queued:
+                    moves.submit(axis, steps - queued)
+            
+            moving = moves.current
+            if moving and controller.live_position:
+                alt, az = controller.live_position
+            else:
+                alt, az = controller.alt_position, controller.az_position
+            state = f"{moving.axis} {moving.steps:+d}" if moving else 'idle'
+            sys.stdout.write(f"\r  ALT: {alt:+8d}   AZ: {az:+8d}   [{state}]\x1b[K")
+            sys.stdout.flush()
+    
+    except KeyboardInterrupt:
+        moves.stop()
+    
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        # Drop key presses not yet sent and let the running move finish
+        moves.close()
+        moves.wait_idle()
+        if not telemetry:
+            controller.set_telemetry(0)
+        print("\n\nLeft jog mode")
+        controller.update_position(force=True)
+        alt, az = controller.alt_position, controller.az_position
+        print(f"Position - ALT: {alt} steps, AZ: {az} steps")
+
+
 def main():
     """Main control loop"""
     print("Star Adventurer GTi Polar Alignment Controller")
     print("Version 2.0 - Differential AZ Control")
     print("3 Motors: ALT + AZ West + AZ East\n")
     
-    # Create controller
-    controller = PolarAlignController()
-    
-    # List available ports
-    ports = controller.list_ports()
-    if ports:
-        print("Available serial ports:")
-        for i, port in enumerate(ports):
-            print(f"  {i+1}. {port}")
-        print()
+    # Optional port on the command line (e.g. a firmware_simulator.py pty),
+    # or --daemon [socket] to share the session of a running mount_daemon.py
+    args = sys.argv[1:]
+    daemon = bool(args) and args[0] == '--daemon'
     
-    # Connect
-    print("Attempting to connect...")
-    if not controller.connect():
-        print("Failed to connect to controller")
+    if daemon:
+        from mount_daemon import DEFAULT_SOCKET, MountClient
+        controller = MountClient(args[1] if len(args) > 1 else DEFAULT_SOCKET)
+        if not controller.connect():
+            print("Failed to connect to mount daemon")
+            return
+    else:
+        port = args[0] if args else None
+        
+        # Create controller
+        controller = PolarAlignController()
         
-        # Manual port selection
+        # List available ports
+        ports = controller.list_ports()
         if ports:
-            try:
-                choice = input("Enter port number to try manually (or 'q' to quit): ")
-                if choice.lower() == 'q':
-                    return
-                
-                port_idx = int(choice) - 1
-                if 0 <= port_idx < len(ports):
-                    if not controller.connect(ports[port_idx]):
-                        print("Connection failed. Exiting.")
+            print("Available serial ports:")
+            for i, name in enumerate(ports):
+                print(f"  {i+1}. {name}")
+            print()
+        
+        # Connect
+        print("Attempting to connect...")
+        if not controller.connect(port):
+            print("Failed to connect to controller")
+            
+            # Manual port selection
+            if ports:
+                try:
+                    choice = input("Enter port number to try manually (or 'q' to quit): ")
+                    if choice.lower() == 'q':
                         return
-                else:
-                    print("Invalid port number. Exiting.")
+                    
+                    port_idx = int(choice) - 1
+                    if 0 <= port_idx < len(ports):
+                        if not controller.connect(ports[port_idx]):
+                            print("Connection failed. Exiting.")
+                            return
+                    else:
+                        print("Invalid port number. Exiting.")
+                        return
+                except ValueError:
+                    print("Invalid input. Exiting.")
                     return
-            except ValueError:
-                print("Invalid input. Exiting.")
+            else:
                 return
-        else:
-            return
     
     # Show menu
     print_menu()
@@ -512,6 +1800,13 @@ def main():
                 except ValueError:
                     print("Invalid speed value")
             
+            elif command == 'L':
+                try:
+                    accel = int(input("Enter acceleration (0-32767 steps/sec^2, 0 = none): "))
+                    controller.set_acceleration(accel)
+                except ValueError:
+                    print("Invalid acceleration value")
+            
             elif command == 'X':
                 controller.stop()
             
@@ -532,6 +1827,9 @@ def main():
                 print("\n" * 50)
                 print_menu()
             
+            elif command == 'JOG':
+                jog(controller)
+            
             elif command == 'QUIT' or command == 'EXIT':
                 break
             
@@ -542,9 +1840,10 @@ def main():
         print("\n\nInterrupted by user")
     
     finally:
-        # Cleanup
-        controller.stop()
-        controller.enable_motors(False)
+        # Cleanup (other daemon clients may still be using the motors)
+        if not daemon:
+            controller.stop()
+            controller.enable_motors(False)
         controller.disconnect()
         print("Goodbye!")
 
@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Star Adventurer GTi - Controller Protocol Codec
+
+Parsers for the text replies of both firmware versions, and encoding and
+decoding for the optional binary framed protocol spoken by the v3
+calibration firmware. PolarAlignController, the calibration wizard and
+AutoPA all read replies through this module.
+
+TEXT REPLIES:
+------------
+  Reply            v2 firmware               v3 firmware
+  Position         POS:ALT:1234:AZ:-56       POS:ALT=1234,AZ=-56
+  Move ack         OK:ALT_MOVE:100           OK:ALT_MOVE
+  Combined move    OK:MOVE:100,-40           OK:MOVE
+  Speed ack        OK:SPEED:800              OK:SPEED=800
+  Accel ack        OK:ACCEL:1000             OK:ACCEL=1000
+  Status block     STATUS: ... AZ Mode: ...  === STATUS === ... =====
+  Calibration      (none)                    === CALIBRATION DATA === ...
+  Telemetry        T:1234,-56                T:1234,-56
+
+The parsers are precompiled and check a line's prefix before running any
+regex. Run this module directly for a parse-throughput benchmark.
+
+BINARY FRAMES:
+-------------
+The host switches the firmware over with the text command "!BIN" (reply
+"OK:BINARY"). From then on both sides exchange fixed-size frames:
+  
+  Command (host -> Arduino), 8 bytes:
+    0xA5 | seq | opcode | int32 param (little endian) | crc8
+  
+  Reply (Arduino -> host), 13 bytes:
+    0x5A | seq | opcode | status | int32 a | int32 b | crc8
+
+The CRC-8 (polynomial 0x07) covers every byte after the sync byte. The
+opcode is the ASCII letter of the matching text command, and seq is
+echoed back so pipelined replies can be matched. Opcode 'X' returns the
+firmware to the text protocol. The combined move "M<alt>,<az>" packs both
+step counts into the parameter as int16 values (ALT in the low half). With
+telemetry on, moves also produce
+unsolicited 'T' frames (seq 0, status STATUS_TELEMETRY) carrying both
+positions.
+
+Replies are translated back to the equivalent text reply (e.g.
+"POS:ALT:12:AZ:-4"), so PolarAlignController behaves the same in both
+modes.
+
+Author: Polar Align Automation Project
+"""
+
+import re
+import struct
+import time
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+
+# ============================================
+# TEXT REPLIES
+# ============================================
+
+# Reply prefixes that complete each command, keyed by command letter.
+# Commands not listed here complete on the first line that arrives.
+REPLY_PREFIXES = {
+    'A': ('OK:ALT_MOVE',),
+    'Z': ('OK:AZ_MOVE',),
+    'M': ('OK:MOVE',),
+    'S': ('OK:STOPPED',),
+    'E': ('OK:ENABLED',),
+    'D': ('OK:DISABLED',),
+    'R': ('OK:RESET',),
+    'V': ('OK:SPEED',),
+    'C': ('OK:ACCEL',),
+    'T': ('OK:TELEMETRY',),
+    'P': ('POS:',),
+    'CAL:': ('OK:',),
+}
+
+# Commands that reply with a multi-line block, keyed by command, with the
+# line prefixes that open the block (v2 and v3 firmware formats)
+BLOCK_REPLIES = {
+    '?': ('STATUS:', '=== STATUS'),
+    'CAL:SHOW': ('=== CALIBRATION',),
+}
+
+# POS:ALT:1234:AZ:-56 (v2) or POS:ALT=1234,AZ=-56 (v3)
+POSITION_PATTERN = re.compile(r'POS:ALT[:=](-?\d+)[:,]AZ[:=](-?\d+)')
+# T:1234,-56 telemetry pushed by the firmware while moving
+TELEMETRY_PATTERN = re.compile(r'T:(-?\d+),(-?\d+)')
+# OK:ENABLED, OK:ALT_MOVE:100 (v2), OK:SPEED=800 (v3)
+ACK_PATTERN = re.compile(r'OK:([A-Z_]+)(?:[:=](-?\d+))?')
+# "Name: value" lines inside STATUS and CAL:SHOW blocks
+FIELD_PATTERN = re.compile(r'\s*([A-Za-z/ ]+?):\s*(-?[\d.]+)')
+# v3 status "Position: ALT=1234, AZ=-56"
+STATUS_POSITION_PATTERN = re.compile(r'Position:\s*ALT=(-?\d+),\s*AZ=(-?\d+)')
+
+Ack = namedtuple('Ack', 'name value')
+
+
+def expected_reply(command: str) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """
+    Look up how a command's reply is recognised
+    
+    Args:
+        command: Command string (without sequence tag)
+    
+    Returns:
+        (reply line prefixes, block opening prefixes); either may be None
+    """
+    key = command.strip().upper()
+    if key.startswith('CAL:'):
+        expect = REPLY_PREFIXES['CAL:']
+    else:
+        expect = REPLY_PREFIXES.get(key[:1])
+    return expect, BLOCK_REPLIES.get(key)
+
+
+def is_block_end(line: str) -> bool:
+    """Check whether a line closes a multi-line STATUS or CAL:SHOW block"""
+    return line.startswith('AZ Mode:') or (len(line) >= 3 and set(line) == {'='})
+
+
+def is_reply_complete(command: str, lines: List[str]) -> bool:
+    """
+    Check whether the lines read so far hold a command's complete reply
+    
+    For simple readers that send one command at a time; unrelated lines
+    (INFO notes, banners) may be mixed in.
+    
+    Args:
+        command: Command that was sent
+        lines: Stripped reply lines received since
+    
+    Returns:
+        True once the reply is complete
+    """
+    if not lines:
+        return False
+    if lines[-1].startswith('ERROR:'):
+        return True
+    
+    expect, block = expected_reply(command)
+    if block:
+        opened = any(line.startswith(block) for line in lines)
+        return opened and is_block_end(lines[-1])
+    if expect is None:
+        return True
+    return any(line.startswith(expect) for line in lines)
+
+
+def parse_tag(line: str) -> Optional[int]:
+    """
+    Parse a "#<seq>" sequence tag echo
+    
+    Returns:
+        Sequence number, or None if the line is not a tag echo
+    """
+    if line.startswith('#') and line[1:].isdigit():
+        return int(line[1:])
+    return None
+
+
+def parse_position(line: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse a position reply in either firmware format
+    
+    Args:
+        line: Reply line (or a multi-line reply containing it)
+    
+    Returns:
+        (altitude, azimuth) steps, or None if there is no position reply
+    """
+    start = line.find('POS:')
+    if start < 0:
+        return None
+    match = POSITION_PATTERN.match(line, start)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_telemetry(line: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse a "T:<alt>,<az>" telemetry line
+    
+    Returns:
+        (altitude, azimuth) steps, or None for other lines
+    """
+    if not line.startswith('T:'):
+        return None
+    match = TELEMETRY_PATTERN.match(line)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_ack(line: str) -> Optional[Ack]:
+    """
+    Parse an "OK:" acknowledgement
+    
+    Args:
+        line: Reply line
+    
+    Returns:
+        Ack(name, value) with value None when the firmware sends none
+        (e.g. Ack('SPEED', 800), Ack('ALT_MOVE', None)), or None
+    """
+    if not line.startswith('OK:'):
+        return None
+    match = ACK_PATTERN.match(line)
+    if not match:
+        return None
+    value = match.group(2)
+    return Ack(match.group(1), int(value) if value is not None else None)
+
+
+def parse_error(line: str) -> Optional[str]:
+    """
+    Parse an "ERROR:" reply
+    
+    Returns:
+        Error text after the prefix, or None for other lines
+    """
+    if line.startswith('ERROR:'):
+        return line[6:]
+    return None
+
+
+def parse_calibration(text: str) -> Optional[dict]:
+    """
+    Parse a CAL:SHOW block in one pass
+    
+    Args:
+        text: Reply text (lines separated by newlines)
+    
+    Returns:
+        Dictionary with calibrated, alt_steps_per_arcsec,
+        az_steps_per_arcsec, alt_backlash, az_backlash, max_speed and
+        acceleration (only the fields found), or None if the text holds no
+        calibration block
+    """
+    if not text or '=== CALIBRATION' not in text:
+        return None
+    
+    cal = {}
+    section = None
+    for line in text.split('\n'):
+        line = line.strip()
+        if line.startswith('Calibrated:'):
+            cal['calibrated'] = line.endswith('YES')
+            continue
+        if line.startswith('Steps per arcsecond'):
+            section = 'steps_per_arcsec'
+            continue
+        if line.startswith('Backlash'):
+            section = 'backlash'
+            continue
+        
+        match = FIELD_PATTERN.match(line)
+        if not match:
+            continue
+        name, value = match.group(1), match.group(2)
+        if name == 'Max Speed':
+            cal['max_speed'] = int(float(value))
+        elif name == 'Acceleration':
+            cal['acceleration'] = int(float(value))
+        elif name in ('ALT', 'AZ') and section == 'steps_per_arcsec':
+            cal[f'{name.lower()}_steps_per_arcsec'] = float(value)
+        elif name in ('ALT', 'AZ') and section == 'backlash':
+            cal[f'{name.lower()}_backlash'] = int(float(value))
+    
+    return cal
+
+
+def parse_status(text: str) -> Optional[dict]:
+    """
+    Parse a status block from either firmware in one pass
+    
+    Args:
+        text: Reply text (lines separated by newlines)
+    
+    Returns:
+        Dictionary with firmware ('v2' or 'v3'), alt_position, az_position,
+        speed and, where reported, acceleration / calibrated / microsteps /
+        steps_per_rev;
+        None if the text holds no status block
+    """
+    if not text:
+        return None
+    if '=== STATUS' in text:
+        status = {'firmware': 'v3'}
+    elif 'STATUS:' in text:
+        status = {'firmware': 'v2'}
+    else:
+        return None
+    
+    for line in text.split('\n'):
+        line = line.strip()
+        if line.startswith('Calibrated:'):
+            status['calibrated'] = line.endswith('YES')
+            continue
+        if line.startswith('Position:'):
+            match = STATUS_POSITION_PATTERN.match(line)
+            if match:
+                status['alt_position'] = int(match.group(1))
+                status['az_position'] = int(match.group(2))
+            continue
+        
+        match = FIELD_PATTERN.match(line)
+        if not match:
+            continue
+        name, value = match.group(1), match.group(2)
+        if name == 'ALT Position':
+            status['alt_position'] = int(value)
+        elif name == 'AZ Position':
+            status['az_position'] = int(value)
+        elif name == 'Speed':
+            status['speed'] = int(value)
+        elif name == 'Acceleration':
+            status['acceleration'] = int(value)
+        elif name == 'Microsteps':
+            status['microsteps'] = int(value)
+        elif name == 'Steps/Rev':
+            status['steps_per_rev'] = int(value)
+    
+    return status
+
+
+# ============================================
+# BINARY FRAMES
+# ============================================
+
+# Text command that switches the firmware to binary frames, and its reply
+BINARY_HANDSHAKE = '!BIN'
+BINARY_ACK = 'OK:BINARY'
+
+FRAME_COMMAND_SYNC = 0xA5
+FRAME_REPLY_SYNC = 0x5A
+
+# sync, seq, opcode, param, crc
+COMMAND_FRAME = struct.Struct('<BBBiB')
+# sync, seq, opcode, status, a, b, crc
+REPLY_FRAME = struct.Struct('<BBBBiiB')
+
+# Reply status codes
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_BAD_CRC = 2
+STATUS_UNKNOWN = 3
+# Unsolicited telemetry frame (opcode 'T', a = ALT, b = AZ, seq 0)
+STATUS_TELEMETRY = 4
+
+# Opcode that leaves binary mode
+OPCODE_TEXT_MODE = ord('X')
+
+# Text commands that have a binary opcode; the rest (CAL:*, H, B) are
+# text-only
+BINARY_OPCODES = frozenset('AZMSEDPRVCT?X')
+
+# Largest step count per axis a binary combined move can carry
+MAX_FRAME_MOVE = 0x7FFF
+
+ReplyFrame = namedtuple('ReplyFrame', 'seq opcode status a b')
+
+
+def _crc8_table() -> bytes:
+    """Build the lookup table for CRC-8 with polynomial 0x07"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data: bytes) -> int:
+    """
+    CRC-8 (polynomial 0x07, initial value 0), as computed by the firmware
+    
+    Args:
+        data: Bytes to checksum
+    
+    Returns:
+        Checksum byte
+    """
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_command(seq: int, opcode: str, param: int = 0) -> bytes:
+    """
+    Build a binary command frame
+    
+    Args:
+        seq: Sequence number (0-255) echoed in the reply
+        opcode: Command letter ('A', 'Z', 'P', ...)
+        param: Signed 32-bit parameter (steps, speed)
+    
+    Returns:
+        8-byte frame
+    """
+    body = COMMAND_FRAME.pack(FRAME_COMMAND_SYNC, seq & 0xFF, ord(opcode), param, 0)
+    return body[:-1] + bytes([crc8(body[1:-1])])
+
+
+def parse_move_both(param: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse the "<alt>,<az>" parameter of a combined move command
+    
+    Returns:
+        (altitude, azimuth) steps, or None if the parameter is malformed
+    """
+    alt, sep, az = param.partition(',')
+    if not sep:
+        return None
+    try:
+        return int(alt), int(az)
+    except ValueError:
+        return None
+
+
+def pack_move_param(alt: int, az: int) -> Optional[int]:
+    """
+    Pack the steps of a combined move into one binary frame parameter
+    
+    Returns:
+        Signed 32-bit parameter (ALT in the low 16 bits, AZ in the high
+        16 bits), or None if either count does not fit in an int16
+    """
+    if abs(alt) > MAX_FRAME_MOVE or abs(az) > MAX_FRAME_MOVE:
+        return None
+    packed = (alt & 0xFFFF) | ((az & 0xFFFF) << 16)
+    return packed - (1 << 32) if packed & 0x80000000 else packed
+
+
+def unpack_move_param(param: int) -> Tuple[int, int]:
+    """Split a combined move frame parameter into (alt, az) steps"""
+    alt = param & 0xFFFF
+    az = (param >> 16) & 0xFFFF
+    return (alt - 0x10000 if alt & 0x8000 else alt,
+            az - 0x10000 if az & 0x8000 else az)
+
+
+def encode_text_command(command: str, seq: int) -> Optional[bytes]:
+    """
+    Translate a text command such as "A-200" into a binary frame
+    
+    Args:
+        command: Text command
+        seq: Sequence number (0-255)
+    
+    Returns:
+        8-byte frame, or None if the command has no binary form
+    """
+    command = command.strip().upper()
+    if not command or command[0] not in BINARY_OPCODES:
+        return None
+    
+    if command[0] == 'M':
+        steps = parse_move_both(command[1:])
+        param = pack_move_param(*steps) if steps else None
+        if param is None:
+            return None
+        return encode_command(seq, 'M', param)
+    
+    param = 0
+    if len(command) > 1:
+        try:
+            param = int(command[1:])
+        except ValueError:
+            return None
+    return encode_command(seq, command[0], param)
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for reply frames
+    
+    Bytes are fed in as they arrive from the port. Complete frames with a
+    valid CRC are returned; anything else is skipped one byte at a time
+    until the stream lines up with a sync byte again.
+    """
+    
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+    
+    def feed(self, data: bytes) -> List[ReplyFrame]:
+        """
+        Add received bytes and return the frames completed by them
+        
+        Args:
+            data: Bytes read from the port
+        
+        Returns:
+            Decoded frames, in arrival order
+        """
+        self.buffer.extend(data)
+        frames = []
+        size = REPLY_FRAME.size
+        
+        while True:
+            start = self.buffer.find(FRAME_REPLY_SYNC)
+            if start < 0:
+                self.buffer.clear()
+                break
+            if start:
+                del self.buffer[:start]
+            if len(self.buffer) < size:
+                break
+            
+            raw = bytes(self.buffer[:size])
+            if crc8(raw[1:-1]) != raw[-1]:
+                # Not a frame boundary (or corrupted): resync past this byte
+                self.crc_errors += 1
+                del self.buffer[:1]
+                continue
+            
+            del self.buffer[:size]
+            _, seq, opcode, status, a, b, _ = REPLY_FRAME.unpack(raw)
+            frames.append(ReplyFrame(seq, chr(opcode), status, a, b))
+        
+        return frames
+
+
+def frame_to_text(frame: ReplyFrame) -> List[str]:
+    """
+    Translate a reply frame into the text reply lines the firmware would
+    have sent for the same command
+    
+    Args:
+        frame: Decoded reply frame
+    
+    Returns:
+        Reply lines
+    """
+    if frame.status == STATUS_TELEMETRY:
+        return [f'T:{frame.a},{frame.b}']
+    if frame.status == STATUS_BAD_CRC:
+        return ['ERROR:BAD_CRC']
+    if frame.status == STATUS_UNKNOWN:
+        return [f'ERROR:UNKNOWN_COMMAND:{frame.opcode}']
+    if frame.status != STATUS_OK:
+        return [f'ERROR:{frame.opcode}:{frame.a}']
+    
+    op = frame.opcode
+    if op == 'A':
+        return [f'OK:ALT_MOVE:{frame.a}']
+    if op == 'Z':
+        return [f'OK:AZ_MOVE:{frame.a}']
+    if op == 'M':
+        return [f'OK:MOVE:{frame.a},{frame.b}']
+    if op == 'P':
+        return [f'POS:ALT:{frame.a}:AZ:{frame.b}']
+    if op == 'V':
+        return [f'OK:SPEED:{frame.a}']
+    if op == 'C':
+        return [f'OK:ACCEL:{frame.a}']
+    if op == 'T':
+        return [f'OK:TELEMETRY:{frame.a}']
+    if op == '?':
+        return ['=== STATUS ===',
+                f'Speed: {frame.a}',
+                f"Calibrated: {'YES' if frame.b else 'NO'}",
+                '==============']
+    simple = {
+        'S': 'OK:STOPPED',
+        'E': 'OK:ENABLED',
+        'D': 'OK:DISABLED',
+        'R': 'OK:RESET',
+        'X': 'OK:TEXT',
+    }
+    return [simple.get(op, f'OK:{op}')]
+
+
+# ============================================
+# PARSE BENCHMARK
+# ============================================
+
+SAMPLE_REPLIES = {
+    'position v2': (parse_position, 'POS:ALT:123456:AZ:-7890'),
+    'position v3': (parse_position, 'POS:ALT=123456,AZ=-7890'),
+    'ack v2': (parse_ack, 'OK:ALT_MOVE:1600'),
+    'ack v3': (parse_ack, 'OK:SPEED=800'),
+    'tag': (parse_tag, '#1234'),
+    'telemetry': (parse_telemetry, 'T:123456,-7890'),
+    'status v2': (parse_status, '\n'.join([
+        'STATUS:', 'ALT Position: 800', 'AZ Position: -40 (+ = East, - = West)',
+        'Speed: 800 steps/sec', 'Microsteps: 16', 'Steps/Rev: 3200',
+        'AZ Mode: DIFFERENTIAL (synchronized opposing screws)'])),
+    'status v3': (parse_status, '\n'.join([
+        '=== STATUS ===', 'Firmware: v3.0 with Calibration',
+        'Position: ALT=800, AZ=-40', 'Speed: 800', 'Calibrated: YES',
+        '=============='])),
+    'calibration': (parse_calibration, '\n'.join([
+        '=== CALIBRATION DATA ===', 'Calibrated: YES', '',
+        'Steps per arcsecond:', 'ALT: 89.50 steps/arcsec', 'AZ:  25.00 steps/arcsec', '',
+        'Backlash:', 'ALT: 12 steps', 'AZ:  30 steps', '',
+        'Max Speed: 1000 steps/sec', 'Acceleration: 1000 steps/sec^2',
+        '========================'])),
+}
+
+
+def benchmark_parsers(iterations: int = 100000) -> dict:
+    """
+    Measure parse throughput for each reply type
+    
+    Args:
+        iterations: Parses per reply type
+    
+    Returns:
+        Parses per second, keyed by reply type
+    """
+    results = {}
+    for name, (parser, sample) in SAMPLE_REPLIES.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parser(sample)
+        results[name] = iterations / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"Parse throughput ({count} iterations each):")
+    for name, rate in benchmark_parsers(count).items():
+        print(f"  {name:<14}{rate:>14,.0f} parses/sec")
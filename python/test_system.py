@@ -318,8 +318,8 @@ def test_status_query(ser):
         print_fail("Status query failed")
         return False
 
-def run_all_tests():
-    """Run complete test suite"""
+def run_all_tests(port=None):
+    """Run complete test suite (on the given port, or a detected one)"""
     print(f"\n{Colors.HEADER}{'='*60}")
     print("Star Adventurer GTi Polar Alignment Controller")
     print("System Diagnostic Test Suite")
@@ -334,12 +334,14 @@ def run_all_tests():
     
     # Test 1: Serial ports
     ports = test_serial_ports()
-    if not ports:
+    if not ports and not port:
         print_fail("Cannot proceed without serial port")
         return
     
     # If multiple ports, ask user to select
-    if len(ports) > 1:
+    if port:
+        selected_port = port
+    elif len(ports) > 1:
         try:
             choice = input(f"\n{Colors.BOLD}Select port number (1-{len(ports)}): {Colors.ENDC}")
             port_idx = int(choice) - 1
@@ -414,7 +416,7 @@ def run_all_tests():
 
 if __name__ == "__main__":
     try:
-        run_all_tests()
+        run_all_tests(sys.argv[1] if len(sys.argv) > 1 else None)
     except KeyboardInterrupt:
         print(f"\n\n{Colors.WARNING}Test interrupted by user{Colors.ENDC}")
     except Exception as e:
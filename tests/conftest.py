@@ -0,0 +1,13 @@
+"""
+The tools are plain scripts that import each other from their own
+folders, so put both folders on the import path.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ('python', 'calibration'):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
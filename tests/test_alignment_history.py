@@ -0,0 +1,75 @@
+"""
+Bulk extraction of past alignment solves
+"""
+
+import pytest
+
+from alignment_history import extract, find_logs, load_history, plan_chunks, save_history
+
+
+def sharpcap_line(timestamp, alt, az):
+    return f"Info\t{timestamp}\tPolar align AltAzCor=Alt={alt},Az={az}\n"
+
+
+@pytest.fixture
+def logs(tmp_path):
+    # Two solves, a 20 minute gap (new session), then one more; noise lines
+    # in between so chunks split mid-file
+    sharpcap = tmp_path / 'sharpcap' / 'session.log'
+    sharpcap.parent.mkdir()
+    sharpcap.write_text(
+        sharpcap_line('21:00:00.000000', '1.0', '0.5')
+        + "Info\t21:00:01.000000\tnoise line\n" * 20
+        + sharpcap_line('21:00:10.000000', '0.5', '-0.5')
+        + sharpcap_line('21:20:10.000000', '0.1', '0.0'))
+    nina = tmp_path / '2024-03-01.log'
+    nina.write_text('23:59:50.000 - {"Alt": 4.0, "Az": 3.0, "Total": 5.0}\n'
+                    '00:00:05.000 - {"Alt": 2.0, "Az": 0.0, "Total": 2.0}\n')
+    return tmp_path, sharpcap, nina
+
+
+def test_chunks_end_on_line_boundaries(logs):
+    _, sharpcap, _ = logs
+    data = sharpcap.read_bytes()
+    chunks = plan_chunks(sharpcap, chunk_size=100)
+    assert len(chunks) > 1
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(data)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+        assert data[end - 1:end] == b'\n'
+
+
+def test_extract_solves_and_sessions(logs):
+    root, sharpcap, nina = logs
+    found = find_logs([str(root)])
+    assert found == sorted([sharpcap, nina])
+
+    columns = extract(found, jobs=1, chunk_size=100)
+    rows = list(zip(columns['source'], columns['session'], columns['timestamp'],
+                    columns['alt_error'], columns['az_error']))
+    nina_index = columns['sources'].index(str(nina))
+    sharpcap_index = columns['sources'].index(str(sharpcap))
+
+    # The NINA solves 15 s apart across midnight stay in one session; the
+    # SharpCap log starts a new one, and its 20 minute gap another
+    assert [r for r in rows if r[0] == nina_index] == [
+        (nina_index, 0, '23:59:50.000', 4.0, 3.0),
+        (nina_index, 0, '00:00:05.000', 2.0, 0.0),
+    ]
+    assert [r for r in rows if r[0] == sharpcap_index] == [
+        (sharpcap_index, 1, '21:00:00.000000', 60.0, 30.0),
+        (sharpcap_index, 1, '21:00:10.000000', 30.0, -30.0),
+        (sharpcap_index, 2, '21:20:10.000000', pytest.approx(6.0), 0.0),
+    ]
+
+
+def test_history_round_trip(logs, tmp_path):
+    root, _, _ = logs
+    columns = extract(find_logs([str(root)]), jobs=1)
+    output = tmp_path / 'history.zip'
+    save_history(columns, str(output))
+
+    loaded = load_history(str(output))
+    assert loaded['sources'] == columns['sources']
+    for name in ('source', 'session', 'timestamp', 'alt_error', 'az_error', 'total_error'):
+        assert list(loaded[name]) == columns[name]
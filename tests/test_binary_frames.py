@@ -0,0 +1,108 @@
+"""
+Binary frame codec and routing of decoded frames
+"""
+
+from polar_align_control import PendingCommand, PolarAlignController
+from polar_align_protocol import (COMMAND_FRAME, FRAME_COMMAND_SYNC, FRAME_REPLY_SYNC,
+                                  REPLY_FRAME, STATUS_BAD_CRC, STATUS_OK, FrameDecoder,
+                                  crc8, encode_text_command, frame_to_text, unpack_move_param)
+
+
+def reply(seq, opcode, status=STATUS_OK, a=0, b=0):
+    body = REPLY_FRAME.pack(FRAME_REPLY_SYNC, seq, ord(opcode), status, a, b, 0)
+    return body[:-1] + bytes([crc8(body[1:-1])])
+
+
+def test_crc8_check_value():
+    # CRC-8 (poly 0x07, init 0) of "123456789"
+    assert crc8(b'123456789') == 0xF4
+
+
+def test_text_command_encodes_to_frame():
+    frame = encode_text_command("a-200", 7)
+    sync, seq, opcode, param, crc = COMMAND_FRAME.unpack(frame)
+    assert (sync, seq, chr(opcode), param) == (FRAME_COMMAND_SYNC, 7, 'A', -200)
+    assert crc == crc8(frame[1:-1])
+
+
+def test_combined_move_packs_both_axes():
+    frame = encode_text_command("M-300,1200", 1)
+    _, _, opcode, param, _ = COMMAND_FRAME.unpack(frame)
+    assert chr(opcode) == 'M'
+    assert unpack_move_param(param) == (-300, 1200)
+    # Each axis must fit in an int16
+    assert encode_text_command("M40000,0", 1) is None
+
+
+def test_text_only_commands_have_no_frame():
+    assert encode_text_command("CAL:SHOW", 1) is None
+    assert encode_text_command("Vfast", 1) is None
+
+
+def test_reply_frames_decode_to_text_replies():
+    decoder = FrameDecoder()
+    frames = decoder.feed(reply(3, 'A', a=-200) + reply(4, 'P', a=150, b=-25))
+    assert [f.seq for f in frames] == [3, 4]
+    assert frame_to_text(frames[0]) == ['OK:ALT_MOVE:-200']
+    assert frame_to_text(frames[1]) == ['POS:ALT:150:AZ:-25']
+
+
+def test_frames_split_across_reads():
+    decoder = FrameDecoder()
+    data = reply(9, 'S')
+    assert decoder.feed(data[:5]) == []
+    frames = decoder.feed(data[5:])
+    assert frame_to_text(frames[0]) == ['OK:STOPPED']
+
+
+def test_corrupted_frame_is_dropped_and_stream_resyncs():
+    decoder = FrameDecoder()
+    bad = bytearray(reply(1, 'A', a=100))
+    bad[5] ^= 0x01
+    frames = decoder.feed(bytes(bad) + reply(2, 'Z', a=50))
+    assert [frame_to_text(f) for f in frames] == [['OK:AZ_MOVE:50']]
+    assert decoder.crc_errors >= 1
+
+
+def binary_controller():
+    controller = PolarAlignController()
+    controller.binary = True
+    controller._decoder = FrameDecoder()
+    return controller
+
+
+def register(controller, command, tag):
+    pending = PendingCommand(command, tag)
+    controller.router.register(pending)
+    return pending
+
+
+def test_bad_crc_reply_with_corrupted_seq_goes_to_oldest_command():
+    controller = binary_controller()
+    move = register(controller, "A100", 5)
+    query = register(controller, "P", 6)
+
+    # The firmware could not read the seq byte of the A frame, so its
+    # error echoes a seq nobody is waiting for
+    controller._consume(bytearray(reply(0xEE, 'A', STATUS_BAD_CRC)))
+    assert not move.done() and not query.done()
+
+    # The next echo completes both, the move with its error
+    controller._consume(bytearray(reply(6, 'P', a=1, b=2)))
+    assert move.wait(0.01) == 'ERROR:BAD_CRC'
+    assert query.wait(0.01) == 'POS:ALT:1:AZ:2'
+    assert controller.router.messages.empty()
+
+
+def test_reply_lost_to_host_crc_error_times_out_alone():
+    controller = binary_controller()
+    move = register(controller, "A100", 5)
+    query = register(controller, "P", 6)
+
+    bad = bytearray(reply(5, 'A', a=100))
+    bad[-1] ^= 0xFF
+    controller._consume(bad + reply(6, 'P', a=100, b=0))
+
+    # The P echo tells the router the A reply is never coming
+    assert move.wait(0.01) is None
+    assert query.wait(0.01) == 'POS:ALT:100:AZ:0'
@@ -0,0 +1,56 @@
+"""
+Kalman filtering of solved errors and the correction dead-band
+"""
+
+import pytest
+
+from error_filter import ErrorFilter
+
+
+def test_first_solve_is_taken_as_is():
+    f = ErrorFilter(solve_noise=3.0, drift_noise=1.0)
+    assert f.update(30, -12) == (30.0, -12.0)
+    assert f.sigma(0) == pytest.approx(3.0)
+
+
+def test_second_solve_is_blended_by_kalman_gain():
+    f = ErrorFilter(solve_noise=3.0, drift_noise=1.0)
+    f.update(30, -12)
+    alt, az = f.update(34, -12)
+    # Predicted variance 9 + 1 = 10, gain 10 / (10 + 9)
+    assert alt == pytest.approx(30 + 4 * 10 / 19)
+    assert az == pytest.approx(-12.0)
+    assert f.variance[0] == pytest.approx(9 / 19 * 10)
+    assert f.samples == 2
+
+
+def test_outlier_restarts_axis_from_solve():
+    f = ErrorFilter(solve_noise=3.0, drift_noise=1.0)
+    f.update(30, -12)
+    # 30" from the estimate > 5 sigma (sqrt(5^2 * 19) = 21.8")
+    alt, az = f.update(60, -13)
+    assert alt == 60.0
+    assert f.variance[0] == pytest.approx(9.0)
+    # The other axis is still blended
+    assert az == pytest.approx(-12 - 10 / 19)
+
+
+def test_move_shifts_estimate_and_widens_uncertainty():
+    f = ErrorFilter(solve_noise=3.0, drift_noise=1.0, move_uncertainty=0.5)
+    f.update(30, -12)
+    f.predict_move((20, -10))
+    assert f.estimate == pytest.approx([10.0, -2.0])
+    # 9 + (0.5 * 20)^2 and 9 + (0.5 * 10)^2
+    assert f.variance == pytest.approx([109.0, 34.0])
+
+
+def test_deadband_uses_noise_floor_and_one_step():
+    f = ErrorFilter(solve_noise=3.0)
+    assert not f.within_noise(0, 0.1)  # no estimate yet
+
+    # Floor is 2 sigma = 6"
+    f.update(5, 7)
+    assert f.within_noise(0, 0.1)
+    assert not f.within_noise(1, 0.1)
+    # Unless one motor step is larger still
+    assert f.within_noise(1, 10.0)
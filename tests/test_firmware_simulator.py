@@ -0,0 +1,27 @@
+"""
+The simulator boots once per connect
+"""
+
+import time
+
+from firmware_simulator import BOOT_DELAY, FirmwareSimulator
+from polar_align_control import PolarAlignController
+
+
+def test_connect_boots_simulator_once():
+    sim = FirmwareSimulator(speedup=2)
+    port = sim.start()
+    controller = PolarAlignController()
+    try:
+        # connect() opens the port twice: the fast open, then the probe
+        assert controller.connect(port)
+        assert controller.move_altitude(200)
+
+        # A second reboot would land here and zero the position
+        time.sleep(BOOT_DELAY / sim.speedup + 0.5)
+        controller.update_position(force=True)
+        assert controller.alt_position == 200
+        assert sim.alt_position == 200
+    finally:
+        controller.disconnect()
+        sim.stop()
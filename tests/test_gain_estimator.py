@@ -0,0 +1,59 @@
+"""
+Online fit of the mount's arcsec-per-step response
+"""
+
+import pytest
+
+from gain_estimator import MAX_GAIN_RATIO, GainEstimator
+
+
+def test_first_correction_uses_calibration():
+    estimator = GainEstimator(10.0, 20.0)
+    assert estimator.steps_per_arcsec == pytest.approx((10.0, 20.0))
+    assert estimator.correction(30, 40) == (300, 800)
+
+
+def test_one_update_moves_gain_toward_observation():
+    estimator = GainEstimator(10.0, 20.0, solve_noise=1.0)
+    # 100 ALT steps removed 15" where the calibration predicted 10"
+    estimator.update((100, 0), (20, 0), (5, 0))
+
+    # Prior variance (0.5 * 0.1)^2 = 0.0025, so the gain is
+    # 0.1 + 0.0025 * 100 / (100^2 * 0.0025 + 1) * 5
+    assert estimator.gain[0][0] == pytest.approx(0.1 + 0.25 / 26 * 5)
+    # AZ saw exactly what it expected (nothing)
+    assert estimator.gain[1] == pytest.approx([0.0, 0.05])
+    assert estimator.updates == 1
+
+
+def test_converges_to_true_gains_with_coupling():
+    true = [[0.125, 0.01], [0.004, 0.04]]
+    estimator = GainEstimator(10.0, 20.0, solve_noise=1.0)
+    for steps in [(200, 0), (0, 300), (150, 150), (-100, 250), (300, -50), (80, 80)] * 3:
+        change = [true[axis][0] * steps[0] + true[axis][1] * steps[1] for axis in range(2)]
+        estimator.update(steps, change, (0.0, 0.0))
+
+    for axis in range(2):
+        assert estimator.gain[axis] == pytest.approx(true[axis], rel=0.02)
+    assert estimator.steps_per_arcsec == pytest.approx((8.0, 25.0), rel=0.02)
+    assert estimator.coupling == pytest.approx((0.25, 0.032), rel=0.05)
+
+    # The next correction inverts the fitted matrix
+    alt_steps, az_steps = estimator.correction(20.0, 8.0)
+    assert true[0][0] * alt_steps + true[0][1] * az_steps == pytest.approx(20.0, abs=0.5)
+    assert true[1][0] * alt_steps + true[1][1] * az_steps == pytest.approx(8.0, abs=0.5)
+
+
+def test_runaway_gain_is_clamped():
+    estimator = GainEstimator(10.0, 20.0, solve_noise=0.1)
+    # The error grew after the move: a wrong-signed observation
+    for _ in range(5):
+        estimator.update((100, 0), (10, 0), (60, 0))
+    assert estimator.gain[0][0] == pytest.approx(0.1 / MAX_GAIN_RATIO)
+
+
+def test_zero_move_is_ignored():
+    estimator = GainEstimator(10.0, 20.0)
+    estimator.update((0, 0), (10, 10), (0, 0))
+    assert estimator.updates == 0
+    assert estimator.steps_per_arcsec == pytest.approx((10.0, 20.0))
@@ -0,0 +1,96 @@
+"""
+Tailing AutoPA logs: partial lines, truncation and rollover
+"""
+
+import os
+
+from log_watcher import LogFollower, LogReader
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_reader_skips_existing_text(tmp_path):
+    log = tmp_path / 'a.log'
+    append(log, "old line\n")
+    reader = LogReader(log)
+    append(log, "new line\n")
+    assert reader.read_lines() == ["new line"]
+    reader.close()
+
+
+def test_reader_holds_back_partial_line(tmp_path):
+    log = tmp_path / 'a.log'
+    log.write_text('')
+    reader = LogReader(log)
+
+    append(log, "first\nsec")
+    assert reader.read_lines() == ["first"]
+    append(log, "ond\n")
+    assert reader.read_lines() == ["second"]
+
+    append(log, "last")
+    assert reader.read_lines() == []
+    assert reader.read_lines(final=True) == ["last"]
+    reader.close()
+
+
+def test_reader_starts_over_after_truncation(tmp_path):
+    log = tmp_path / 'a.log'
+    log.write_text('')
+    reader = LogReader(log)
+    append(log, "a long line before truncation\n")
+    assert reader.read_lines() == ["a long line before truncation"]
+
+    log.write_text("fresh\n")
+    assert reader.read_lines() == ["fresh"]
+    reader.close()
+
+
+def test_reader_finishes_replaced_file_then_reads_new_one(tmp_path):
+    log = tmp_path / 'a.log'
+    log.write_text('')
+    reader = LogReader(log)
+    append(log, "done\ncut")
+
+    os.rename(log, tmp_path / 'a.old')
+    log.write_text("replacement\n")
+    assert reader.read_lines() == ["done", "cut", "replacement"]
+    reader.close()
+
+
+def test_follower_rolls_over_to_new_log(tmp_path):
+    first = tmp_path / 'one.log'
+    append(first, "skipped\n")
+    follower = LogFollower(tmp_path, '*.log')
+    assert follower.path == first
+
+    append(first, "tail\nunterminated")
+    assert follower.read_lines() == ["tail"]
+
+    second = tmp_path / 'two.log'
+    append(second, "new log\n")
+    assert follower.wait(timeout=5)
+    # The old log is drained, including its last line without a newline
+    assert follower.read_lines() == ["unterminated", "new log"]
+    assert follower.path == second
+
+    # Writing the old log again does not pull the follower back
+    append(first, "stale\n")
+    append(second, "more\n")
+    follower.wait(timeout=1)
+    assert follower.read_lines() == ["more"]
+    follower.close()
+
+
+def test_follower_waits_for_first_log(tmp_path):
+    follower = LogFollower(tmp_path, '*.log')
+    assert follower.path is None
+    assert follower.read_lines() == []
+
+    append(tmp_path / 'first.log', "hello\n")
+    assert follower.wait(timeout=5)
+    assert follower.read_lines() == ["hello"]
+    follower.close()
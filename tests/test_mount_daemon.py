@@ -0,0 +1,56 @@
+"""
+Stopping a queued move through the mount daemon
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from firmware_simulator import FirmwareSimulator
+from mount_daemon import MountClient, MountDaemon
+from move_queue import MoveQueue
+from polar_align_control import PolarAlignController
+
+
+@pytest.fixture
+def client(tmp_path):
+    sim = FirmwareSimulator(speedup=2)
+    controller = PolarAlignController()
+    assert controller.connect(sim.start())
+    daemon = MountDaemon(controller, os.path.join(tmp_path, 'mount.sock'))
+    assert daemon.start()
+    server = threading.Thread(target=daemon.serve_forever, daemon=True)
+    server.start()
+
+    client = MountClient(daemon.socket_path)
+    assert client.connect()
+    yield client
+
+    client.disconnect()
+    daemon.server.shutdown()
+    server.join(timeout=2)
+    controller.disconnect()
+    sim.stop()
+
+
+def test_stop_interrupts_move_queued_by_daemon_client(client):
+    # As jog does: the queue's thread blocks on the move while the
+    # caller stops it
+    moves = MoveQueue(client)
+    try:
+        move = moves.submit('ALT', 4000)
+        deadline = time.monotonic() + 2
+        while moves.current is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert moves.current is not None
+
+        started = time.monotonic()
+        assert moves.stop()
+        assert time.monotonic() - started < 0.5
+
+        assert move.wait(2) is False
+        assert move.cancelled
+    finally:
+        moves.close()
@@ -0,0 +1,42 @@
+"""
+Predicted firmware move durations
+"""
+
+import pytest
+
+from polar_align_control import STEP_OVERHEAD, move_duration, ramp_duration
+
+
+def test_constant_speed():
+    assert move_duration(800, 800) == pytest.approx(1.0 + 800 * STEP_OVERHEAD)
+    assert move_duration(-800, 800) == move_duration(800, 800)
+
+
+def test_trapezoid_adds_one_ramp_time():
+    # Ramps take 800^2 / (2 * 1000) = 320 steps each; 2000 steps cruise in
+    # between, so 2000 / 800 + 800 / 1000 = 3.3 s
+    assert ramp_duration(2000, 800, 1000) == pytest.approx(3.3)
+    assert move_duration(2000, 800, acceleration=1000) == pytest.approx(3.3 + 2000 * STEP_OVERHEAD)
+
+
+def test_triangle_when_speed_is_never_reached():
+    # 200 < 640 steps: up and down over 100 steps each, 2 * sqrt(200 / 1000)
+    assert ramp_duration(200, 800, 1000) == pytest.approx(0.894427, abs=1e-6)
+
+
+def test_profiles_meet_at_the_boundary():
+    # Exactly two ramps: both formulas give 1.6 s
+    assert ramp_duration(640, 800, 1000) == pytest.approx(1.6)
+    assert ramp_duration(639.999, 800, 1000) == pytest.approx(1.6, abs=1e-3)
+
+
+def test_backlash_is_a_separate_run():
+    expected = (400 / 800 + 400 * STEP_OVERHEAD) + (100 / 800 + 100 * STEP_OVERHEAD)
+    assert move_duration(-400, 800, backlash=100) == pytest.approx(expected)
+    # Each run ramps on its own
+    assert move_duration(2000, 800, backlash=200, acceleration=1000) == pytest.approx(
+        3.3 + 2 * (200 / 1000) ** 0.5 + 2200 * STEP_OVERHEAD)
+
+
+def test_zero_steps_take_no_time():
+    assert move_duration(0, 800, backlash=100, acceleration=1000) == 0.0
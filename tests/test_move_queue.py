@@ -0,0 +1,61 @@
+"""
+Outcome of moves merged by the move queue
+"""
+
+import threading
+
+from move_queue import MoveQueue
+
+
+class FakeHandle:
+    def __init__(self):
+        self.finished = threading.Event()
+        self.cancelled = False
+
+    def wait(self, timeout=None):
+        self.finished.wait(timeout)
+        return not self.cancelled
+
+
+class FakeController:
+    def __init__(self):
+        self.sent = []
+        self.started = threading.Event()
+        self.handle = None
+
+    def start_move_azimuth(self, steps):
+        self.sent.append(steps)
+        self.handle = FakeHandle()
+        self.started.set()
+        return self.handle
+
+    start_move_altitude = start_move_azimuth
+
+    def stop(self):
+        if self.handle is not None:
+            self.handle.cancelled = True
+            self.handle.finished.set()
+        return True
+
+
+def test_stop_cancels_every_move_merged_into_running_batch():
+    controller = FakeController()
+    queue = MoveQueue(controller)
+    try:
+        # Hold the dispatcher on a first move so the next two are merged
+        first = queue.submit('AZ', 10)
+        assert controller.started.wait(1)
+        merged = [queue.submit('AZ', 50), queue.submit('AZ', 50)]
+        controller.started.clear()
+        controller.handle.finished.set()
+        assert first.wait(1)
+
+        assert controller.started.wait(1)
+        assert controller.sent == [10, 100]
+
+        assert queue.stop()
+        for move in merged:
+            assert move.wait(1) is False
+            assert move.cancelled
+    finally:
+        queue.close()
@@ -0,0 +1,85 @@
+"""
+Reply routing after a lost reply
+"""
+
+from polar_align_control import PendingCommand, ReplyRouter
+
+
+def send(router, command):
+    pending = PendingCommand(command)
+    router.register(pending)
+    return pending
+
+
+def test_lost_reply_does_not_shift_later_replies():
+    router = ReplyRouter()
+    lost = send(router, "P")
+    assert lost.wait(0.01) is None
+
+    for n in range(3):
+        pending = send(router, "P")
+        router.feed(f"POS:ALT={n},AZ=0")
+        assert pending.wait(0.01) == f"POS:ALT={n},AZ=0"
+
+    # The abandoned query was dropped once a later one got its reply
+    assert router._pending == []
+
+
+def test_late_reply_is_absorbed_by_abandoned_command():
+    router = ReplyRouter()
+    lost = send(router, "P")
+    assert lost.wait(0.01) is None
+
+    move = send(router, "A100")
+    router.feed("POS:ALT=0,AZ=0")
+    router.feed("OK:ALT_MOVE")
+
+    assert move.wait(0.01) == "OK:ALT_MOVE"
+    assert router.messages.empty()
+
+
+def test_error_is_not_given_to_abandoned_command():
+    router = ReplyRouter()
+    lost = send(router, "P")
+    assert lost.wait(0.01) is None
+
+    speed = send(router, "V5000")
+    router.feed("ERROR:Invalid speed")
+
+    assert speed.wait(0.01) == "ERROR:Invalid speed"
+    assert lost.response is None
+
+
+def test_unknown_tag_echo_leaves_tagged_commands_pending():
+    router = ReplyRouter()
+    first = PendingCommand("A100", tag=5)
+    second = PendingCommand("Z100", tag=6)
+    router.register(first)
+    router.register(second)
+
+    # Late echo of a timed-out probe
+    router.feed("#2")
+    router.feed("OK:ALT_MOVE")
+    router.feed("#5")
+    router.feed("OK:AZ_MOVE")
+    router.feed("#6")
+
+    assert first.wait(0.01) == "OK:ALT_MOVE"
+    assert second.wait(0.01) == "OK:AZ_MOVE"
+    assert router.messages.empty()
+
+
+def test_tag_echo_completes_skipped_tagged_commands():
+    router = ReplyRouter()
+    lost = PendingCommand("E", tag=1)
+    move = PendingCommand("A100", tag=2)
+    router.register(lost)
+    router.register(move)
+
+    router.feed("OK:ALT_MOVE")
+    router.feed("#2")
+
+    assert move.wait(0.01) == "OK:ALT_MOVE"
+    # Its echo is never coming once a later tag has been echoed
+    assert lost.wait(0.01) is None
+    assert router._pending == []
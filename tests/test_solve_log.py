@@ -0,0 +1,59 @@
+"""
+Parsing SharpCap and NINA polar alignment solves
+"""
+
+import pytest
+
+from solve_log import parse_text, timestamp_seconds
+
+SHARPCAP_LOG = (
+    "Info\t21:04:12.000001\tCamera exposure started\n"
+    "Info\t21:04:13.123456\tPolar align AltAzCor=Alt=0.52,Az=-0.31\n"
+    "Debug\t21:04:14.000000\tAltAzCor=Alt=9,Az=9 (no Info tag)\n"
+    "Info\t21:04:15.500000\tPolar align AltAzCor=Alt=-0.10,Az=0.05\n"
+)
+
+NINA_LOG = (
+    '21:04:13.123 - Starting solve\n'
+    '21:04:13.456 - {"Alt": 31.2, "Az": -18.6, "Total": 36.3}\n'
+    '21:04:14.000 - {not json}\n'
+    '21:04:16.789 - {"Alt": -2.5, "Az": 1.0, "Total": 2.7}\n'
+)
+
+
+def test_sharpcap_solves_in_arcseconds():
+    errors = parse_text(SHARPCAP_LOG, 'sharpcap')
+    assert [e['timestamp'] for e in errors] == ['21:04:13.123456', '21:04:15.500000']
+
+    first = errors[0]
+    # Arcminutes to arcseconds: 0.52' = 31.2", -0.31' = -18.6"
+    assert first['alt_error'] == pytest.approx(31.2)
+    assert first['az_error'] == pytest.approx(-18.6)
+    # sqrt(31.2^2 + 18.6^2)
+    assert first['total_error'] == pytest.approx(36.3235, abs=1e-4)
+
+    assert errors[1]['alt_error'] == pytest.approx(-6.0)
+    assert errors[1]['az_error'] == pytest.approx(3.0)
+
+
+def test_nina_solves_skip_malformed_json():
+    errors = parse_text(NINA_LOG, 'nina')
+    assert [(e['timestamp'], e['alt_error'], e['az_error'], e['total_error']) for e in errors] == [
+        ('21:04:13.456', 31.2, -18.6, 36.3),
+        ('21:04:16.789', -2.5, 1.0, 2.7),
+    ]
+
+
+def test_chunk_without_solves():
+    assert parse_text("Info\t21:00:00.000000\tNothing here\n", 'sharpcap') == []
+    assert parse_text("", 'nina') == []
+
+
+def test_solve_on_last_line_without_newline():
+    text = "Info\t01:02:03.000000\tAltAzCor=Alt=1,Az=0"
+    assert [e['alt_error'] for e in parse_text(text, 'sharpcap')] == [60.0]
+
+
+def test_timestamp_seconds():
+    assert timestamp_seconds('21:04:13.5') == 21 * 3600 + 4 * 60 + 13.5
+    assert timestamp_seconds('00:00:00.000') == 0.0
@@ -0,0 +1,38 @@
+"""
+Solves logged too soon after a correction are ignored
+"""
+
+from plate_solving_autopa import SETTLE_TIME, is_stale_solve
+
+EXPOSURE = 4.0
+SOLVE_LATENCY = 3.0
+
+
+def solve_at(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:09.6f}"
+
+
+def stale(logged, moved_at):
+    return is_stale_solve(solve_at(logged), moved_at, EXPOSURE, SOLVE_LATENCY)
+
+
+def test_solve_logged_within_solve_latency_is_stale():
+    moved_at = 12 * 3600.0
+    # The exposure could have started before the mount settled; its solve
+    # is only logged a little later
+    assert stale(moved_at + SETTLE_TIME + EXPOSURE + 1.0, moved_at)
+    assert not stale(moved_at + SETTLE_TIME + EXPOSURE + 3.5, moved_at)
+
+
+def test_solve_logged_before_the_move_is_stale():
+    moved_at = 12 * 3600.0
+    assert stale(moved_at - 10.0, moved_at)
+
+
+def test_solve_latency_wraps_at_midnight():
+    moved_at = 86400.0 - 2.0
+    # Due at 00:00:05.5 the next day
+    assert stale(SETTLE_TIME + EXPOSURE, moved_at)
+    assert not stale(SETTLE_TIME + EXPOSURE + 2.0, moved_at)